@@ -1,19 +1,26 @@
-'''
-Created on Feb 24, 2012
-
-@author: anorberg
-'''
-
-from fakeDataGenerator.model import IModelBehavior
-import operator
-
-class add_n(IModelBehavior):
-    '''
-    IModelBehavior for an n-ary function that adds values together.
-    '''
-    arity=(2, None)
-    isNoise = False
-    def calculate(self, *args):
-        return reduce(operator.add, args)
-    def generate_name(self, *args):
+'''
+Created on Feb 24, 2012
+
+@author: anorberg
+'''
+
+from fakeDataGenerator.model import IModelBehavior
+import operator
+import numpy
+
+class add_n(IModelBehavior):
+    '''
+    IModelBehavior for an n-ary function that adds values together.
+    '''
+    arity=(2, None)
+    isNoise = False
+    isDeterministic = True
+    isCommutative = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, *args):
+        return reduce(operator.add, args)
+    def calculateBlock(self, size, *columns):
+        return reduce(numpy.add, [numpy.asarray(column, float) for column in columns])
+    def generate_name(self, *args):
         return "+".join(args)
\ No newline at end of file
@@ -1,29 +1,36 @@
-'''
-Created on Feb 24, 2012
-
-@author: anorberg
-'''
-
-from __future__ import division
-from fakeDataGenerator.model import IModelBehavior
-from operator import add
-
-EXPRESSIVE_NAME = False
-
-class avg_n(IModelBehavior):
-    '''
-    A model behavior that performs an averaging.
-    '''
-    arity=(2, None)
-    isNoise = False
-    def calculate(self, *args):
-        total = reduce(add, args)
-        return total / len(args) #true division enabled
-    
-    if EXPRESSIVE_NAME:
-        def generate_name(self, *args):
-            sumStr = "+".join(args)
-            return "({0})/{1}".format(sumStr, len(args))
-    else:
-        def generate_name(self, *args):
+'''
+Created on Feb 24, 2012
+
+@author: anorberg
+'''
+
+from __future__ import division
+from fakeDataGenerator.model import IModelBehavior
+from operator import add
+import numpy
+
+EXPRESSIVE_NAME = False
+
+class avg_n(IModelBehavior):
+    '''
+    A model behavior that performs an averaging.
+    '''
+    arity=(2, None)
+    isNoise = False
+    isDeterministic = True
+    isCommutative = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, *args):
+        total = reduce(add, args)
+        return total / len(args) #true division enabled
+    def calculateBlock(self, size, *columns):
+        return reduce(numpy.add, [numpy.asarray(column, float) for column in columns]) / len(columns)
+    
+    if EXPRESSIVE_NAME:
+        def generate_name(self, *args):
+            sumStr = "+".join(args)
+            return "({0})/{1}".format(sumStr, len(args))
+    else:
+        def generate_name(self, *args):
             return "mean({0})".format(", ".join(args))
\ No newline at end of file
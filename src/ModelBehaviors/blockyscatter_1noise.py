@@ -10,14 +10,19 @@ Plugin IModelBehavior that implements the blocky-scatter behavior.
 
 from fakeDataGenerator.model import IModelBehavior
 from random import randint
+import numpy
 
 class BlockyScatter(IModelBehavior):
     arity=(1,1)
     isNoise = True
+    isVectorizable = True
+    cost = 2
     def __init__(self):
         self.unit = randint(1, 20)
     def calculate(self, value):
         return (randint(-1,1) * self.unit) + value
+    def calculateBlock(self, size, values):
+        return (self.rng.randint(-1, 2, size) * self.unit) + values
     def generate_name(self, name):
         return '%s +/-/0 %d' % (name, self.unit)
 
@@ -9,10 +9,14 @@ Plugin IModelBehavior that implements something similar to conflicting upregulat
 """
 
 from fakeDataGenerator.model import IModelBehavior
+from fakeDataGenerator import jitKernels
 
 class Downregulate(IModelBehavior):
     arity=(2,None)
     isNoise = False
+    isDeterministic = True
+    isVectorizable = True
+    cost = 3
     def calculate(self, *values):
         negative = values[0] < 0.0
         ret = abs(values[0])
@@ -21,6 +25,8 @@ class Downregulate(IModelBehavior):
                 negative = False
             ret -= abs(s)
         return ret * [1.0,-1.0][negative]
+    def calculateBlock(self, size, *columns):
+        return jitKernels.downregulate(columns)
     def generate_name(self, *names):
         return '{0} downregulated by: {1}'.format(names[0], ", ".join(names[1:]))
 
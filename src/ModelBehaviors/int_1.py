@@ -9,16 +9,27 @@ Plugin IModelBehavior that implements the int operator.
 """
 
 from fakeDataGenerator.model import IModelBehavior
+from fakeDataGenerator import missingMasks
 import math
+import numpy
 
 class IntCoerce(IModelBehavior):
     arity=(1,1)
     isNoise = False
+    isDeterministic = True
+    isVectorizable = True
+    cost = 1
     def calculate(self, value):
         # Note: retains floating-point type
         if math.isnan(value) or math.isinf(value):
             return float('nan') 
         return float(int(value))
+    def calculateBlock(self, size, values):
+        values = numpy.asarray(values, float)
+        invalid = missingMasks.invalidRows([values])
+        ret = numpy.trunc(numpy.where(invalid, 0.0, values)) + 0.0 #+0.0 turns -0.0 into 0.0, as int() does
+        ret[invalid] = float('nan')
+        return ret
     def generate_name(self, name):
         return 'int(%s)' % name
 
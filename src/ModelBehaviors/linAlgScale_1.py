@@ -9,14 +9,22 @@ Plugin IModelBehavior that implements the scale operator.
 """
 
 from fakeDataGenerator.model import IModelBehavior
-from random import random
+import random
+import numpy
 
 class Scale(IModelBehavior):
     arity=(1,1)
     isNoise = False
+    isDeterministic = True
+    isVectorizable = True
+    cost = 1
     scaleValue = random.random() * 10.0
     def calculate(self, value):
         return self.scaleValue * value
+    def calculateBlock(self, size, values):
+        return self.scaleValue * numpy.asarray(values, float)
+    def affineCoefficients(self):
+        return self.scaleValue, 0.0
     def generate_name(self, name):
-        return '%s + %.6f' % (name, self.scaleValue)
+        return '%s * %.6f' % (name, self.scaleValue)
 
@@ -9,15 +9,23 @@ Plugin IModelBehavior that implements the translate operator.
 """
 
 from fakeDataGenerator.model import IModelBehavior
-from random import random
+import random
+import numpy
 
 class Translate(IModelBehavior):
     arity=(1,1)
     isNoise = False
+    isDeterministic = True
+    isVectorizable = True
+    cost = 1
     translationValue = (random.random() * 20.0) - 10.0
     
     def calculate(self, value):
         return self.translationValue + value
+    def calculateBlock(self, size, values):
+        return self.translationValue + numpy.asarray(values, float)
+    def affineCoefficients(self):
+        return 1.0, self.translationValue
     def generate_name(self, name):
         return '%s + %.6f' % (name, self.translationValue)
 
@@ -1,22 +1,30 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-'''
-
-import math
-from fakeDataGenerator.model import IModelBehavior
-
-class ln_1noise(IModelBehavior):
-    arity=(1, 1)
-    isNoise = False
-    def calculate(self, value):
-        if value == 0: return 0 #wrong, but, eh, whatever. should probably just remove ln
-        return math.log(abs(value))
-    def generate_name(self, name):
-        return "ln " + name
-
-if __name__ == '__main__':
-    import doctest
-    doctest.testmod(verbose=True)
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+'''
+
+import math
+from fakeDataGenerator.model import IModelBehavior
+import numpy
+
+class ln_1noise(IModelBehavior):
+    arity=(1, 1)
+    isNoise = False
+    isDeterministic = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, value):
+        if value == 0: return 0 #wrong, but, eh, whatever. should probably just remove ln
+        return math.log(abs(value))
+    def calculateBlock(self, size, values):
+        values = numpy.asarray(values, float)
+        zero = values == 0
+        return numpy.where(zero, 0.0, numpy.log(numpy.where(zero, 1.0, numpy.abs(values))))
+    def generate_name(self, name):
+        return "ln " + name
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
     
\ No newline at end of file
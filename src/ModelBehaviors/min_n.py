@@ -1,17 +1,28 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-
-Plugin IModelBehavior that implements the "min" operation.
-'''
-
-from fakeDataGenerator.model import IModelBehavior
-
-class min_n(IModelBehavior):
-    arity=(2, None)
-    isNoise = False
-    def calculate(self, *values):
-        return min(values)
-    def generate_name(self, *names):
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+
+Plugin IModelBehavior that implements the "min" operation.
+'''
+
+from fakeDataGenerator.model import IModelBehavior
+import numpy
+
+class min_n(IModelBehavior):
+    arity=(2, None)
+    isNoise = False
+    isDeterministic = True
+    isCommutative = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, *values):
+        return min(values)
+    def calculateBlock(self, size, *columns):
+        #same left-to-right scan as the builtin, so nan handling matches calculate
+        ret = numpy.asarray(columns[0], float)
+        for column in columns[1:]:
+            ret = numpy.where(column < ret, column, ret)
+        return ret
+    def generate_name(self, *names):
         return 'min({0})'.format(", ".join(names))
\ No newline at end of file
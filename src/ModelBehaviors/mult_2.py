@@ -1,20 +1,27 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-'''
-
-from fakeDataGenerator.model import IModelBehavior
-
-class mult_2(IModelBehavior):
-    arity=(2, 2)
-    isNoise = False
-    def calculate(self, a, b):
-        return a * b
-    def generate_name(self, a, b):
-        return "{0} * {1}".format(a, b)
-
-if __name__ == '__main__':
-    import doctest
-    doctest.testmod(verbose=True)
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+'''
+
+from fakeDataGenerator.model import IModelBehavior
+import numpy
+
+class mult_2(IModelBehavior):
+    arity=(2, 2)
+    isNoise = False
+    isDeterministic = True
+    isCommutative = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, a, b):
+        return a * b
+    def calculateBlock(self, size, a, b):
+        return numpy.asarray(a, float) * b
+    def generate_name(self, a, b):
+        return "{0} * {1}".format(a, b)
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
     
\ No newline at end of file
@@ -1,20 +1,28 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-'''
-
-from fakeDataGenerator.model import IModelBehavior
-
-class oneminus_1noise(IModelBehavior):
-    arity = (1, 1)
-    isNoise = True
-    def calculate(self, arg):
-        return 1.0-arg
-    def generate_name(self, name):
-        return "1-"+name
-
-if __name__ == '__main__':
-    import doctest
-    doctest.testmod(verbose=True)
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+'''
+
+from fakeDataGenerator.model import IModelBehavior
+import numpy
+
+class oneminus_1noise(IModelBehavior):
+    arity = (1, 1)
+    isNoise = True
+    isDeterministic = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, arg):
+        return 1.0-arg
+    def calculateBlock(self, size, args):
+        return 1.0-numpy.asarray(args, float)
+    def affineCoefficients(self):
+        return -1.0, 1.0
+    def generate_name(self, name):
+        return "1-"+name
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
     
\ No newline at end of file
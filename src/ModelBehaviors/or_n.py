@@ -9,18 +9,39 @@ Plugin IModelBehavior that implements the or operator.
 """
 
 from fakeDataGenerator.model import IModelBehavior
+from fakeDataGenerator import missingMasks
 import math
+import numpy
 
 class OrValues(IModelBehavior):
     arity=(2,None)
     isNoise = False
+    isDeterministic = True
+    isCommutative = True
+    isVectorizable = True
+    cost = 4
     def calculate(self, *values):
-        if True in [math.isnan(value) or math.isinf(value) for value in values]:
+        if True in [math.isnan(value) or math.isinf(value * 131072.0) for value in values]: #too big to scale counts as infinite
             return float('nan')
         ret = int(values[0]*131072.0) #power of 2 rounds ints cleanly
         for s in values[1:]:
             ret |= int(s*131072.0)
         return ret/131072.0
+    def calculateBlock(self, size, *columns):
+        columns = [numpy.asarray(column, float) for column in columns]
+        invalid = missingMasks.invalidRows(columns)
+        scaled = [numpy.where(invalid, 0.0, column) * 131072.0 for column in columns]
+        huge = numpy.zeros(size, bool)
+        for column in scaled:
+            huge |= numpy.abs(column) >= 2.0**62 #past int64; use Python's unbounded ints
+        ret = numpy.trunc(scaled[0]).astype(numpy.int64)
+        for column in scaled[1:]:
+            ret = numpy.bitwise_or(ret, numpy.trunc(column).astype(numpy.int64))
+        ret = ret / 131072.0
+        for index in numpy.flatnonzero(huge & ~invalid):
+            ret[index] = self.calculate(*[float(column[index]) for column in columns])
+        ret[invalid] = float('nan')
+        return ret
     def generate_name(self, *names):
         return 'OR({0})'.format(", ".join(names))
 
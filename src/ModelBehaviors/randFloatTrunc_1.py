@@ -10,12 +10,18 @@ Plugin IModelBehavior that implements the randFloatTrunc operator.
 
 from fakeDataGenerator.model import IModelBehavior
 from random import randint
+import numpy
 
 class RandFloatTrunc(IModelBehavior):
     arity=(1,1)
     isNoise = False
+    isVectorizable = True
+    cost = 2
     def calculate(self, value):
-        return float("{0:.%df}" % randint(0,6)).format(value)
+        return float(("{0:.%df}" % randint(0,6)).format(value))
+    def calculateBlock(self, size, values):
+        scales = 10.0 ** self.rng.randint(0, 7, size)
+        return numpy.round(numpy.asarray(values, float) * scales) / scales
     def generate_name(self, name):
         return 'randFloatTrunc(%s)' % name
 
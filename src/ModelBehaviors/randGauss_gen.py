@@ -1,24 +1,29 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-'''
-
-from fakeDataGenerator.model import IModelBehavior
-import random
-
-class randGauss_gen(IModelBehavior):
-    arity = (0, 0)
-    isNoise = False
-    STDDEV_MEAN = 0.5
-    MEAN_MEAN = 0
-    MEAN_STDDEV = 0.2
-    STDDEV_STDDEV = 0.4
-    
-    def __init__(self):
-        self.mean = random.gauss(self.MEAN_MEAN, self.STDDEV_MEAN)
-        self.stddev = abs(random.gauss(self.MEAN_STDDEV, self.STDDEV_STDDEV))
-    def calculate(self):
-        return random.gauss(self.mean, self.stddev)
-    def generate_name(self):
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+'''
+
+from fakeDataGenerator.model import IModelBehavior
+import random
+import numpy
+
+class randGauss_gen(IModelBehavior):
+    arity = (0, 0)
+    isNoise = False
+    isVectorizable = True
+    cost = 2
+    STDDEV_MEAN = 0.5
+    MEAN_MEAN = 0
+    MEAN_STDDEV = 0.2
+    STDDEV_STDDEV = 0.4
+    
+    def __init__(self):
+        self.mean = random.gauss(self.MEAN_MEAN, self.STDDEV_MEAN)
+        self.stddev = abs(random.gauss(self.MEAN_STDDEV, self.STDDEV_STDDEV))
+    def calculate(self):
+        return random.gauss(self.mean, self.stddev)
+    def calculateBlock(self, size):
+        return self.rng.normal(self.mean, self.stddev, size)
+    def generate_name(self):
         return "gaussian_random(mean={0}, stddev={1})".format(self.mean, self.stddev)
\ No newline at end of file
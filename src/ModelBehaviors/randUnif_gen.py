@@ -1,16 +1,20 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-'''
-
-from fakeDataGenerator.model import IModelBehavior
-import random
-
-class randUnif_gen(IModelBehavior):
-    arity=(0,0)
-    isNoise = False
-    def calculate(self):
-        return random.random()
-    def generate_name(self):
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+'''
+
+from fakeDataGenerator.model import IModelBehavior
+import random
+
+class randUnif_gen(IModelBehavior):
+    arity=(0,0)
+    isNoise = False
+    isVectorizable = True
+    cost = 2
+    def calculate(self):
+        return random.random()
+    def calculateBlock(self, size):
+        return self.rng.random_sample(size)
+    def generate_name(self):
         return "rand()"
\ No newline at end of file
@@ -9,13 +9,18 @@ Plugin IModelBehavior that implements randomized propagation of missing values.
 
 from fakeDataGenerator.model import IModelBehavior
 import random
+import numpy
 
 class sieve(IModelBehavior):
     arity=(1, 0)
     isNoise = True
+    isVectorizable = True
+    cost = 2
     DROP_PROBABILITY = 1/(random.randint(1,25)*10.0)
     def calculate(self,name):
         return [name,float('nan')][random.random() < self.DROP_PROBABILITY]
+    def calculateBlock(self, size, values):
+        return numpy.where(self.rng.random_sample(size) < self.DROP_PROBABILITY, float('nan'), values)
     def generate_name(self,name):
         return "sieveValues({0}, drop_prob={1})"\
             .format(name, self.DROP_PROBABILITY)
\ No newline at end of file
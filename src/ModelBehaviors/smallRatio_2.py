@@ -1,20 +1,30 @@
-'''
-Created on Feb 27, 2012
-
-@author: anorberg
-'''
-from __future__ import division
-from fakeDataGenerator.model import IModelBehavior
-
-class smallRatio_2(IModelBehavior):
-    arity=(2, 2)
-    isNoise = False
-    def calculate(self, a, b):
-        a, b = abs(a), abs(b)
-        if a > b:
-            a, b = b, a
-        if b == 0:
-            return 1
-        return a / b
-    def generate_name(self, a, b):
+'''
+Created on Feb 27, 2012
+
+@author: anorberg
+'''
+from __future__ import division
+from fakeDataGenerator.model import IModelBehavior
+import numpy
+
+class smallRatio_2(IModelBehavior):
+    arity=(2, 2)
+    isNoise = False
+    isDeterministic = True
+    isCommutative = True
+    isVectorizable = True
+    cost = 1
+    def calculate(self, a, b):
+        a, b = abs(a), abs(b)
+        if a > b:
+            a, b = b, a
+        if b == 0:
+            return 1
+        return a / b
+    def calculateBlock(self, size, a, b):
+        a, b = numpy.abs(a), numpy.abs(b)
+        swap = a > b
+        a, b = numpy.where(swap, b, a), numpy.where(swap, a, b)
+        return numpy.where(b == 0, 1.0, a / numpy.where(b == 0, 1.0, b))
+    def generate_name(self, a, b):
         return "|{0}:{1} ratio|".format(a, b)
\ No newline at end of file
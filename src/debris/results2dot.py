@@ -1,29 +1,37 @@
-'''
-Created on Jan 24, 2012
-
-@author: anorberg
-'''
-
-import csv
-import sys
-
-
-MIRN = ':MIRN:'
-
-if __name__ == "__main__":
-    source = open(sys.argv[1], "rb")
-    fromCol = int(sys.argv[2])
-    toCol = int(sys.argv[3])
-    table = csv.reader(source, dialect=csv.excel_tab)
-    
-    print "digraph Relations{"
-    
-    for row in table:
-        #strip MIRN relations
-        src = row[fromCol]
-        dest = row[toCol]
-        if (src.find(MIRN) < 0) and (dest.find(MIRN) < 0):
-            print '"' + row[fromCol] + '"->"' + row[toCol] + '"'
-    
-    print "}"
-    
+'''
+Created on Jan 24, 2012
+
+@author: anorberg
+'''
+
+import csv
+import sys
+
+
+MIRN = ':MIRN:'
+
+def relations(source, fromCol, toCol, scoreCol = None):
+    """
+    Generate the relations in a tab-separated inference-results table, skipping MIRN relations:
+    (source, destination) pairs, or (source, destination, score text) triples if scoreCol is given.
+    """
+    for row in csv.reader(source, dialect=csv.excel_tab):
+        src = row[fromCol]
+        dest = row[toCol]
+        if (src.find(MIRN) < 0) and (dest.find(MIRN) < 0):
+            if scoreCol is None:
+                yield src, dest
+            else:
+                yield src, dest, row[scoreCol]
+
+if __name__ == "__main__":
+    source = open(sys.argv[1], "rb")
+    fromCol = int(sys.argv[2])
+    toCol = int(sys.argv[3])
+    
+    print "digraph Relations{"
+    
+    for src, dest in relations(source, fromCol, toCol):
+        print '"' + src + '"->"' + dest + '"'
+    
+    print "}"
@@ -0,0 +1,196 @@
+'''
+Score an inferred network against the generator's ground truth (see
+fakeDataGenerator.groundTruth) without going through DOT.
+
+The true edges are loaded as a sorted array of integer keys (source id * nodes + destination id),
+so checking a chunk of predictions is one vectorized searchsorted. The results table is
+read in chunks of rows (through results2dot.relations, so MIRN rows are skipped as
+there), each prediction reduced to a key and a score; duplicates keep their highest
+score. The precision/recall curve is then exact at every score, from one sort.
+
+Ancestor-aware scoring also counts a prediction a -> b as right if a is any ancestor
+of b in the true network- the data can't tell a direct influence from an indirect one.
+Reachability is computed once, as a bitset over the data columns per node, in id
+(dependency) order.
+
+usage, from the src directory (so the fakeDataGenerator package can be imported):
+    python -m debris.scoreInference truthRoot results.tsv fromCol toCol scoreCol [options]
+'''
+
+from __future__ import division
+
+import itertools
+import json
+import optparse
+import sys
+import time
+import numpy
+from debris import results2dot
+from fakeDataGenerator import groundTruth
+
+CHUNK_ROWS = 100000
+
+class TruthIndex(object):
+    """
+    The ground truth as integer keys: the true edges, and with ancestors=True, which data
+    columns are ancestors of which. Names in results may be bare node names or the data
+    files' "name:label" headers.
+    """
+    def __init__(self, truth, undirected = False, ancestors = False):
+        self.nNodes = len(truth.names)
+        self.undirected = undirected
+        self.idsByName = truth.idsByName()
+        edges = numpy.asarray(truth.edges, numpy.int64)
+        self.trueKeys = self.keys(edges[:, 0], edges[:, 1])
+        columnIds = truth.columnIds()
+        self.isColumn = numpy.zeros(self.nNodes, bool)
+        self.isColumn[columnIds] = True
+        between = self.isColumn[edges[:, 0]] & self.isColumn[edges[:, 1]]
+        self.trueBetweenColumns = len(numpy.unique(self.trueKeys[between]))
+        self.trueKeys = numpy.unique(self.trueKeys)
+        self.ancestorBits = None
+        if ancestors:
+            self._computeAncestors(edges, columnIds)
+
+    def keys(self, src, dest):
+        """Integer keys of (src, dest) id pairs; orientation-free if undirected."""
+        if self.undirected:
+            src, dest = numpy.minimum(src, dest), numpy.maximum(src, dest)
+        return src * self.nNodes + dest
+
+    def _computeAncestors(self, edges, columnIds):
+        #bit j of row i: column j is an ancestor of node i. Ids are in dependency order,
+        #so sorting edges by destination means every parent's row is final when it's used.
+        columnBit = numpy.full(self.nNodes, -1, numpy.int64)
+        columnBit[columnIds] = numpy.arange(len(columnIds))
+        width = (len(columnIds) + 7) // 8
+        bits = numpy.zeros((self.nNodes, width), numpy.uint8)
+        own = numpy.zeros((self.nNodes, width), numpy.uint8)
+        own[columnIds, numpy.arange(len(columnIds)) // 8] = 1 << (7 - numpy.arange(len(columnIds)) % 8)
+        for src, dest in edges[numpy.argsort(edges[:, 1], kind='mergesort')].tolist():
+            bits[dest] |= bits[src]
+            bits[dest] |= own[src]
+        self.columnBit = columnBit
+        self.ancestorBits = bits
+        self.ancestorPairs = int(numpy.unpackbits(bits[columnIds], axis=1).sum())
+
+    def ids(self, names):
+        """Ids of names (bare or header-style), -1 for names the truth doesn't have."""
+        found = []
+        for name in names:
+            nodeId = self.idsByName.get(name)
+            if nodeId is None:
+                nodeId = self.idsByName.get(name.split(":", 1)[0], -1)
+            found.append(nodeId)
+        return numpy.array(found, numpy.int64)
+
+    def isTrue(self, keys):
+        positions = numpy.minimum(numpy.searchsorted(self.trueKeys, keys), len(self.trueKeys) - 1)
+        return self.trueKeys[positions] == keys if len(self.trueKeys) else numpy.zeros(len(keys), bool)
+
+    def isAncestor(self, src, dest):
+        """Whether each src is an ancestor of the matching dest (either way round, if undirected)."""
+        result = self._ancestorOf(src, dest)
+        if self.undirected:
+            result |= self._ancestorOf(dest, src)
+        return result
+
+    def _ancestorOf(self, src, dest):
+        bit = self.columnBit[src]
+        valid = bit >= 0
+        result = numpy.zeros(len(src), bool)
+        rows = self.ancestorBits[dest[valid], bit[valid] // 8]
+        result[valid] = (rows >> (7 - bit[valid] % 8).astype(numpy.uint8)) & 1 == 1
+        return result
+
+def readPredictions(source, index, fromCol, toCol, scoreCol, skipHeader = False):
+    """
+    Read the results table in CHUNK_ROWS chunks. Returns (src ids, dest ids, keys, scores, unknown names
+    count) for the distinct predictions, each at its highest score.
+    """
+    rows = results2dot.relations(source, fromCol, toCol, scoreCol)
+    if skipHeader:
+        next(rows, None)
+    keyChunks = []
+    scoreChunks = []
+    unknown = 0
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_ROWS))
+        if not chunk:
+            break
+        srcNames, destNames, scoreTexts = zip(*chunk)
+        src = index.ids(srcNames)
+        dest = index.ids(destNames)
+        known = (src >= 0) & (dest >= 0)
+        unknown += int((~known).sum())
+        keyChunks.append(index.keys(src[known], dest[known]))
+        scoreChunks.append(numpy.array(scoreTexts, float)[known])
+    keys = numpy.concatenate(keyChunks) if keyChunks else numpy.empty(0, numpy.int64)
+    scores = numpy.concatenate(scoreChunks) if scoreChunks else numpy.empty(0)
+    order = numpy.lexsort((-scores, keys)) #by key, best score first
+    first = numpy.ones(len(order), bool)
+    first[1:] = keys[order][1:] != keys[order][:-1]
+    keys = keys[order][first]
+    scores = scores[order][first]
+    return keys // index.nNodes, keys % index.nNodes, keys, scores, unknown
+
+def precisionRecall(scores, hits, positives):
+    """
+    The precision/recall curve over predictions with the given scores, where hits marks the
+    right ones, against positives possible. Returns (thresholds, precision, recall, average precision)
+    with one point per distinct score, best first.
+    """
+    order = numpy.argsort(-scores, kind='mergesort')
+    scores = scores[order]
+    cumulativeHits = numpy.cumsum(hits[order])
+    last = numpy.append(scores[1:] != scores[:-1], True) #a threshold takes every prediction at its score
+    predicted = numpy.arange(1, len(scores) + 1)[last]
+    truePositives = cumulativeHits[last]
+    precision = truePositives / predicted
+    recall = truePositives / positives if positives else numpy.zeros(len(predicted))
+    gained = numpy.diff(numpy.concatenate(([0], truePositives)))
+    averagePrecision = float((precision * gained).sum() / positives) if positives else 0.0
+    return scores[last], precision, recall, averagePrecision
+
+def summarize(thresholds, precision, recall, averagePrecision, points):
+    """A JSON-friendly summary: AUPR and about points evenly spaced points of the curve."""
+    if not len(thresholds):
+        return {"aupr": 0.0, "curve": []}
+    picks = numpy.unique(numpy.linspace(0, len(thresholds) - 1, min(points, len(thresholds))).astype(int))
+    return {
+            "aupr": averagePrecision,
+            "curve": [{"threshold": float(thresholds[x]), "precision": float(precision[x]), "recall": float(recall[x])} for x in picks]
+           }
+
+def score(truthRoot, resultsPath, fromCol, toCol, scoreCol, undirected = False, ancestors = True, skipHeader = False, points = 20):
+    """Score a results table against a ground-truth export. Returns the report dictionary."""
+    index = TruthIndex(groundTruth.loadGroundTruth(truthRoot), undirected, ancestors)
+    with open(resultsPath, "rb") as source:
+        src, dest, keys, scores, unknown = readPredictions(source, index, fromCol, toCol, scoreCol, skipHeader)
+    report = {"predictions": len(keys), "unknownNames": unknown, "trueEdgesBetweenColumns": index.trueBetweenColumns}
+    report["direct"] = summarize(*precisionRecall(scores, index.isTrue(keys), index.trueBetweenColumns), points=points)
+    if ancestors:
+        report["ancestorPairs"] = index.ancestorPairs
+        report["ancestor"] = summarize(*precisionRecall(scores, index.isAncestor(src, dest), index.ancestorPairs), points=points)
+    return report
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser(prog="python -m debris.scoreInference", usage="%prog truthRoot results.tsv fromCol toCol scoreCol [options]")
+    parser.add_option("--undirected", action="store_true", help="Score predictions without regard to direction")
+    parser.add_option("--noAncestors", action="store_true", help="Skip ancestor-aware scoring")
+    parser.add_option("--header", action="store_true", help="The results table has a header row")
+    parser.add_option("--points", type="int", default=20, help="Number of points of each precision/recall curve to report")
+    parser.add_option("-o", "--output", help="Write the report here as JSON instead of to standard output")
+    (options, args) = parser.parse_args()
+    if len(args) != 5:
+        parser.error("wrong number of arguments")
+    started = time.time()
+    report = score(args[0], args[1], int(args[2]), int(args[3]), int(args[4]),
+                   options.undirected, not options.noAncestors, options.header, options.points)
+    report["seconds"] = time.time() - started
+    if options.output:
+        with open(options.output, "w") as output:
+            json.dump(report, output, indent=1, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=1, sort_keys=True)
+        print
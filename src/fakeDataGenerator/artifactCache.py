@@ -0,0 +1,176 @@
+'''
+A content-addressed on-disk cache for the expensive stages of building a model's graph:
+the point distribution, the triangulation and the pruner's decisions.
+
+Each artifact is a small set of numpy arrays, stored as one uncompressed .npz file named
+by the hash of everything that determines it: the stage, its parameters, the random
+seed it ran under and the source code of the module that computes it. Change any of
+those and the old file is simply never asked for again; it ages out of the cache
+when the directory grows past its size limit, least recently used first.
+'''
+
+import hashlib
+import os
+import sys
+import tempfile
+import zipfile
+import numpy
+
+DEFAULT_CACHE_BYTES = 1024 * 1024 * 1024
+ARTIFACT_EXTENSION = ".npz"
+TEMPORARY_EXTENSION = ".tmp" #artifacts being written; never evicted
+
+def codeVersion(*modules):
+    """
+    A hash of the source of the given modules (module objects or names), so artifacts
+    from changed code aren't reused.
+    """
+    digest = hashlib.sha1()
+    for module in modules:
+        if isinstance(module, basestring):
+            module = sys.modules[module]
+        path = module.__file__
+        if path.endswith((".pyc", ".pyo")):
+            path = path[:-1]
+        with open(path, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+def artifactKey(stage, parameters, seed, version):
+    """
+    The cache key for a stage's output: a hex digest of the stage name, its parameters
+    (anything with a stable repr), the seed and the code version.
+    """
+    return hashlib.sha1(repr((stage, parameters, seed, version))).hexdigest()
+
+class ArtifactCache(object):
+    """
+    A directory of artifacts, bounded to roughly maxBytes. Reading an artifact marks it
+    as recently used (by its modification time); writing one evicts the least recently
+    used files until the directory fits again.
+    """
+    def __init__(self, directory, maxBytes = DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ARTIFACT_EXTENSION)
+
+    def get(self, key):
+        """The dictionary of arrays stored under key, or None if there isn't one."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as artifact:
+                archive = numpy.load(artifact)
+                arrays = dict((name, archive[name]) for name in archive.files)
+        except (IOError, ValueError, zipfile.BadZipfile):
+            #missing, or damaged by an interrupted write before the rename; rebuild either way
+            self.misses += 1
+            return None
+        os.utime(path, None)
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        """Store a dictionary of arrays under key, then evict down to size."""
+        handle, temporary = tempfile.mkstemp(suffix=TEMPORARY_EXTENSION, dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as artifact:
+                numpy.savez(artifact, **arrays)
+            os.rename(temporary, self._path(key)) #atomic, so readers never see half an artifact
+        except:
+            os.remove(temporary)
+            raise
+        self.evict()
+
+    def cached(self, key, compute):
+        """The arrays stored under key, or compute()'s, which are stored first."""
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = compute()
+            self.put(key, arrays)
+        return arrays
+
+    def evict(self):
+        """Delete least recently used artifacts until the directory is within maxBytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(ARTIFACT_EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+            total += status.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+def stageSeed(seed, stage, name_prefix):
+    """
+    The seed a stage runs under, derived from the master seed, so a stage's random draws-
+    and everything after it- come out the same whether earlier stages ran or were loaded.
+    """
+    return int(artifactKey(stage, name_prefix, seed, None)[:15], 16)
+
+def _reseed(seed, stage, name_prefix):
+    import random
+    derived = stageSeed(seed, stage, name_prefix)
+    random.seed(derived)
+    numpy.random.seed(derived & 0xFFFFFFFF)
+
+def cachedPrunedGraph(cache, seed, nPoints, nSeeds, r0, delta, spread, lumpage, pruner, name_prefix="", bandSize=None):
+    """
+    The pruned graph buildRandomModel makes from these parameters under a seed, with each
+    stage loaded from cache if it's been built before (cache may be None, to build them all):
+        points      - spiralPointDistribution's points
+        triangulation - the renamed triangulation graph, as an EdgeTable
+        pruned      - the pruner's keep-mask over that table (IPruneEdges.pruneMask)
+    Every stage runs under its own seed derived from seed (see stageSeed), and so does
+    whatever happens after this returns, so a seeded run is the same with a cold cache,
+    a warm one or none.
+    """
+    import spiralPointDistribution
+    import pointsToOutwardDigraph
+    
+    def stage(key, compute):
+        return compute() if cache is None else cache.cached(key, compute)
+    
+    geometry = (nPoints, nSeeds, r0, delta, spread, lumpage)
+    pointsKey = artifactKey("points", (geometry, name_prefix), seed, codeVersion(spiralPointDistribution))
+    def makePoints():
+        _reseed(seed, "points", name_prefix)
+        return {"points": numpy.array(spiralPointDistribution.spiralPointDistribution(*geometry))}
+    
+    triangulationKey = artifactKey("triangulation", (pointsKey, bandSize, name_prefix), seed, codeVersion(pointsToOutwardDigraph))
+    def makeTriangulation():
+        points = [tuple(point) for point in stage(pointsKey, makePoints)["points"].tolist()]
+        if bandSize:
+            graph = pointsToOutwardDigraph.windowedGraphFromPoints(points, nSeeds, bandSize)
+        else:
+            graph = pointsToOutwardDigraph.graphFromPoints(points, nSeeds)
+        return pointsToOutwardDigraph.EdgeTable(pointsToOutwardDigraph.friendly_rename(graph, name_prefix)).toArrays()
+    table = pointsToOutwardDigraph.EdgeTable.fromArrays(stage(triangulationKey, makeTriangulation))
+    
+    prunerIdentity = (pruner.__class__.__name__, sorted(vars(pruner).items()))
+    prunedKey = artifactKey("pruned", (triangulationKey, prunerIdentity), seed, codeVersion(pruner.__class__.__module__))
+    def makeMask():
+        _reseed(seed, "pruned", name_prefix)
+        return {"keep": pruner.pruneMask(table)}
+    keep = stage(prunedKey, makeMask)["keep"]
+    
+    _reseed(seed, "model", name_prefix)
+    return table.toGraph(keep)
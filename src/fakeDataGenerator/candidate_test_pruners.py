@@ -1,153 +1,233 @@
-'''
-Created on Feb 22, 2012
-
-@author: anorberg
-
-Classes that implement the IPruneEdges plugin interface, as
-candidate implementations to whittle the triangulation graph
-down to the desired branching network.
-
-TODO: pull all of these out into proper plugins.
-'''
-
-from pointsToOutwardDigraph import (IPruneEdges, friendly_rename)
-import random
-import sys
-import os
-import itertools
-
-#iPruneEdges requires a redef of prune(self, graph) where graph is a pygraph.digraph
-#Must modify the graph in place, and is expected to return it
-
-def incident_edges(graph, node):
-    """
-    A helper function to pull actual edges out of digraph's incident edge function,
-    as opposed to just neighbors (which digraph.incidents actually returns).
-    """
-    neighbors = graph.incidents(node)
-    return zip(neighbors, itertools.repeat(node, len(neighbors)))
-
-class nullPruner(IPruneEdges):
-    """A 'pruner' that removes no edges."""
-    def prune(self, graph):
-        """Returns its argument unmodified."""
-        return graph
-
-class uniformThroughFour(IPruneEdges):
-    """
-    Randomly kick each edge down to an in-degree no greater than 4 but possibly as low as 1.
-    Won't add edges, so nodes with an already-low in-degree are likely to be unaffected.
-    Edges that already have an in-degree of 1 or 0 will of course be unaffected.
-    """
-    def prune(self, graph):
-        for node in graph.nodes():
-            edges = incident_edges(graph, node)
-            edges.sort(key=lambda x: graph.edge_weight(x))
-            kill_edges = edges[random.randint(1,4):]
-            for foo in kill_edges:
-                graph.del_edge(foo) 
-        return graph
-    
-class globalCutoff(IPruneEdges):
-    """
-    Find a length such that removing every edge at that length or longer will not
-    result in any new nodes with an in-degree of zero, and remove all edges
-    at that length or longer.
-    """
-    def prune(self, graph):
-        must_keep = 0
-        for node in graph.nodes():
-            try:
-                keep_here = min((graph.edge_weight(x) for x in incident_edges(graph, node)))
-            except ValueError:
-                keep_here = 0
-            must_keep = max(keep_here, must_keep)
-        iterSafely = graph.edges()[:]
-        for edge in iterSafely:
-            if graph.edge_weight(edge) > must_keep:
-                graph.del_edge(edge) 
-        return graph
-
-class minimalistFraction(IPruneEdges):
-    """Attempt to keep some particular fractionof edges, but more will be kept.
-    This code must never delete the shortest in-edge of a node,
-    since we're not trying to make new generators."""
-    def __init__(self):
-        self.FRAC = 0.65
-    def prune(self, graph):
-        allWeights = [graph.edge_weight(x) for x in graph.edges()]
-        allWeights.sort()
-        cutoff = allWeights[int(float(len(allWeights)) * self.FRAC)]
-        for node in graph.nodes():
-            edges = incident_edges(graph, node)
-            edges.sort(key = lambda x : graph.edge_weight(x))
-            for x in range(1, len(edges)): #0th element must always survive
-                if graph.edge_weight(edges[x]) > cutoff:
-                    graph.del_edge(edges[x])
-        return graph
-
-class bigDelta(IPruneEdges):
-    """Find the biggest jump in incoming edge lengths, and set a cutoff there.
-    This might find clusters."""
-    def prune(self, graph):
-        for node in graph.nodes():
-            edges = incident_edges(graph, node)
-            edges.sort(key = lambda x: graph.edge_weight(x))
-            delta_max = 0.0
-            delta_max_index = 1 #never cut off 0 
-            edge_lengths = map(graph.edge_weight, edges)
-            for x in range(1, len(edge_lengths)):
-                delta = edge_lengths[x] - edge_lengths[x-1]
-                if delta >= delta_max:
-                    delta_max = delta
-                    delta_max_index = x
-            for killDex in range(delta_max_index, len(edges)):
-                graph.del_edge(edges[killDex])
-        return graph
-
-CANDIDATE_PRUNERS = [nullPruner(), uniformThroughFour(), globalCutoff(), minimalistFraction(), bigDelta()]
-        
-def pruner_bakeoff(nPoints, nSeeds, r0, delta, spread, lumpage, outputNameRoot):
-    """
-    Generate a graph, then use all the CANDIDATE_PRUNERS to prune it, and save the results for later investigation.
-    """
-    from spiralPointDistribution import spiralPointDistribution
-    from pointsToOutwardDigraph import graphFromPoints
-    #import matplotlib.pyplot as plot
-    #import matplotlib.tri as tri    
-    import pygraph.readwrite.dot as dotIO
-    
-    points = spiralPointDistribution(nPoints, nSeeds, r0, delta, spread, lumpage)
-    
-    outdir = os.path.dirname(outputNameRoot)
-    if not os.path.exists(outdir):
-        os.makedirs(outdir)
-    
-    #x, y = zip(*points)
-    #plot.figure()
-    #plot.gca().set_aspect('equal')
-    #plot.triplot(tri.Triangulation(x, y), 'r,:')
-    #plot.scatter(x, y)
-    #plot.show()
-    
-    #NOT YET FINISHED
-    #save png as outputNameRoot.prunerName.png (once I get Python graphviz bindings working)
-    
-    for pruner in CANDIDATE_PRUNERS:
-        graph = graphFromPoints(points, nSeeds)
-        graph = friendly_rename(graph)
-        graph = pruner.prune(graph)
-        dotstring = dotIO.write(graph)
-        dotname = "{0}.{1}.gv".format(outputNameRoot, pruner.__class__.__name__)
-        with open(dotname, "w") as dotfile:
-            dotfile.write(dotstring)
-
-if __name__ == "__main__":
-    if len(sys.argv) != 9:
-        print "Wrong number of arguments."
-        print "nPoints nSeeds r0 delta spread lumpage outputNameRoot numIters"
-    
-    numIters = int(sys.argv[8])
-    for trial in range(numIters):
-        thisTrial = sys.argv[7] + str(trial)
-        pruner_bakeoff(int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3]), float(sys.argv[4]), float(sys.argv[5]), int(sys.argv[6]), thisTrial)
\ No newline at end of file
+'''
+Created on Feb 22, 2012
+
+@author: anorberg
+
+Classes that implement the IPruneEdges plugin interface, as
+candidate implementations to whittle the triangulation graph
+down to the desired branching network.
+
+TODO: pull all of these out into proper plugins.
+'''
+
+from pointsToOutwardDigraph import (IPruneEdges, EdgeTable, friendly_rename)
+import random
+import sys
+import os
+import itertools
+import json
+import numpy
+
+#iPruneEdges requires a redef of prune(self, graph) where graph is a pygraph.digraph
+#Must modify the graph in place, and is expected to return it
+#pruneMask(self, table) gives the same decision over a shared EdgeTable, as a keep-mask
+
+def incident_edges(graph, node):
+    """
+    A helper function to pull actual edges out of digraph's incident edge function,
+    as opposed to just neighbors (which digraph.incidents actually returns).
+    """
+    neighbors = graph.incidents(node)
+    return zip(neighbors, itertools.repeat(node, len(neighbors)))
+
+class nullPruner(IPruneEdges):
+    """A 'pruner' that removes no edges."""
+    def prune(self, graph):
+        """Returns its argument unmodified."""
+        return graph
+    def pruneMask(self, table):
+        return numpy.ones(len(table), bool)
+
+class uniformThroughFour(IPruneEdges):
+    """
+    Randomly kick each edge down to an in-degree no greater than 4 but possibly as low as 1.
+    Won't add edges, so nodes with an already-low in-degree are likely to be unaffected.
+    Edges that already have an in-degree of 1 or 0 will of course be unaffected.
+    """
+    def prune(self, graph):
+        for node in graph.nodes():
+            edges = incident_edges(graph, node)
+            edges.sort(key=lambda x: graph.edge_weight(x))
+            kill_edges = edges[random.randint(1,4):]
+            for foo in kill_edges:
+                graph.del_edge(foo) 
+        return graph
+    def pruneMask(self, table):
+        keepPerNode = numpy.random.randint(1, 5, len(table.names))
+        return table.rank < keepPerNode[table.dest]
+    
+class globalCutoff(IPruneEdges):
+    """
+    Find a length such that removing every edge at that length or longer will not
+    result in any new nodes with an in-degree of zero, and remove all edges
+    at that length or longer.
+    """
+    def prune(self, graph):
+        must_keep = 0
+        for node in graph.nodes():
+            try:
+                keep_here = min((graph.edge_weight(x) for x in incident_edges(graph, node)))
+            except ValueError:
+                keep_here = 0
+            must_keep = max(keep_here, must_keep)
+        iterSafely = graph.edges()[:]
+        for edge in iterSafely:
+            if graph.edge_weight(edge) > must_keep:
+                graph.del_edge(edge) 
+        return graph
+    def pruneMask(self, table):
+        shortest = table.weight[table.rank == 0]
+        must_keep = max(shortest.max(), 0) if len(shortest) else 0
+        return table.weight <= must_keep
+
+class minimalistFraction(IPruneEdges):
+    """Attempt to keep some particular fractionof edges, but more will be kept.
+    This code must never delete the shortest in-edge of a node,
+    since we're not trying to make new generators."""
+    def __init__(self):
+        self.FRAC = 0.65
+    def prune(self, graph):
+        allWeights = [graph.edge_weight(x) for x in graph.edges()]
+        allWeights.sort()
+        cutoff = allWeights[int(float(len(allWeights)) * self.FRAC)]
+        for node in graph.nodes():
+            edges = incident_edges(graph, node)
+            edges.sort(key = lambda x : graph.edge_weight(x))
+            for x in range(1, len(edges)): #0th element must always survive
+                if graph.edge_weight(edges[x]) > cutoff:
+                    graph.del_edge(edges[x])
+        return graph
+    def pruneMask(self, table):
+        if not len(table):
+            return numpy.ones(0, bool)
+        cutoff = numpy.sort(table.weight)[int(float(len(table)) * self.FRAC)]
+        return (table.rank == 0) | (table.weight <= cutoff)
+
+class bigDelta(IPruneEdges):
+    """Find the biggest jump in incoming edge lengths, and set a cutoff there.
+    This might find clusters."""
+    def prune(self, graph):
+        for node in graph.nodes():
+            edges = incident_edges(graph, node)
+            edges.sort(key = lambda x: graph.edge_weight(x))
+            delta_max = 0.0
+            delta_max_index = 1 #never cut off 0 
+            edge_lengths = map(graph.edge_weight, edges)
+            for x in range(1, len(edge_lengths)):
+                delta = edge_lengths[x] - edge_lengths[x-1]
+                if delta >= delta_max:
+                    delta_max = delta
+                    delta_max_index = x
+            for killDex in range(delta_max_index, len(edges)):
+                graph.del_edge(edges[killDex])
+        return graph
+    def pruneMask(self, table):
+        cut = numpy.ones(len(table.names), numpy.int64) #delta_max_index for each node; 1 if it has < 2 in-edges
+        later = numpy.flatnonzero(table.rank >= 1)
+        deltas = table.weight[later] - table.weight[later - 1]
+        nodes = table.dest[later]
+        ranks = table.rank[later]
+        #per node, the biggest delta, and the last one among equals (prune's >=)
+        order = numpy.lexsort((ranks, deltas, nodes))
+        lastOfNode = order[numpy.append(nodes[order][1:] != nodes[order][:-1], True)] if len(order) else order
+        cut[nodes[lastOfNode]] = ranks[lastOfNode]
+        return table.rank < cut[table.dest]
+
+CANDIDATE_PRUNERS = [nullPruner(), uniformThroughFour(), globalCutoff(), minimalistFraction(), bigDelta()]
+        
+def pruneStatistics(table, keep):
+    """
+    Degree and component statistics of the graph an EdgeTable describes, with only the
+    edges where keep is True, as a JSON-friendly dictionary.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    nNodes = len(table.names)
+    src = table.src[keep]
+    dest = table.dest[keep]
+    inDegree = numpy.bincount(dest, minlength=nNodes)
+    outDegree = numpy.bincount(src, minlength=nNodes)
+    adjacency = coo_matrix((numpy.ones(len(src)), (src, dest)), shape=(nNodes, nNodes))
+    nComponents, labels = connected_components(adjacency, directed=True, connection='weak')
+    return {
+            "edges": int(len(src)),
+            "keptFraction": len(src) / float(max(len(table), 1)),
+            "sources": int(numpy.sum(inDegree == 0)),
+            "sinks": int(numpy.sum(outDegree == 0)),
+            "meanInDegree": float(inDegree.mean()) if nNodes else 0.0,
+            "maxInDegree": int(inDegree.max()) if nNodes else 0,
+            "maxOutDegree": int(outDegree.max()) if nNodes else 0,
+            "inDegreeHistogram": numpy.bincount(inDegree).tolist(),
+            "components": int(nComponents),
+            "largestComponent": int(numpy.bincount(labels).max()) if nNodes else 0
+           }
+
+def pruner_bakeoff(nPoints, nSeeds, r0, delta, spread, lumpage, outputNameRoot, writeDot = True):
+    """
+    Generate a graph, then use all the CANDIDATE_PRUNERS to prune it, and save the results for later investigation:
+    a DOT file per pruner (unless writeDot is False) and outputNameRoot.summary.json, the pruneStatistics of each.
+    The graph is triangulated and renamed once; each pruner decides on a keep-mask over its shared
+    EdgeTable, all of them in parallel threads. Returns the summary dictionary.
+    """
+    from spiralPointDistribution import spiralPointDistribution
+    from pointsToOutwardDigraph import graphFromPoints
+    from multiprocessing.pool import ThreadPool
+    
+    points = spiralPointDistribution(nPoints, nSeeds, r0, delta, spread, lumpage)
+    
+    outdir = os.path.dirname(outputNameRoot)
+    if outdir and not os.path.exists(outdir):
+        os.makedirs(outdir)
+    
+    table = EdgeTable(friendly_rename(graphFromPoints(points, nSeeds)))
+    threads = ThreadPool(len(CANDIDATE_PRUNERS))
+    try:
+        masks = threads.map(lambda pruner: pruner.pruneMask(table), CANDIDATE_PRUNERS)
+    finally:
+        threads.close()
+    
+    summary = {}
+    for pruner, keep in zip(CANDIDATE_PRUNERS, masks):
+        summary[pruner.__class__.__name__] = pruneStatistics(table, keep)
+        if writeDot:
+            import pygraph.readwrite.dot as dotIO
+            dotname = "{0}.{1}.gv".format(outputNameRoot, pruner.__class__.__name__)
+            with open(dotname, "w") as dotfile:
+                dotfile.write(dotIO.write(table.toGraph(keep)))
+    with open(outputNameRoot + ".summary.json", "w") as summaryFile:
+        json.dump(summary, summaryFile, indent=1, sort_keys=True)
+    return summary
+
+def _bakeoffTrial(arguments):
+    """One pruner_bakeoff in a worker process, reseeded so trials don't repeat each other."""
+    random.seed()
+    numpy.random.seed()
+    return pruner_bakeoff(*arguments)
+
+def bakeoff_trials(nPoints, nSeeds, r0, delta, spread, lumpage, outputNameRoot, numIters, processes = None, writeDot = True):
+    """
+    Run numIters pruner_bakeoff trials, spread across processes (default: one per CPU),
+    named outputNameRoot0, outputNameRoot1... Also writes outputNameRoot.summary.json,
+    every trial's summary by trial number, and returns that.
+    """
+    from multiprocessing import Pool
+    workers = Pool(processes)
+    try:
+        summaries = workers.map(_bakeoffTrial, [(nPoints, nSeeds, r0, delta, spread, lumpage, outputNameRoot + str(trial), writeDot)
+                                                for trial in range(numIters)])
+    finally:
+        workers.close()
+        workers.join()
+    combined = dict((str(trial), summary) for trial, summary in enumerate(summaries))
+    with open(outputNameRoot + ".summary.json", "w") as summaryFile:
+        json.dump(combined, summaryFile, indent=1, sort_keys=True)
+    return combined
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (9, 10):
+        print "Wrong number of arguments."
+        print "nPoints nSeeds r0 delta spread lumpage outputNameRoot numIters [processes]"
+        sys.exit(1)
+    
+    bakeoff_trials(int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3]), float(sys.argv[4]), float(sys.argv[5]), int(sys.argv[6]),
+                   sys.argv[7], int(sys.argv[8]), int(sys.argv[9]) if len(sys.argv) > 9 else None)
@@ -0,0 +1,65 @@
+'''
+Streaming samplers for picking output columns. Nodes are offered one at a time
+as the graphs are built, and only the picked ones are kept, so the driver
+never needs a list of every node in every graph.
+'''
+
+import random
+
+class BernoulliSampler(object):
+    """
+    Keeps each offered item independently with probability rate.
+    The number of items picked is therefore itself random.
+    """
+    def __init__(self, rate):
+        self.rate = rate
+        self._picked = []
+
+    def offer(self, item):
+        """Consider one item for selection."""
+        if random.random() <= self.rate:
+            self._picked.append(item)
+
+    def picked(self):
+        """List of the items picked so far, in random order."""
+        ret = list(self._picked)
+        random.shuffle(ret)
+        return ret
+
+class ReservoirSampler(object):
+    """
+    Keeps exactly k of the offered items (or all of them, if fewer than k are offered),
+    each equally likely to be picked. Uses Vitter's algorithm R, so memory is O(k)
+    no matter how many items are offered.
+    """
+    def __init__(self, k):
+        if k < 0:
+            raise ValueError("Can't pick a negative number of columns")
+        self.k = k
+        self._seen = 0
+        self._reservoir = []
+
+    def offer(self, item):
+        """Consider one item for selection."""
+        self._seen += 1
+        if len(self._reservoir) < self.k:
+            self._reservoir.append(item)
+        else:
+            slot = random.randint(0, self._seen - 1)
+            if slot < self.k:
+                self._reservoir[slot] = item
+
+    def picked(self):
+        """List of the items picked so far, in random order."""
+        ret = list(self._reservoir)
+        random.shuffle(ret)
+        return ret
+
+def columnSampler(nColumns, pickRate):
+    """
+    The sampler the settings ask for: exactly nColumns columns if that's given,
+    otherwise each column independently at pickRate.
+    """
+    if nColumns is not None:
+        return ReservoirSampler(nColumns)
+    return BernoulliSampler(pickRate)
@@ -0,0 +1,222 @@
+'''
+Per-column summary statistics, accumulated a block at a time while the data is generated,
+so QA doesn't need a second pass over the output files.
+
+Each column keeps a row count, missing (nan, as from sieve) and infinite counts, min and
+max, mean and variance by Welford's method (combined a block at a time, as by Chan et al.),
+and a QuantileSketch. All of it is mergeable: shards of a table generated separately
+can be summarized separately and their sidecars merged (mergeSidecars) into what one
+pass over the whole table would have given- exactly for the moments, approximately
+for the quantiles.
+'''
+
+from __future__ import division
+
+import json
+import numpy
+import missingMasks
+
+DEFAULT_SKETCH_SIZE = 256
+REPORTED_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+class QuantileSketch(object):
+    """
+    A mergeable quantile sketch in the style of Karnin, Lang and Liberty's KLL: a stack of
+    sorted buffers, where each value in level i stands for 2**i of the values seen. When
+    a level holds more than k values it's compacted- sorted, and every other value
+    promoted to the next level up, alternating which half survives. Memory is about
+    k * log2(n / k) values; rank error is a small multiple of that many ranks over k.
+    """
+    def __init__(self, k = DEFAULT_SKETCH_SIZE):
+        self.k = k
+        self.levels = []
+        self._parity = []
+
+    def _level(self, index):
+        while len(self.levels) <= index:
+            self.levels.append(numpy.empty(0))
+            self._parity.append(0)
+        return self.levels[index]
+
+    def update(self, values):
+        """Add an array of (finite) values."""
+        self.levels[0:1] = [numpy.concatenate((self._level(0), numpy.asarray(values, float)))]
+        self._compact()
+
+    def merge(self, other):
+        """Add everything another sketch has seen."""
+        for index, level in enumerate(other.levels):
+            self.levels[index] = numpy.concatenate((self._level(index), level))
+        self._compact()
+
+    def _compact(self):
+        index = 0
+        while index < len(self.levels):
+            if len(self.levels[index]) > self.k:
+                items = numpy.sort(self.levels[index])
+                if len(items) % 2:
+                    self.levels[index] = items[-1:]
+                    items = items[:-1]
+                else:
+                    self.levels[index] = numpy.empty(0)
+                promoted = items[self._parity[index]::2]
+                self._parity[index] ^= 1
+                self.levels[index + 1:index + 2] = [numpy.concatenate((self._level(index + 1), promoted))]
+            index += 1
+
+    def quantiles(self, probabilities):
+        """Approximate values at the given probabilities (each in [0, 1]), or Nones if nothing has been seen."""
+        items = numpy.concatenate(self.levels) if self.levels else numpy.empty(0)
+        if not len(items):
+            return [None] * len(probabilities)
+        weights = numpy.concatenate([numpy.repeat(2.0 ** index, len(level)) for index, level in enumerate(self.levels)])
+        order = numpy.argsort(items, kind='mergesort')
+        cumulative = numpy.cumsum(weights[order])
+        positions = numpy.searchsorted(cumulative, numpy.asarray(probabilities) * cumulative[-1])
+        return items[order][numpy.minimum(positions, len(items) - 1)].tolist()
+
+    def toDict(self):
+        return {"k": self.k, "levels": [level.tolist() for level in self.levels], "parity": list(self._parity)}
+
+    @classmethod
+    def fromDict(cls, saved):
+        sketch = cls(saved["k"])
+        sketch.levels = [numpy.array(level, float) for level in saved["levels"]]
+        sketch._parity = list(saved["parity"])
+        return sketch
+
+class ColumnAccumulator(object):
+    """
+    Running statistics of one column. Moments, min and max are over the finite values only;
+    nan and infinite values are counted instead.
+    """
+    def __init__(self, name, sketchSize = DEFAULT_SKETCH_SIZE):
+        self.name = name
+        self.rows = 0
+        self.count = 0
+        self.missing = 0
+        self.infinite = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.sketch = QuantileSketch(sketchSize)
+
+    def update(self, values):
+        """Add a block of values."""
+        values = numpy.asarray(values, float)
+        missing = missingMasks.missingRows(values)
+        finite = numpy.isfinite(values)
+        self.rows += len(values)
+        self.missing += int(missing.sum())
+        self.infinite += int((~finite & ~missing).sum())
+        values = values[finite]
+        if len(values):
+            self._combine(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+            self.sketch.update(values)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+
+    def merge(self, other):
+        """Add the rows another accumulator of the same column has seen."""
+        self.rows += other.rows
+        self.missing += other.missing
+        self.infinite += other.infinite
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        self.sketch.merge(other.sketch)
+
+    def summary(self):
+        """The statistics as a JSON-friendly dictionary, including the sketch, so it can be merged later."""
+        return {
+                "name": self.name,
+                "rows": self.rows,
+                "count": self.count,
+                "missing": self.missing,
+                "missingFraction": self.missing / self.rows if self.rows else 0.0,
+                "infinite": self.infinite,
+                "mean": self.mean if self.count else None,
+                "variance": self.m2 / (self.count - 1) if self.count > 1 else None,
+                "min": self.minimum,
+                "max": self.maximum,
+                "m2": self.m2,
+                "quantiles": dict(("{0:g}".format(p), value) for p, value in zip(REPORTED_QUANTILES, self.sketch.quantiles(REPORTED_QUANTILES))),
+                "sketch": self.sketch.toDict()
+               }
+
+    @classmethod
+    def fromSummary(cls, summary):
+        accumulator = cls(summary["name"])
+        for attribute, key in (("rows", "rows"), ("count", "count"), ("missing", "missing"), ("infinite", "infinite"),
+                               ("m2", "m2"), ("minimum", "min"), ("maximum", "max")):
+            setattr(accumulator, attribute, summary[key])
+        accumulator.mean = summary["mean"] or 0.0
+        accumulator.sketch = QuantileSketch.fromDict(summary["sketch"])
+        return accumulator
+
+class TableStatistics(object):
+    """
+    A ColumnAccumulator per column of one output table, updated a block of columns at a time.
+    Works as a block observer for pipeline sinks.
+    """
+    def __init__(self, names, sketchSize = DEFAULT_SKETCH_SIZE):
+        self.columns = [ColumnAccumulator(name, sketchSize) for name in names]
+
+    def update(self, columns):
+        for accumulator, values in zip(self.columns, columns):
+            accumulator.update(values)
+
+    def merge(self, other):
+        for accumulator, otherAccumulator in zip(self.columns, other.columns):
+            accumulator.merge(otherAccumulator)
+
+    def summary(self):
+        return [accumulator.summary() for accumulator in self.columns]
+
+    @classmethod
+    def fromSummary(cls, summary):
+        table = cls([])
+        table.columns = [ColumnAccumulator.fromSummary(column) for column in summary]
+        return table
+
+def writeSidecar(path, tables):
+    """
+    Write a dictionary of TableStatistics (by table name, e.g. "clean" and "noisy") as JSON.
+    Columns are summarized and written one at a time, so the sketches' values are never all
+    held as Python floats at once; the file is what json.dump(indent=1, sort_keys=True) writes.
+    """
+    with open(path, "w") as sidecar:
+        sidecar.write("{")
+        for tableNumber, name in enumerate(sorted(tables)):
+            sidecar.write("{0}\n {1}: [".format(", " if tableNumber else "", json.dumps(name)))
+            for columnNumber, accumulator in enumerate(tables[name].columns):
+                text = json.dumps(accumulator.summary(), indent=1, sort_keys=True)
+                sidecar.write("{0}\n  {1}".format(", " if columnNumber else "", text.replace("\n", "\n  ")))
+            sidecar.write("\n ]" if tables[name].columns else "]")
+        sidecar.write("\n}" if tables else "}")
+
+def readSidecar(path):
+    """Read a sidecar written by writeSidecar back into a dictionary of TableStatistics."""
+    with open(path) as sidecar:
+        return dict((name, TableStatistics.fromSummary(summary)) for name, summary in json.load(sidecar).items())
+
+def mergeSidecars(paths, outputPath):
+    """Merge the sidecars of several shards of the same tables into one."""
+    merged = readSidecar(paths[0])
+    for path in paths[1:]:
+        for name, table in readSidecar(path).items():
+            merged[name].merge(table)
+    writeSidecar(outputPath, merged)
+
+if __name__ == "__main__":
+    import sys
+    #python columnStatistics.py merged.stats.json shard.stats.json...
+    mergeSidecars(sys.argv[2:], sys.argv[1])
@@ -0,0 +1,392 @@
+'''
+A compact, struct-of-arrays representation of a model, for models too big to hold
+as one model.Node object (with its lists, dicts, set and behavior instances) per node.
+
+Nodes are integer ids, numbered in dependency order, so every node's inputs have
+smaller ids than it does. Everything else is a table indexed by id:
+    names            - a NameTable: every node's name in one shared string, with offsets
+    input CSR        - inputIndptr/inputIndices: node i's inputs are
+                       inputIndices[inputIndptr[i]:inputIndptr[i+1]], in argument order
+    output CSR       - the same, the other way around
+    behavior kinds   - int16 codes into kinds, the list of behavior classes in use,
+                       for both the calculation and the noise behavior
+    parameters       - the numeric per-instance state of each behavior (a gaussian's
+                       mean and stddev, a scatter's unit...), as packed float64 rows
+
+Behavior instances are only made while they're needed, from their kind and parameters.
+NodeView wraps an id in the model.Node interface, so code written for Nodes keeps
+working against a compact model.
+'''
+
+from __future__ import division
+
+import array
+import numpy
+import model
+import counterRandom
+
+NUMERIC_TYPES = (float, int, bool) #restored exactly from a float64
+
+class NameTable(object):
+    """
+    Node names, packed end to end into one string with an int64 offset per node,
+    instead of a str object (and a list slot) per node. Indexing makes the name on demand.
+    """
+    def __init__(self):
+        self._pieces = []
+        self._offsets = array.array('l', [0])
+
+    def append(self, name):
+        self._pieces.append(name)
+        self._offsets.append(self._offsets[-1] + len(name))
+
+    def freeze(self):
+        """Join the names into the shared string once building is done."""
+        self.buffer = "".join(self._pieces)
+        self.offsets = numpy.frombuffer(self._offsets, numpy.dtype('l')).astype(numpy.int64)
+        del self._pieces, self._offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, nodeId):
+        return self.buffer[self.offsets[nodeId]:self.offsets[nodeId + 1]]
+
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes
+
+class ParameterTable(object):
+    """
+    Numeric instance attributes of one behavior per node, packed into a single float64
+    array with a CSR index. The attribute names (and types, to restore ints and bools)
+    are recorded once per kind. Anything that doesn't fit the kind's layout is kept
+    in a small side dictionary instead.
+    """
+    def __init__(self):
+        self._indptr = array.array('l', [0])
+        self._values = array.array('d')
+        self.layouts = {}
+        self.irregular = {}
+
+    def append(self, nodeId, kind, attributes):
+        """Record the parameters of node nodeId, which must be the next id."""
+        layout = self.layouts.get(kind)
+        if layout is None:
+            layout = tuple((name, type(value)) for name, value in sorted(attributes.items()))
+            self.layouts[kind] = layout
+        if len(attributes) == len(layout) and \
+                all(name in attributes and type(attributes[name]) is kindType and kindType in NUMERIC_TYPES for name, kindType in layout):
+            values = [float(attributes[name]) for name, kindType in layout]
+        else:
+            self.irregular[nodeId] = dict(attributes)
+            values = []
+        self._values.extend(values)
+        self._indptr.append(len(self._values))
+
+    def freeze(self):
+        """Convert the growable tables to numpy arrays once building is done."""
+        self.indptr = numpy.frombuffer(self._indptr, numpy.dtype('l')).astype(numpy.int64)
+        self.values = numpy.frombuffer(self._values, numpy.float64).copy()
+        del self._indptr, self._values
+
+    def nbytes(self):
+        return self.indptr.nbytes + self.values.nbytes + sum(_deepSize(attributes) for attributes in self.irregular.values())
+
+    def attributes(self, nodeId, kind):
+        """The parameters of node nodeId, as an instance dictionary."""
+        if nodeId in self.irregular:
+            return dict(self.irregular[nodeId])
+        values = self.values[self.indptr[nodeId]:self.indptr[nodeId + 1]]
+        return dict((name, kindType(value)) for (name, kindType), value in zip(self.layouts[kind], values))
+
+class CompactModel(object):
+    """
+    The struct-of-arrays model. Build with compactModelFromPygraph.
+    Evaluates blocks of rows the way model.Node does- same behaviors, same counter-based
+    draws- but caches every node it evaluates for a block in one dictionary per block,
+    so forgetting a block is a single operation.
+    """
+    def __init__(self, names, inputIndptr, inputIndices, behaviorKind, noiseKind, kinds, behaviorParams, noiseParams):
+        self.names = names
+        self.inputIndptr = inputIndptr
+        self.inputIndices = inputIndices
+        self.behaviorKind = behaviorKind
+        self.noiseKind = noiseKind
+        self.kinds = kinds
+        self.behaviorParams = behaviorParams
+        self.noiseParams = noiseParams
+        degrees = numpy.diff(inputIndptr)
+        consumers = numpy.repeat(numpy.arange(len(names), dtype=numpy.int32), degrees)
+        byInput = numpy.argsort(inputIndices, kind='mergesort')
+        self.outputIndices = consumers[byInput]
+        self.outputIndptr = numpy.concatenate(([0], numpy.cumsum(numpy.bincount(inputIndices, minlength=len(names))))).astype(numpy.int64)
+        self.randomSeed = None
+        self._blocks = {}
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def nbytes(self):
+        """Bytes the model's tables hold, not counting any cached blocks."""
+        return self.names.nbytes() + self.behaviorParams.nbytes() + self.noiseParams.nbytes() + \
+               sum(table.nbytes for table in (self.inputIndptr, self.inputIndices, self.outputIndptr,
+                                              self.outputIndices, self.behaviorKind, self.noiseKind))
+
+    def inputsOf(self, nodeId):
+        return self.inputIndices[self.inputIndptr[nodeId]:self.inputIndptr[nodeId + 1]]
+
+    def outputsOf(self, nodeId):
+        return self.outputIndices[self.outputIndptr[nodeId]:self.outputIndptr[nodeId + 1]]
+
+    def behavior(self, nodeId):
+        """A fresh instance of node nodeId's calculation behavior."""
+        return self._materialize(self.behaviorKind[nodeId], self.behaviorParams.attributes(nodeId, self.behaviorKind[nodeId]))
+
+    def noise(self, nodeId):
+        """A fresh instance of node nodeId's noise behavior."""
+        return self._materialize(self.noiseKind[nodeId], self.noiseParams.attributes(nodeId, self.noiseKind[nodeId]))
+
+    def _materialize(self, kind, attributes):
+        behaviorClass = self.kinds[kind]
+        instance = behaviorClass.__new__(behaviorClass)
+        instance.__dict__.update(attributes)
+        return instance
+
+    def nodes(self):
+        """Generate a NodeView of every node, in dependency order."""
+        for nodeId in xrange(len(self.names)):
+            yield NodeView(self, nodeId)
+
+    def heads(self):
+        """NodeViews of the 0-ary nodes."""
+        return [NodeView(self, nodeId) for nodeId in numpy.flatnonzero(numpy.diff(self.inputIndptr) == 0)]
+
+    def calculateBlock(self, nodeId, start, stop):
+        """
+        Values of node nodeId for rows [start, stop), as with model.Node.calculateBlock.
+        Uncached ancestors are evaluated in id order, which is dependency order.
+        """
+        cache = self._blocks.setdefault((start, stop), {})
+        if nodeId in cache:
+            return cache[nodeId]
+        needed = set([nodeId])
+        stack = [nodeId]
+        while stack:
+            for parent in self.inputsOf(stack.pop()).tolist():
+                if parent not in needed and parent not in cache:
+                    needed.add(parent)
+                    stack.append(parent)
+        for neededId in sorted(needed):
+            fxn = self.behavior(neededId)
+            if self.randomSeed is not None and not fxn.isDeterministic:
+                fxn.rng = counterRandom.CounterRandom(self.randomSeed, counterRandom.streamId(self.names[neededId]), start)
+            with numpy.errstate(all='ignore'):
+                cache[neededId] = fxn.calculateBlock(stop - start, *[cache[parent] for parent in self.inputsOf(neededId).tolist()])
+        return cache[nodeId]
+
+    def columnBlock(self, nodeId, start, stop):
+        """(clean, noisy) values of node nodeId for rows [start, stop), as with model.Node.columnBlock."""
+        clean = self.calculateBlock(nodeId, start, stop)
+        noiseFxn = self.noise(nodeId)
+        if self.randomSeed is not None and not noiseFxn.isDeterministic:
+            noiseFxn.rng = counterRandom.CounterRandom(self.randomSeed, counterRandom.streamId(self.names[nodeId]), start, noise=True)
+        with numpy.errstate(all='ignore'):
+            return clean, noiseFxn.calculateBlock(stop - start, clean)
+
+    def forgetBlock(self, start, stop):
+        """Drop every cached value for rows [start, stop)."""
+        self._blocks.pop((start, stop), None)
+
+    def calculate(self, nodeId, cacheKey):
+        """Single-row evaluation with an arbitrary hashable key, as with model.Node.calculate."""
+        cache = self._rows.setdefault(cacheKey, {})
+        if nodeId not in cache:
+            results = [self.calculate(parent, cacheKey) for parent in self.inputsOf(nodeId).tolist()]
+            cache[nodeId] = self.behavior(nodeId).calculate(*results)
+        return cache[nodeId]
+
+class NodeView(object):
+    """
+    A model.Node-compatible view of one node of a CompactModel. Views are made on demand
+    and hold nothing but the model and the id; two views of the same node are equal.
+    Behaviors (fxn, noiseFxn) are fresh instances on every access.
+    """
+    __slots__ = ("model", "id")
+
+    def __init__(self, compactModel, nodeId):
+        self.model = compactModel
+        self.id = int(nodeId)
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.model is self.model and other.id == self.id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.model), self.id))
+
+    @property
+    def name(self):
+        return self.model.names[self.id]
+
+    @property
+    def _inputs(self):
+        return [NodeView(self.model, parent) for parent in self.model.inputsOf(self.id).tolist()]
+
+    @property
+    def _outputs(self):
+        return [NodeView(self.model, child) for child in self.model.outputsOf(self.id).tolist()]
+
+    @property
+    def fxn(self):
+        return self.model.behavior(self.id)
+
+    @property
+    def noiseFxn(self):
+        return self.model.noise(self.id)
+
+    def _getRandomSeed(self):
+        return self.model.randomSeed
+    def _setRandomSeed(self, seed):
+        self.model.randomSeed = seed
+    randomSeed = property(_getRandomSeed, _setRandomSeed, doc="Counter-based random seed; shared by the whole model.")
+
+    def calculate(self, cacheKey):
+        return self.model.calculate(self.id, cacheKey)
+
+    def columnValue(self, cacheKey):
+        return self.noiseFxn.calculate(self.calculate(cacheKey))
+
+    def calculateBlock(self, start, stop):
+        return self.model.calculateBlock(self.id, start, stop)
+
+    def columnBlock(self, start, stop):
+        return self.model.columnBlock(self.id, start, stop)
+
+    def forgetBlock(self, start, stop):
+        self.model.forgetBlock(start, stop)
+
+    #naming and description only use the attributes above, so Node's own code serves
+    genName = model.Node.__dict__["genName"]
+    toGraphViz = model.Node.__dict__["toGraphViz"]
+    __str__ = model.Node.__dict__["__str__"]
+
+def compactModelFromPygraph(graph, fxns, bonus_identity = 0):
+    """
+    The compact equivalent of model.workingModelFromPygraph: same arguments, same
+    dependency order, same random draws of behaviors, but no Node objects.
+    Returns the CompactModel.
+    """
+    pool = model.BehaviorPool(fxns, bonus_identity)
+    idsByLabel = {}
+    names = NameTable()
+    inputIndptr = array.array('l', [0])
+    inputIndices = array.array('i')
+    behaviorKind = array.array('h')
+    noiseKind = array.array('h')
+    kinds = []
+    kindCodes = {}
+    behaviorParams = ParameterTable()
+    noiseParams = ParameterTable()
+
+    def kindOf(behaviorClass):
+        if behaviorClass not in kindCodes:
+            kindCodes[behaviorClass] = len(kinds)
+            kinds.append(behaviorClass)
+        return kindCodes[behaviorClass]
+
+    for label in model.dependencyOrder(graph):
+        nodeId = len(idsByLabel)
+        incoming = graph.incidents(label)
+        fxn = pool.drawBehavior(len(incoming), label).__class__()
+        noiseFxn = pool.drawNoise().__class__()
+        idsByLabel[label] = nodeId
+        names.append(label)
+        inputIndices.extend(idsByLabel[parent] for parent in incoming)
+        inputIndptr.append(len(inputIndices))
+        behaviorKind.append(kindOf(fxn.__class__))
+        noiseKind.append(kindOf(noiseFxn.__class__))
+        behaviorParams.append(nodeId, behaviorKind[-1], vars(fxn))
+        noiseParams.append(nodeId, noiseKind[-1], vars(noiseFxn))
+
+    names.freeze()
+    behaviorParams.freeze()
+    noiseParams.freeze()
+    return CompactModel(names,
+                        numpy.frombuffer(inputIndptr, numpy.dtype('l')).astype(numpy.int64),
+                        numpy.frombuffer(inputIndices, numpy.int32).copy(),
+                        numpy.frombuffer(behaviorKind, numpy.int16).copy(),
+                        numpy.frombuffer(noiseKind, numpy.int16).copy(),
+                        kinds, behaviorParams, noiseParams)
+
+def _residentBytes():
+    """Current resident set size of this process, on Linux."""
+    with open("/proc/self/statm") as statm:
+        import resource
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+def _deepSize(root):
+    """
+    Bytes held by root and everything reachable from it through containers and instance
+    dictionaries, each object once; classes, functions and modules are shared, so not counted.
+    """
+    import sys
+    import types
+    shared = (type, types.ClassType, types.FunctionType, types.BuiltinFunctionType, types.ModuleType, types.MethodType)
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, shared):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        if hasattr(item, "__dict__") and not isinstance(item, shared):
+            stack.append(vars(item))
+    return total
+
+def benchmarkMemory(nNodes, inDegree, behaviorPaths):
+    """
+    Compare the memory per node of Node objects and of a CompactModel, for a random
+    layered DAG of nNodes nodes with inDegree inputs each: both the growth in resident
+    memory while building (which includes the builders' temporary structures) and what
+    the finished model holds on to.
+    """
+    import gc
+    import random
+    from pygraph.classes.digraph import digraph
+    graph = digraph()
+    graph.add_nodes(["@{0}".format(x) for x in xrange(nNodes)])
+    for node in xrange(inDegree, nNodes):
+        for parent in random.sample(xrange(node), inDegree):
+            graph.add_edge(("@{0}".format(parent), "@{0}".format(node)))
+    fxns = [plugin.plugin_object for plugin in model.modelBehaviorImplementations(behaviorPaths)]
+
+    gc.collect()
+    before = _residentBytes()
+    compact = compactModelFromPygraph(graph, fxns, 3)
+    gc.collect()
+    compactBytes = _residentBytes() - before
+    compactHeld = compact.nbytes()
+    print "CompactModel: {0:.1f} bytes/node resident, {1:.1f} bytes/node held".format(compactBytes / nNodes, compactHeld / nNodes)
+
+    before = _residentBytes()
+    nodes, heads = model.workingModelFromPygraph(graph, fxns, 3)
+    gc.collect()
+    nodeBytes = _residentBytes() - before
+    nodeHeld = _deepSize(nodes)
+    print "Node objects: {0:.1f} bytes/node resident, {1:.1f} bytes/node held".format(nodeBytes / nNodes, nodeHeld / nNodes)
+    print "ratio: {0:.1f}x resident, {1:.1f}x held".format(nodeBytes / max(compactBytes, 1), nodeHeld / max(compactHeld, 1))
+
+if __name__ == "__main__":
+    import sys
+    #from src: python -m fakeDataGenerator.compactModel nNodes inDegree behaviorPath...
+    benchmarkMemory(int(sys.argv[1]), int(sys.argv[2]), sys.argv[3:])
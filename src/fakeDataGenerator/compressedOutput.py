@@ -0,0 +1,130 @@
+'''
+Compressed output files, compressed in parallel.
+
+ParallelCompressedFile is a write-only file object. What's written to it is cut into
+chunks of chunkBytes, and each chunk is compressed on a thread pool as an independent
+member of the output stream (zlib and bz2 release the GIL while they work). Members
+are written in order as they finish, so the file is one valid multi-member stream:
+gzip, zcat and Python's gzip module read gzip members back as a single file, and
+bzip2 (but not Python 2's bz2 module) does the same for bz2 streams.
+
+At most a few chunks per thread are in flight, so memory stays bounded and a writer
+that outpaces the compressors simply waits.
+'''
+
+import bz2
+import multiprocessing
+import zlib
+from multiprocessing.pool import ThreadPool
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+CHUNKS_IN_FLIGHT_PER_THREAD = 2
+
+def _gzipMember(chunk, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) #16+: gzip header and trailer
+    return compressor.compress(chunk) + compressor.flush()
+
+def _bz2Stream(chunk, level):
+    compressor = bz2.BZ2Compressor(level)
+    return compressor.compress(chunk) + compressor.flush()
+
+#name: (extension, compress(chunk, level), default level)
+COMPRESSION_CODECS = {
+                        "gzip":(".gz", _gzipMember, 6),
+                        "gz":(".gz", _gzipMember, 6),
+                        "bzip2":(".bz2", _bz2Stream, 9),
+                        "bz2":(".bz2", _bz2Stream, 9)
+                     }
+
+class ParallelCompressedFile(object):
+    """
+    A write-only file that compresses its contents with the named codec (a key of
+    COMPRESSION_CODECS) on threads threads, default one per CPU.
+    """
+    def __init__(self, path, codec, threads = None, chunkBytes = DEFAULT_CHUNK_BYTES, level = None):
+        extension, self._compress, defaultLevel = COMPRESSION_CODECS[codec.lower()]
+        self.name = path
+        self.level = defaultLevel if level is None else level
+        self.chunkBytes = chunkBytes
+        self.threads = threads or multiprocessing.cpu_count()
+        self._file = open(path, "wb")
+        self._pool = ThreadPool(self.threads)
+        self._buffer = []
+        self._buffered = 0
+        self._pending = []
+        self.closed = False
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.chunkBytes:
+            self._submit()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def _submit(self):
+        chunk = "".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        for start in range(0, len(chunk), self.chunkBytes):
+            self._pending.append(self._pool.apply_async(self._compress, (chunk[start:start + self.chunkBytes], self.level)))
+            while len(self._pending) > self.threads * CHUNKS_IN_FLIGHT_PER_THREAD:
+                self._file.write(self._pending.pop(0).get())
+        while self._pending and self._pending[0].ready():
+            self._file.write(self._pending.pop(0).get())
+
+    def flush(self):
+        """Compress and write everything written so far. Each flush ends a member, so don't flush too often."""
+        if self._buffered:
+            self._submit()
+        while self._pending:
+            self._file.write(self._pending.pop(0).get())
+        self._file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self.closed = True
+            self._pool.close()
+            self._pool.join()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+def compressedExtension(codec):
+    """The file extension the codec adds: ".gz" and so on, or "" for None (no compression)."""
+    if codec is None:
+        return ""
+    return COMPRESSION_CODECS[codec.lower()][0]
+
+def openOutput(path, codec = None, threads = None):
+    """
+    Open path for writing in binary mode, compressed by the named codec if one is given-
+    in which case the codec's extension is appended to path.
+    """
+    if codec is None:
+        return open(path, "wb")
+    return ParallelCompressedFile(path + compressedExtension(codec), codec, threads)
+
+if __name__ == "__main__":
+    import sys
+    import time
+    #python compressedOutput.py file codec [threads]
+    with open(sys.argv[1], "rb") as source:
+        data = source.read()
+    for threads in [1, int(sys.argv[3]) if len(sys.argv) > 3 else multiprocessing.cpu_count()]:
+        started = time.time()
+        with ParallelCompressedFile("/dev/null", sys.argv[2], threads) as sink:
+            for start in range(0, len(data), 65536):
+                sink.write(data[start:start + 65536])
+        elapsed = time.time() - started
+        print "{0} threads: {1:.2f}s, {2:.1f} MB/s".format(threads, elapsed, len(data) / elapsed / 1e6)
@@ -1,162 +1,365 @@
-'''
-Created on Mar 7, 2012
-
-@author: anorberg
-'''
-
-import os.path
-import sys
-import candidate_test_pruners
-import optparse
-import ConfigParser
-
-NULL = candidate_test_pruners.nullPruner()
-UNIFOUR = candidate_test_pruners.uniformThroughFour()
-GLOBALCUT = candidate_test_pruners.globalCutoff()
-MINFRAC = candidate_test_pruners.minimalistFraction()
-BIGDELTA = candidate_test_pruners.bigDelta()
-
-PRUNER_LUT={
-                "null":NULL,
-                "nullpruner":NULL,
-                "n":NULL,
-                "uniform":UNIFOUR,
-                "uniformthroughfour":UNIFOUR,
-                "u":UNIFOUR,
-                "minfrac":MINFRAC,
-                "minimalist":MINFRAC,
-                "m":MINFRAC,
-                "fraction":MINFRAC,
-                "fractional":MINFRAC,
-                "minimalistfraction":MINFRAC,
-                "f":MINFRAC,
-                "globalcutoff":GLOBALCUT,
-                "global":GLOBALCUT,
-                "g":GLOBALCUT,
-                "cutoff":GLOBALCUT,
-                "globalcut":GLOBALCUT,
-                "delta":BIGDELTA,
-                "bigdelta":BIGDELTA,
-                "d":BIGDELTA
-            }
-
-class Config(object):
-    '''
-    A struct-like class that holds the configuration for the fake data generator.
-    Designed to build itself from a command line and/or a config file.
-    '''
-
-    outputRoot = os.path.join(os.path.curdir, "generatedData")
-    nGraphs = 1
-    graphSize = 50
-    nSeeds = 4
-    gvRecursion = 1
-    tsvRecursion = 3
-    tsvColRate = 1.0
-    behaviorPaths = [os.path.join(os.path.dirname(__file__), "..", "ModelBehaviors")]
-    pruner = candidate_test_pruners.bigDelta()
-    samples = 500
-    addIdentity = 3
-
-    def __init__(self, relevant_argv=None):
-        '''
-        Constructor. Read settings out of relevant_argv with optparse, gating to ConfigParser in case of the --config option
-        '''
-        if relevant_argv is None:
-            relevant_argv = sys.argv[1:]
-        
-        parser = optparse.OptionParser()
-        parser.add_option("-?", dest="stopAndHelp", action="store_true", help="View this help")
-        parser.add_option("-c", "--config", dest="configFile", help="Load a configuration file")
-        parser.add_option("-g", "--graphs", dest="graphs", type="int", help="Number of separate graphs to generate")
-        parser.add_option("-n", "--graphSize", dest="graphSize", type="int", help="Number of nodes per graph (including seeds)")
-        parser.add_option("-s", "--seeds", dest="seeds", type="int", help="Number of seeds per graph")
-        parser.add_option("-r", "--graphvizRecursion", dest="gvRecursion", type="int", help="Depth of recursion for procedural name generation in Graphviz diagram")
-        parser.add_option("-t", "--tsvRecursion", dest="tsvRecursion", type="int", help="Depth of recursion for name generation in generated data file")
-        parser.add_option("-p", "--pickRate", dest="pickRate", type="float", help="Fraction of nodes to place in the output file; selected randomly")
-        parser.add_option("-b", "--behaviors", dest="behaviors", help="Paths to search (use OS path separator) for behavior plugins")
-        parser.add_option("-x", "--pruner", dest="pruner", help="Name of graph pruning algorithm to use")
-        parser.add_option("-m", "--samples", dest="samples", type="int", help="Number of rows of data to output")
-        parser.add_option("-o", "--output", dest="outputRoot", help="Output file name without extension; .gv or .txt will be appended")
-        parser.add_option("-u", "--unnoisiness", dest="unNoisiness", help="Number of times to add the identity function to the pool of noise functions")
-        
-        (options, args) = parser.parse_args(relevant_argv)
-        
-        if options.stopAndHelp:
-            parser.print_help()
-            sys.exit()
-        
-        if options.configFile:
-            self._parse_config_file(options.configFile)
-        #all settings on the CLI override settings in the file, so just blindly write from here on out
-        
-        if options.graphs:
-            self.nGraphs = options.graphs
-        
-        if options.graphSize:
-            self.graphSize = options.graphSize
-        
-        if options.seeds:
-            self.nSeeds = options.seeds
-        
-        if options.samples:
-            self.samples = options.samples
-        
-        if options.gvRecursion is not None:
-            #because zero is a legal value
-            self.gvRecursion = options.gvRecursion
-        
-        if options.tsvRecursion is not None:
-            self.tsvRecursion = options.tsvRecursion
-            
-        if options.pickRate is not None:
-            self.tsvColRate = options.pickRate
-            
-        if options.behaviors:
-            self.behaviorPaths = options.behaviors.split(os.path.pathsep)
-            
-        if options.pruner:
-            self.pruner = PRUNER_LUT[options.pruner.lower()]
-        
-        if options.outputRoot:
-            self.outputRoot = options.outputRoot
-            
-        if options.unNoisiness:
-            self.addIdentity = options.unNoisiness
-    def _parse_config_file(self, filePath):
-        """
-        Use a ConfigParser to load settings.
-        """
-        parser = ConfigParser.SafeConfigParser(
-                {
-                    "File":self.outputRoot,
-                    "PickRate":self.tsvColRate,
-                    "TsvRecursion":self.tsvRecursion,
-                    "GraphvizRecursion":self.gvRecursion,
-                    "Behaviors":os.path.pathsep.join(self.behaviorPaths),
-                    "Pruner":self.pruner,
-                    "Graphs":self.nGraphs,
-                    "GraphSize":self.graphSize,
-                    "Seeds":self.nSeeds,
-                    "Samples":self.samples
-                }
-            )
-        parser.add_section("Output")
-        parser.add_section("Model")
-        parser.add_section("Generation")
-        
-        parser.read(filePath)
-        
-        self.outputRoot = parser.get("Output", "File")
-        self.tsvColRate = parser.getfloat("Output", "PickRate")
-        self.tsvRecursion = parser.getint("Output", "TsvRecursion")
-        self.gvRecursion = parser.getint("Output", "GraphvizRecursion")
-        self.samples = parser.getint("Output", "Samples")
-        
-        self.behaviorPaths = parser.get("Model", "Behaviors").split(os.path.pathsep)
-        self.pruner = PRUNER_LUT[parser.get("Model", "Pruner").lower()]
-        self.addIdentity = parser.getint("Model", "UnNoisiness")
-        
-        self.nGraphs = parser.getint("Generation", "Graphs")
-        self.graphSize = parser.getint("Generation", "GraphSize")
+'''
+Created on Mar 7, 2012
+
+@author: anorberg
+'''
+
+import os.path
+import sys
+import candidate_test_pruners
+import topologyGenerators
+import interventions
+import timeSeries
+import memoryGovernor
+import outOfCore
+import optparse
+import ConfigParser
+
+NULL = candidate_test_pruners.nullPruner()
+UNIFOUR = candidate_test_pruners.uniformThroughFour()
+GLOBALCUT = candidate_test_pruners.globalCutoff()
+MINFRAC = candidate_test_pruners.minimalistFraction()
+BIGDELTA = candidate_test_pruners.bigDelta()
+
+PRUNER_LUT={
+                "null":NULL,
+                "nullpruner":NULL,
+                "n":NULL,
+                "uniform":UNIFOUR,
+                "uniformthroughfour":UNIFOUR,
+                "u":UNIFOUR,
+                "minfrac":MINFRAC,
+                "minimalist":MINFRAC,
+                "m":MINFRAC,
+                "fraction":MINFRAC,
+                "fractional":MINFRAC,
+                "minimalistfraction":MINFRAC,
+                "f":MINFRAC,
+                "globalcutoff":GLOBALCUT,
+                "global":GLOBALCUT,
+                "g":GLOBALCUT,
+                "cutoff":GLOBALCUT,
+                "globalcut":GLOBALCUT,
+                "delta":BIGDELTA,
+                "bigdelta":BIGDELTA,
+                "d":BIGDELTA
+            }
+
+PREFERENTIAL = topologyGenerators.preferentialAttachment()
+LAYERED = topologyGenerators.layeredRandomDag()
+
+TOPOLOGY_LUT={
+                "delaunay":None, #spiral points, triangulation and a pruner
+                "spiral":None,
+                "preferential":PREFERENTIAL,
+                "preferentialattachment":PREFERENTIAL,
+                "p":PREFERENTIAL,
+                "layered":LAYERED,
+                "layeredrandomdag":LAYERED,
+                "l":LAYERED
+            }
+
+class Config(object):
+    '''
+    A struct-like class that holds the configuration for the fake data generator.
+    Designed to build itself from a command line and/or a config file.
+    '''
+
+    outputRoot = os.path.join(os.path.curdir, "generatedData")
+    nGraphs = 1
+    graphSize = 50
+    nSeeds = 4
+    gvRecursion = 1
+    tsvRecursion = 3
+    tsvColRate = 1.0
+    nColumns = None
+    behaviorPaths = [os.path.join(os.path.dirname(__file__), "..", "ModelBehaviors")]
+    pruner = candidate_test_pruners.bigDelta()
+    samples = 500
+    addIdentity = 3
+    blockSize = 1000
+    outputFormat = "tsv"
+    missingToken = "nan"
+    optimize = True
+    compact = False
+    bandSize = 0
+    topology = None
+    cacheDir = None
+    cacheMegabytes = 1024
+    pipeline = False
+    queueDepth = 2
+    compress = None
+    statistics = True
+    groundTruth = True
+    seed = None
+    interventions = []
+    timeSteps = 0
+    persistence = timeSeries.DEFAULT_PERSISTENCE
+    statefulRate = timeSeries.DEFAULT_STATEFUL_RATE
+    maxMemory = None
+    spill = False #set by the memory plan (see memoryGovernor), as are these two
+    compressThreads = None
+    scratchDir = None
+    scratchBytes = None
+    transposeBytes = outOfCore.DEFAULT_TRANSPOSE_BYTES
+
+    def __init__(self, relevant_argv=None):
+        '''
+        Constructor. Read settings out of relevant_argv with optparse, gating to ConfigParser in case of the --config option
+        '''
+        if relevant_argv is None:
+            relevant_argv = sys.argv[1:]
+        
+        parser = optparse.OptionParser()
+        parser.add_option("-?", dest="stopAndHelp", action="store_true", help="View this help")
+        parser.add_option("-c", "--config", dest="configFile", help="Load a configuration file")
+        parser.add_option("-g", "--graphs", dest="graphs", type="int", help="Number of separate graphs to generate")
+        parser.add_option("-n", "--graphSize", dest="graphSize", type="int", help="Number of nodes per graph (including seeds)")
+        parser.add_option("-s", "--seeds", dest="seeds", type="int", help="Number of seeds per graph")
+        parser.add_option("-r", "--graphvizRecursion", dest="gvRecursion", type="int", help="Depth of recursion for procedural name generation in Graphviz diagram")
+        parser.add_option("-t", "--tsvRecursion", dest="tsvRecursion", type="int", help="Depth of recursion for name generation in generated data file")
+        parser.add_option("-p", "--pickRate", dest="pickRate", type="float", help="Fraction of nodes to place in the output file; selected randomly")
+        parser.add_option("--columns", dest="columns", type="int", help="Exact number of nodes to place in the output file, selected randomly; overrides pickRate")
+        parser.add_option("-b", "--behaviors", dest="behaviors", help="Paths to search (use OS path separator) for behavior plugins")
+        parser.add_option("-x", "--pruner", dest="pruner", help="Name of graph pruning algorithm to use")
+        parser.add_option("--topology", dest="topology", help="How to make each graph: delaunay (default; points, triangulation, then the pruner), preferential or layered")
+        parser.add_option("--cache", dest="cacheDir", help="Directory to cache points, triangulations and prunings in, so re-runs with the same --seed and graph settings skip them")
+        parser.add_option("--cacheSize", dest="cacheMegabytes", type="int", help="Size limit of the --cache directory in megabytes (default 1024); least recently used artifacts are evicted")
+        parser.add_option("-m", "--samples", dest="samples", type="int", help="Number of rows of data to output")
+        parser.add_option("-o", "--output", dest="outputRoot", help="Output file name without extension; .gv or .txt will be appended")
+        parser.add_option("-u", "--unnoisiness", dest="unNoisiness", help="Number of times to add the identity function to the pool of noise functions")
+        parser.add_option("--blockSize", dest="blockSize", type="int", help="Number of rows to calculate at once; larger blocks are faster but use more memory")
+        parser.add_option("--format", dest="outputFormat", help="Data file format: tsv (default), binary, which stores missing values as real nulls, or sqlite, a database loaded as the rows are generated")
+        parser.add_option("--missingToken", dest="missingToken", help="Text written for missing values in tsv output (default nan)")
+        parser.add_option("--pipeline", dest="pipeline", action="store_true", help="Write each output file on its own thread, overlapping calculation and I/O")
+        parser.add_option("--queueDepth", dest="queueDepth", type="int", help="With --pipeline, number of blocks that may wait for each writer (default 2)")
+        parser.add_option("--compress", dest="compress", help="Compress every output file, in parallel: gzip or bz2 (default none)")
+        parser.add_option("--maxMemory", dest="maxMemory", help="Memory budget, like 512M or 4G: block size, queue depth and compression threads are chosen to fit it, and peak memory is reported")
+        parser.add_option("--scratch", dest="scratchDir", help="Write out of core: calculate into memory-mapped scratch files in this directory, then transpose them into the data files in tiles")
+        parser.add_option("--scratchSize", dest="scratchSize", help="With --scratch, disk space the scratch files may take, like 20G (default: most of the free space); bigger tables are done in passes")
+        parser.add_option("--transposeMemory", dest="transposeMemory", help="With --scratch, memory for each transposed tile, like 64M (the default)")
+        parser.add_option("--noStats", dest="noStats", action="store_true", help="Don't accumulate per-column summary statistics into the .stats.json sidecar")
+        parser.add_option("--noTruth", dest="noTruth", action="store_true", help="Don't write the binary ground-truth network (.truth.* files) alongside the .gv file")
+        parser.add_option("--noOptimize", dest="noOptimize", action="store_true", help="Evaluate the model exactly as built, without fusing or merging nodes")
+        parser.add_option("--compact", dest="compact", action="store_true", help="Store the model as flat arrays instead of node objects, for very large graphs; implies --noOptimize")
+        parser.add_option("--bandSize", dest="bandSize", type="int", help="Triangulate each graph's points in overlapping radial bands of this many points, bounding memory for huge graphs (default 0: all at once)")
+        parser.add_option("--seed", dest="seed", type="int", help="Master random seed. Makes the run reproducible, and makes every data value a pure function of seed, node and row")
+        parser.add_option("--intervene", dest="intervene", action="append", help="Also write the data with nodes clamped, like a12=0,b3=1.5, recalculating only their descendants; repeat for more datasets. Implies --noOptimize")
+        parser.add_option("--interventions", dest="interventionFile", help="File of interventions, one per line in --intervene's format")
+        parser.add_option("--timeSteps", dest="timeSteps", type="int", help="Simulate this many timesteps of --samples trajectories each, instead of independent rows. Implies --noOptimize")
+        parser.add_option("--persistence", dest="persistence", type="float", help="With --timeSteps, chance that a generator keeps its previous value for another timestep (default 0.9)")
+        parser.add_option("--statefulRate", dest="statefulRate", type="float", help="With --timeSteps, fraction of other nodes that carry inertia from the previous timestep (default 0.5)")
+        
+        (options, args) = parser.parse_args(relevant_argv)
+        
+        if options.stopAndHelp:
+            parser.print_help()
+            sys.exit()
+        
+        if options.configFile:
+            self._parse_config_file(options.configFile)
+        #all settings on the CLI override settings in the file, so just blindly write from here on out
+        
+        if options.graphs:
+            self.nGraphs = options.graphs
+        
+        if options.graphSize:
+            self.graphSize = options.graphSize
+        
+        if options.seeds:
+            self.nSeeds = options.seeds
+        
+        if options.samples:
+            self.samples = options.samples
+        
+        if options.gvRecursion is not None:
+            #because zero is a legal value
+            self.gvRecursion = options.gvRecursion
+        
+        if options.tsvRecursion is not None:
+            self.tsvRecursion = options.tsvRecursion
+            
+        if options.pickRate is not None:
+            self.tsvColRate = options.pickRate
+        
+        if options.columns is not None:
+            self.nColumns = options.columns
+            
+        if options.behaviors:
+            self.behaviorPaths = options.behaviors.split(os.path.pathsep)
+            
+        if options.pruner:
+            self.pruner = PRUNER_LUT[options.pruner.lower()]
+        
+        if options.topology:
+            self.topology = TOPOLOGY_LUT[options.topology.lower()]
+        
+        if options.cacheDir:
+            self.cacheDir = options.cacheDir
+        
+        if options.cacheMegabytes is not None:
+            self.cacheMegabytes = options.cacheMegabytes
+        
+        if options.outputRoot:
+            self.outputRoot = options.outputRoot
+            
+        if options.unNoisiness:
+            self.addIdentity = options.unNoisiness
+        
+        if options.blockSize:
+            self.blockSize = options.blockSize
+        
+        if options.outputFormat:
+            self.outputFormat = options.outputFormat
+        
+        if options.missingToken is not None:
+            #because the empty string is a legal value
+            self.missingToken = options.missingToken
+        
+        if options.pipeline:
+            self.pipeline = True
+        
+        if options.queueDepth:
+            self.queueDepth = options.queueDepth
+        
+        if options.compress:
+            self.compress = None if options.compress.lower() == "none" else options.compress
+        
+        if options.maxMemory:
+            self.maxMemory = memoryGovernor.parseSize(options.maxMemory)
+        
+        if options.scratchDir:
+            self.scratchDir = options.scratchDir
+        
+        if options.scratchSize:
+            self.scratchBytes = memoryGovernor.parseSize(options.scratchSize)
+        
+        if options.transposeMemory:
+            self.transposeBytes = memoryGovernor.parseSize(options.transposeMemory)
+        
+        if options.noStats:
+            self.statistics = False
+        
+        if options.noTruth:
+            self.groundTruth = False
+        
+        if options.noOptimize:
+            self.optimize = False
+        
+        if options.compact:
+            self.compact = True
+        
+        if options.bandSize is not None:
+            self.bandSize = options.bandSize
+        
+        if options.seed is not None:
+            self.seed = options.seed
+        
+        if options.interventionFile:
+            self.interventions = self.interventions + interventions.readInterventions(options.interventionFile)
+        
+        if options.intervene:
+            self.interventions = self.interventions + [interventions.parseClamps(text) for text in options.intervene]
+        
+        if options.timeSteps is not None:
+            self.timeSteps = options.timeSteps
+        
+        if options.persistence is not None:
+            self.persistence = options.persistence
+        
+        if options.statefulRate is not None:
+            self.statefulRate = options.statefulRate
+    def _parse_config_file(self, filePath):
+        """
+        Use a ConfigParser to load settings.
+        """
+        parser = ConfigParser.SafeConfigParser(
+                {
+                    "File":self.outputRoot,
+                    "PickRate":self.tsvColRate,
+                    "Columns":"" if self.nColumns is None else self.nColumns,
+                    "TsvRecursion":self.tsvRecursion,
+                    "GraphvizRecursion":self.gvRecursion,
+                    "Behaviors":os.path.pathsep.join(self.behaviorPaths),
+                    "Pruner":self.pruner,
+                    "Graphs":self.nGraphs,
+                    "GraphSize":self.graphSize,
+                    "Seeds":self.nSeeds,
+                    "Samples":self.samples,
+                    "BlockSize":self.blockSize,
+                    "Format":self.outputFormat,
+                    "MissingToken":self.missingToken,
+                    "Pipeline":self.pipeline,
+                    "QueueDepth":self.queueDepth,
+                    "Compress":"none" if self.compress is None else self.compress,
+                    "MaxMemory":"" if self.maxMemory is None else self.maxMemory // (1024 * 1024),
+                    "Scratch":"" if self.scratchDir is None else self.scratchDir,
+                    "ScratchSize":"" if self.scratchBytes is None else self.scratchBytes // (1024 * 1024),
+                    "TransposeMemory":self.transposeBytes // (1024 * 1024),
+                    "Statistics":self.statistics,
+                    "GroundTruth":self.groundTruth,
+                    "Optimize":self.optimize,
+                    "Compact":self.compact,
+                    "BandSize":self.bandSize,
+                    "Topology":"delaunay",
+                    "Cache":"" if self.cacheDir is None else self.cacheDir,
+                    "CacheSize":self.cacheMegabytes,
+                    "Seed":"" if self.seed is None else self.seed,
+                    "TimeSteps":self.timeSteps,
+                    "Persistence":self.persistence,
+                    "StatefulRate":self.statefulRate,
+                    "Interventions":";".join(",".join("{0}={1!r}".format(name, value) for name, value in sorted(clamps.items())) for clamps in self.interventions)
+                }
+            )
+        parser.add_section("Output")
+        parser.add_section("Model")
+        parser.add_section("Generation")
+        
+        parser.read(filePath)
+        
+        self.outputRoot = parser.get("Output", "File")
+        self.tsvColRate = parser.getfloat("Output", "PickRate")
+        if parser.get("Output", "Columns"):
+            self.nColumns = parser.getint("Output", "Columns")
+        self.tsvRecursion = parser.getint("Output", "TsvRecursion")
+        self.gvRecursion = parser.getint("Output", "GraphvizRecursion")
+        self.samples = parser.getint("Output", "Samples")
+        self.blockSize = parser.getint("Output", "BlockSize")
+        self.outputFormat = parser.get("Output", "Format")
+        self.missingToken = parser.get("Output", "MissingToken")
+        self.pipeline = parser.getboolean("Output", "Pipeline")
+        self.queueDepth = parser.getint("Output", "QueueDepth")
+        self.compress = parser.get("Output", "Compress")
+        if self.compress.lower() == "none":
+            self.compress = None
+        if parser.get("Output", "MaxMemory"):
+            self.maxMemory = memoryGovernor.parseSize(parser.get("Output", "MaxMemory"))
+        if parser.get("Output", "Scratch"):
+            self.scratchDir = parser.get("Output", "Scratch")
+        if parser.get("Output", "ScratchSize"):
+            self.scratchBytes = memoryGovernor.parseSize(parser.get("Output", "ScratchSize"))
+        self.transposeBytes = memoryGovernor.parseSize(parser.get("Output", "TransposeMemory"))
+        self.statistics = parser.getboolean("Output", "Statistics")
+        self.groundTruth = parser.getboolean("Output", "GroundTruth")
+        
+        self.behaviorPaths = parser.get("Model", "Behaviors").split(os.path.pathsep)
+        self.pruner = PRUNER_LUT[parser.get("Model", "Pruner").lower()]
+        self.topology = TOPOLOGY_LUT[parser.get("Model", "Topology").lower()]
+        if parser.get("Model", "Cache"):
+            self.cacheDir = parser.get("Model", "Cache")
+        self.cacheMegabytes = parser.getint("Model", "CacheSize")
+        self.addIdentity = parser.getint("Model", "UnNoisiness")
+        self.optimize = parser.getboolean("Model", "Optimize")
+        self.compact = parser.getboolean("Model", "Compact")
+        self.bandSize = parser.getint("Model", "BandSize")
+        
+        if parser.get("Generation", "Seed"):
+            self.seed = parser.getint("Generation", "Seed")
+        self.interventions = [interventions.parseClamps(text) for text in parser.get("Generation", "Interventions").split(";") if text.strip()]
+        self.timeSteps = parser.getint("Generation", "TimeSteps")
+        self.persistence = parser.getfloat("Generation", "Persistence")
+        self.statefulRate = parser.getfloat("Generation", "StatefulRate")
+        
+        self.nGraphs = parser.getint("Generation", "Graphs")
+        self.graphSize = parser.getint("Generation", "GraphSize")
         self.nSeeds = parser.getint("Generation", "Seeds") 
\ No newline at end of file
@@ -0,0 +1,135 @@
+'''
+Counter-based random numbers for reproducible, random-access data generation.
+
+The normal way behaviors draw random numbers is from a stateful global generator,
+which is why a node's value for a row has to be cached: ask again and you get a
+different draw. Here every draw is instead a pure function of
+(master seed, node, which draw, row index), computed with the Philox4x32-10
+block cipher of Salmon et al., "Parallel Random Numbers: As Easy as 1, 2, 3" (SC11).
+Any row or range of rows can be generated directly, in any order, any number of
+times, with the same result- so caches become a pure speed optimization and can be
+dropped at will.
+
+The four counter words are the row's low 32 bits; the node's 64-bit stream number's high
+half; the draw word (which draw, whether it's noise, and the row's next 14 bits); and the
+stream number's low half. The key is the master seed.
+
+CounterRandom offers the subset of the numpy.random interface that behaviors use,
+so a behavior draws from self.rng without knowing which kind it has.
+'''
+
+import hashlib
+import math
+import struct
+import numpy
+
+PHILOX_M0 = numpy.uint64(0xD2511F53)
+PHILOX_M1 = numpy.uint64(0xCD9E8D57)
+PHILOX_W0 = 0x9E3779B9
+PHILOX_W1 = 0xBB67AE85
+PHILOX_ROUNDS = 10
+LOW32 = numpy.uint64(0xFFFFFFFF)
+SHIFT32 = numpy.uint64(32)
+
+NOISE_DRAWS = 0x80000000 #high bit of the draw word: separates a node's noise draws from its value draws
+DRAW_BITS = 16 #draws per node per block; the row's bits past 32 go above them
+ROW_BITS = 46 #32 in the first word, 14 in the draw word
+
+def philox4x32(counters, key):
+    """
+    Philox4x32-10 over arrays of counters. counters is a sequence of four uint64 arrays
+    (each holding 32-bit values) and key a pair of 32-bit ints. Returns the four
+    32-bit output words, as uint64 arrays.
+    """
+    c0, c1, c2, c3 = [numpy.asarray(word, numpy.uint64) for word in counters]
+    k0, k1 = key
+    for x in range(PHILOX_ROUNDS):
+        product0 = PHILOX_M0 * c0
+        product1 = PHILOX_M1 * c2
+        c0, c1, c2, c3 = ((product1 >> SHIFT32) ^ c1 ^ numpy.uint64(k0),
+                          product1 & LOW32,
+                          (product0 >> SHIFT32) ^ c3 ^ numpy.uint64(k1),
+                          product0 & LOW32)
+        k0 = (k0 + PHILOX_W0) & 0xFFFFFFFF
+        k1 = (k1 + PHILOX_W1) & 0xFFFFFFFF
+    return c0, c1, c2, c3
+
+def streamId(name):
+    """
+    A 64-bit stream number for a node, hashed from its name so it doesn't depend on build order.
+    Two nodes sharing one would draw identical numbers; among 10^5 nodes, the chance of that is
+    about 3e-10.
+    """
+    return struct.unpack("<Q", hashlib.md5(name).digest()[:8])[0]
+
+class CounterRandom(object):
+    """
+    Random draws for one node, for a block of consecutive rows starting at start.
+    Each call draws one value per row, from its own draw number, so several calls in
+    one calculateBlock are independent of each other; calling in the same order with
+    the same rows always gives the same values.
+    """
+    def __init__(self, seed, stream, start, noise=False):
+        self.key = (seed & 0xFFFFFFFF, (seed >> 32) & 0xFFFFFFFF)
+        self.stream = stream
+        self.start = start
+        self._noise = NOISE_DRAWS if noise else 0
+        self._nextDraw = 0
+
+    def _words(self, size):
+        if self.start + size > 1 << ROW_BITS:
+            raise ValueError("Counter-based draws only reach row {0}".format((1 << ROW_BITS) - 1))
+        if self._nextDraw >= 1 << DRAW_BITS:
+            raise ValueError("More than {0} draws for one block of one node".format(1 << DRAW_BITS))
+        rows = numpy.arange(self.start, self.start + size, dtype=numpy.uint64)
+        draw = numpy.uint64(self._noise | self._nextDraw)
+        self._nextDraw += 1
+        return philox4x32((rows & LOW32,
+                           numpy.repeat(numpy.uint64(self.stream >> 32), size),
+                           ((rows >> SHIFT32) << numpy.uint64(DRAW_BITS)) | draw,
+                           numpy.repeat(numpy.uint64(self.stream & 0xFFFFFFFF), size)),
+                          self.key)
+
+    def _uniformPair(self, size):
+        #53 bits each, from two 32-bit words, in [0, 1)
+        w0, w1, w2, w3 = self._words(size)
+        first = ((w0 >> numpy.uint64(5)) * 67108864.0 + (w1 >> numpy.uint64(6))) / 9007199254740992.0
+        second = ((w2 >> numpy.uint64(5)) * 67108864.0 + (w3 >> numpy.uint64(6))) / 9007199254740992.0
+        return first, second
+
+    def random_sample(self, size):
+        """Uniform draws in [0, 1)."""
+        return self._uniformPair(size)[0]
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        """Uniform draws in [low, high)."""
+        return low + (high - low) * self.random_sample(size)
+
+    def randint(self, low, high, size):
+        """Integer draws in [low, high), as with numpy.random.randint."""
+        return low + numpy.floor(self.random_sample(size) * (high - low)).astype(numpy.int64)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        """Gaussian draws, by the Box-Muller transform (so always exactly one draw per row)."""
+        first, second = self._uniformPair(size)
+        radius = numpy.sqrt(-2.0 * numpy.log(1.0 - first)) #1 - first is in (0, 1]
+        return loc + scale * radius * numpy.cos(2.0 * math.pi * second)
+
+def seedModel(columns, seed):
+    """
+    Switch the model the given columns are calculated from over to counter-based draws,
+    under the given master seed (an integer up to 64 bits). None switches back to the
+    global generator.
+    """
+    from graphOptimizer import ancestorClosure
+    for node in ancestorClosure(columns):
+        node.randomSeed = seed
+
+if __name__ == "__main__":
+    #known-answer tests from the Random123 distribution
+    zero = [numpy.zeros(1, numpy.uint64)] * 4
+    print [hex(int(word[0])) for word in philox4x32(zero, (0, 0))]
+    print "expected ['0x6627e8d5', '0xe169c58d', '0xbc57ac4c', '0x9b00dbd8']"
+    ones = [numpy.repeat(numpy.uint64(0xFFFFFFFF), 1)] * 4
+    print [hex(int(word[0])) for word in philox4x32(ones, (0xFFFFFFFF, 0xFFFFFFFF))]
+    print "expected ['0x408f276d', '0x41c83b0e', '0xa20bc7c6', '0x6d5451fd']"
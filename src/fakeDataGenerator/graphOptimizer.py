@@ -0,0 +1,246 @@
+'''
+Optimization passes over a built model (the Node graph out of workingModelFromPygraph).
+They rewrite how values are calculated without changing what is calculated:
+output columns keep their identity and their values, but intermediate nodes that
+only exist to feed something else may be merged away.
+
+Passes work on the ancestor closure of the output columns, since nothing else is
+ever evaluated. Column names and GraphViz output should be generated before optimizing,
+since those describe the original model.
+'''
+
+import numpy
+import model
+from model import IModelBehavior, IdentityBehavior, ConstantBehavior
+
+def ancestorClosure(columns):
+    """
+    Every node the given columns are calculated from, including the columns themselves.
+    Returned as a list in dependency order: every node comes after all of its inputs.
+    """
+    ordered = []
+    visited = set()
+    for column in columns:
+        if column in visited:
+            continue
+        visited.add(column)
+        stack = [(column, iter(column._inputs))]
+        while stack:
+            node, inputs = stack[-1]
+            for parent in inputs:
+                if parent not in visited:
+                    visited.add(parent)
+                    stack.append((parent, iter(parent._inputs)))
+                    break
+            else:
+                stack.pop()
+                ordered.append(node)
+    return ordered
+
+class FusedBehavior(IModelBehavior):
+    """
+    A 1-ary behavior made by composing a chain of 1-ary behaviors, applied first to last.
+    Consecutive links that report affineCoefficients are folded into one multiply-add,
+    so e.g. scale, translate, negate collapses to a single a*x + b.
+    """
+    arity = (1, 1)
+    isNoise = False
+
+    def __init__(self, links):
+        self.links = []
+        for link in links:
+            if isinstance(link, FusedBehavior):
+                self.links.extend(link.links)
+            else:
+                self.links.append(link)
+        self._steps = []
+        for link in self.links:
+            coefficients = link.affineCoefficients()
+            if coefficients is None:
+                self._steps.append(link)
+            elif self._steps and isinstance(self._steps[-1], tuple):
+                a, b = self._steps[-1]
+                c, d = coefficients
+                self._steps[-1] = (c * a, c * b + d)
+            else:
+                self._steps.append(tuple(coefficients))
+        self.isDeterministic = all(link.isDeterministic for link in self.links)
+        self.isVectorizable = all(link.isVectorizable for link in self.links)
+        self.cost = sum(1 if isinstance(step, tuple) else step.cost for step in self._steps)
+
+    def calculate(self, value):
+        for step in self._steps:
+            if isinstance(step, tuple):
+                value = step[0] * value + step[1]
+            else:
+                value = step.calculate(value)
+        return value
+
+    def calculateBlock(self, size, values):
+        for step in self._steps:
+            if isinstance(step, tuple):
+                values = step[0] * numpy.asarray(values, float) + step[1]
+            else:
+                step.rng = self.rng #links draw from whatever the fused node was given
+                values = step.calculateBlock(size, values)
+        return values
+
+    def generate_name(self, name):
+        #parenthesize between links the way Node.genName does between nodes
+        name = self.links[0].generate_name(name)
+        for link in self.links[1:]:
+            name = link.generate_name("({0})".format(name))
+        return name
+
+def _fusable(behavior):
+    """
+    True if behavior is worth running inside a FusedBehavior: its calculateBlock is real
+    numpy code, so the fused node's block is a run of array operations. A per-row Python
+    behavior costs the same fused or not, and as a node of its own it's cached (see
+    model.Node.cachesBlocks) instead of being recalculated with the chain.
+    """
+    return behavior.isVectorizable and behavior.cost < model.DEFAULT_BEHAVIOR_COST
+
+def _absorbable(node, keep):
+    """
+    True if node can be folded into its only consumer: it's a 1-input, 1-output node
+    that isn't needed as a column in its own right, with a fusable, deterministic behavior.
+    (A random link would draw from its consumer's counter stream instead of its own,
+    and give different values.)
+    """
+    return len(node._inputs) == 1 and len(node._outputs) == 1 and node not in keep and \
+        node.fxn.isDeterministic and _fusable(node.fxn)
+
+def fuseUnaryChains(columns):
+    """
+    Fuse chains of single-consumer 1-ary nodes into the 1-ary node at the bottom of the chain.
+    A chain source -> u1 -> u2 -> c becomes source -> c, where c now calculates
+    FusedBehavior([u1, u2, c]); u1 and u2 are no longer evaluated or cached.
+    Columns are never fused away. Only deterministic, vectorized behaviors cheaper than
+    the per-row default are absorbed, and only into a node whose own behavior is vectorized
+    and as cheap (see _fusable); a chain broken by anything else fuses on either side of it.
+    Modifies the graph in place.
+
+    Returns the number of nodes fused away.
+    """
+    keep = set(columns)
+    removed = set()
+    for node in reversed(ancestorClosure(columns)):
+        if node in removed or len(node._inputs) != 1 or not _fusable(node.fxn):
+            continue
+        chain = []
+        source = node._inputs[0]
+        while _absorbable(source, keep):
+            chain.insert(0, source)
+            source = source._inputs[0]
+        if not chain:
+            continue
+        source._outputs[source._outputs.index(chain[0])] = node
+        node._inputs = [source]
+        node.fxn = FusedBehavior([link.fxn for link in chain] + [node.fxn])
+        for link in chain:
+            link._inputs = []
+            link._outputs = []
+        removed.update(chain)
+    return len(removed)
+
+def structuralKey(behavior):
+    """
+    A hashable description of what a deterministic behavior calculates: its class and
+    its parameters. Two behaviors with equal keys give equal results on equal inputs.
+    """
+    if isinstance(behavior, FusedBehavior):
+        return (FusedBehavior, tuple(structuralKey(link) for link in behavior.links))
+    return (behavior.__class__, tuple(sorted((name, repr(value)) for name, value in vars(behavior).items())))
+
+def _replaceInput(consumer, old, new):
+    """
+    Point every input slot of consumer that reads old at new instead, keeping argument order.
+    """
+    consumer._inputs = [new if node is old else node for node in consumer._inputs]
+    if consumer not in new._outputs:
+        new._outputs.append(consumer)
+
+def _detachInputs(node):
+    """
+    Remove every in-edge of node.
+    """
+    for parent in node._inputs:
+        parent._outputs = [foo for foo in parent._outputs if foo is not node]
+    node._inputs = []
+
+def foldConstants(columns):
+    """
+    Replace every node whose value can't vary- a deterministic behavior over inputs that
+    are all constant, including deterministic 0-ary behaviors- with a ConstantBehavior
+    that has no inputs. Random behaviors are never folded. Modifies the graph in place.
+
+    Returns the number of nodes folded.
+    """
+    folded = 0
+    for node in ancestorClosure(columns):
+        if not node.fxn.isDeterministic:
+            continue
+        if not all(isinstance(parent.fxn, ConstantBehavior) for parent in node._inputs):
+            continue
+        if isinstance(node.fxn, ConstantBehavior):
+            continue
+        value = node.fxn.calculate(*[parent.fxn.value for parent in node._inputs])
+        _detachInputs(node)
+        node.fxn = ConstantBehavior(value)
+        folded += 1
+    return folded
+
+def mergeCommonSubexpressions(columns):
+    """
+    Find nodes that calculate the same deterministic behavior (equal structuralKey)
+    over the same input nodes- in any order, for commutative behaviors- and calculate
+    only the first of them. The others' consumers read the first instead. A duplicate
+    that is itself a column stays, as an identity over the first, so it keeps its noise
+    function. Random behaviors are never merged. Modifies the graph in place.
+
+    Returns the number of duplicates found.
+    """
+    keep = set(columns)
+    canonical = {}
+    merged = 0
+    for node in ancestorClosure(columns):
+        if not node.fxn.isDeterministic or not node._inputs:
+            continue
+        inputIds = [id(parent) for parent in node._inputs]
+        if node.fxn.isCommutative:
+            inputIds.sort()
+        key = (structuralKey(node.fxn), tuple(inputIds))
+        original = canonical.setdefault(key, node)
+        if original is node:
+            continue
+        merged += 1
+        for consumer in node._outputs:
+            _replaceInput(consumer, node, original)
+        node._outputs = []
+        _detachInputs(node)
+        if node in keep:
+            original.addEdge(node)
+            node.fxn = IdentityBehavior()
+    return merged
+
+def modelCost(columns):
+    """
+    Estimated cost of calculating one row of the given columns, clean and noisy,
+    from the behaviors' cost hints: each node in the ancestor closure is counted once
+    (they're cached or cheap), plus one noise function per column.
+    """
+    return sum(node.fxn.cost for node in ancestorClosure(columns)) + \
+        sum(getattr(column.noiseFxn, "cost", 0) for column in columns)
+
+def optimize(columns):
+    """
+    Run every optimization pass over the model the given columns are calculated from.
+    Returns a dictionary of what each pass did.
+    """
+    results = {"costBefore": modelCost(columns)}
+    results["folded"] = foldConstants(columns)
+    results["merged"] = mergeCommonSubexpressions(columns)
+    results["fused"] = fuseUnaryChains(columns)
+    results["costAfter"] = modelCost(columns)
+    return results
@@ -0,0 +1,138 @@
+'''
+Structured export of the true network, for evaluating network inference without
+parsing the GraphViz file.
+
+For an output root R, writes:
+    R.truth.edges.npy - int32 (E, 2) array of (source id, destination id), in argument order
+    R.truth.nodes.npy - structured array, one record per node, indexed by id:
+                            behavior, noise - int16 codes into the kinds list
+                            inDegree, outDegree - int32
+                            column - int32 index of the node's column in the data files, -1 if none
+                                     (time series files have trajectory and time columns first)
+    R.truth.names.npy - fixed-width byte strings, the node names, indexed by id
+    R.truth.json      - the kinds list, each node's generated label and behavior and noise
+                        parameters, and the column names
+The .npy files are plain numpy arrays, so loadGroundTruth can map them without copying
+or parsing anything. Ids are assigned in dependency order (every edge goes from a
+smaller id to a larger one), graph after graph, and describe the model as built-
+before any optimization.
+'''
+
+import json
+import numpy
+
+NODE_DTYPE = numpy.dtype([("behavior", numpy.int16), ("noise", numpy.int16),
+                          ("inDegree", numpy.int32), ("outDegree", numpy.int32),
+                          ("column", numpy.int32)])
+
+def _parameters(behavior):
+    """A behavior's instance attributes, made JSON-safe (anything unusual becomes its repr)."""
+    parameters = {}
+    for name, value in vars(behavior).items():
+        if name == "rng":
+            continue
+        if not isinstance(value, (bool, int, long, float, basestring, type(None))):
+            value = repr(value)
+        parameters[name] = value
+    return parameters
+
+class GroundTruthRecorder(object):
+    """
+    Collects the true network node by node, as the model is built; nodes must be added
+    in dependency order, each after all of its inputs. Holds only names, ids and small
+    per-node records, not the nodes themselves.
+    """
+    def __init__(self, labelRecursion = 1):
+        self.labelRecursion = labelRecursion
+        self.ids = {}
+        self.names = []
+        self.labels = []
+        self.behaviorKinds = []
+        self.noiseKinds = []
+        self.behaviorParameters = []
+        self.noiseParameters = []
+        self.kinds = []
+        self._kindCodes = {}
+        self._src = []
+        self._dest = []
+
+    def _kind(self, behavior):
+        name = behavior.__class__.__name__
+        if name not in self._kindCodes:
+            self._kindCodes[name] = len(self.kinds)
+            self.kinds.append(name)
+        return self._kindCodes[name]
+
+    def addNode(self, node):
+        """Record a model.Node (or anything with the same interface), and its in-edges."""
+        nodeId = len(self.names)
+        self.ids[node.name] = nodeId
+        self.names.append(node.name)
+        self.labels.append(node.genName(self.labelRecursion))
+        fxn = node.fxn
+        noiseFxn = node.noiseFxn
+        self.behaviorKinds.append(self._kind(fxn))
+        self.noiseKinds.append(self._kind(noiseFxn))
+        self.behaviorParameters.append(_parameters(fxn))
+        self.noiseParameters.append(_parameters(noiseFxn))
+        for parent in node._inputs:
+            self._src.append(self.ids[parent.name])
+            self._dest.append(nodeId)
+
+    def write(self, pathRoot, columns, firstColumn = 0):
+        """
+        Write the export files for output root pathRoot; columns are the nodes written to the
+        data files, in order, starting from column number firstColumn.
+        """
+        edges = numpy.column_stack((numpy.array(self._src, numpy.int32), numpy.array(self._dest, numpy.int32)))
+        nodes = numpy.zeros(len(self.names), NODE_DTYPE)
+        nodes["behavior"] = self.behaviorKinds
+        nodes["noise"] = self.noiseKinds
+        nodes["inDegree"] = numpy.bincount(edges[:, 1], minlength=len(self.names))
+        nodes["outDegree"] = numpy.bincount(edges[:, 0], minlength=len(self.names))
+        nodes["column"] = -1
+        for index, column in enumerate(columns):
+            nodes["column"][self.ids[column.name]] = firstColumn + index
+        numpy.save(pathRoot + ".truth.edges.npy", edges)
+        numpy.save(pathRoot + ".truth.nodes.npy", nodes)
+        numpy.save(pathRoot + ".truth.names.npy", numpy.array(self.names, "S"))
+        with open(pathRoot + ".truth.json", "w") as metadata:
+            json.dump({
+                        "kinds": self.kinds,
+                        "labels": self.labels,
+                        "behaviorParameters": self.behaviorParameters,
+                        "noiseParameters": self.noiseParameters,
+                        "columns": [column.name for column in columns]
+                      }, metadata)
+
+class GroundTruth(object):
+    """
+    A loaded export: edges, nodes and names are memory-mapped arrays (see the module
+    description); the JSON metadata is only read if metadata is asked for.
+    """
+    def __init__(self, pathRoot, mmapMode = "r"):
+        self.pathRoot = pathRoot
+        self.edges = numpy.load(pathRoot + ".truth.edges.npy", mmap_mode=mmapMode)
+        self.nodes = numpy.load(pathRoot + ".truth.nodes.npy", mmap_mode=mmapMode)
+        self.names = numpy.load(pathRoot + ".truth.names.npy", mmap_mode=mmapMode)
+        self._metadata = None
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            with open(self.pathRoot + ".truth.json") as metadata:
+                self._metadata = json.load(metadata)
+        return self._metadata
+
+    def idsByName(self):
+        """Dictionary from node name to id."""
+        return dict((name, nodeId) for nodeId, name in enumerate(self.names.tolist()))
+
+    def columnIds(self):
+        """Ids of the data files' columns, in column order."""
+        columns = numpy.flatnonzero(self.nodes["column"] >= 0)
+        return columns[numpy.argsort(self.nodes["column"][columns])]
+
+def loadGroundTruth(pathRoot):
+    """The ground-truth export written for output root pathRoot, memory-mapped."""
+    return GroundTruth(pathRoot)
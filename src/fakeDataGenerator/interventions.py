@@ -0,0 +1,106 @@
+'''
+Interventions: the same samples, with some nodes clamped to constant values- knockouts,
+overexpression, anything a perturbation experiment does to a node.
+
+Clamping a node only changes its descendants, so an Intervention finds those once (along
+_outputs, among the nodes the output columns are calculated from) and, for each block of
+rows, recalculates just them. Every other value comes from the baseline: the output
+columns it leaves alone are the baseline's blocks, and the inputs of recalculated nodes
+are read from the baseline's block caches. The driver calculates a block of the baseline,
+then every intervention's version of it, before the caches are dropped, so any number of
+knockout datasets cost one baseline plus their own descendants.
+
+Recalculated nodes draw the random numbers the baseline drew for them, when the model
+draws counter-based random numbers (see counterRandom); the unaffected ones' draws are
+the baseline's regardless.
+
+Interventions work on model.Node objects as built, not on compact or optimized models,
+since both replace the nodes the names refer to.
+'''
+
+import numpy
+from graphOptimizer import ancestorClosure
+
+def parseClamps(text):
+    """
+    Dictionary of node name to clamped value, from text like "a12=0,b3=1.5".
+    Raises ValueError on anything else.
+    """
+    clamps = {}
+    for clamp in text.split(","):
+        if not clamp.strip():
+            continue
+        name, separator, value = clamp.partition("=")
+        if not separator or not name.strip():
+            raise ValueError("Intervention must look like node=value: {0!r}".format(clamp))
+        clamps[name.strip()] = float(value)
+    if not clamps:
+        raise ValueError("Empty intervention: {0!r}".format(text))
+    return clamps
+
+def readInterventions(path):
+    """One clamp dictionary per line of a file (as parseClamps); blank lines and # comments are skipped."""
+    interventions = []
+    with open(path) as source:
+        for line in source:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                interventions.append(parseClamps(line))
+    return interventions
+
+class Intervention(object):
+    """
+    One set of clamps on a model, and what it changes: the clamped nodes and their
+    descendants that the output columns depend on, in dependency order.
+    order is graphOptimizer.ancestorClosure(columns); pass it in to share it among many interventions.
+    """
+    def __init__(self, columns, clamps, order = None):
+        if order is None:
+            order = ancestorClosure(columns)
+        byName = dict((node.name, node) for node in order)
+        unknown = sorted(name for name in clamps if name not in byName)
+        if unknown:
+            raise ValueError("Not among the output columns or their ancestors, so clamping changes nothing: " + ", ".join(unknown))
+        self.clamps = dict((byName[name], value) for name, value in clamps.items())
+        relevant = set(order)
+        affected = set(self.clamps)
+        frontier = list(self.clamps)
+        while frontier:
+            node = frontier.pop()
+            for child in node._outputs:
+                if child in relevant and child not in affected:
+                    affected.add(child)
+                    frontier.append(child)
+        self.affected = [node for node in order if node in affected]
+        self.affectedColumns = [index for index, column in enumerate(columns) if column in affected]
+        self.columns = columns
+
+    def description(self):
+        """The clamps as text, in parseClamps' format."""
+        return ",".join("{0}={1!r}".format(node.name, value) for node, value in sorted(self.clamps.items(), key=lambda item: item[0].name))
+
+    def columnBlocks(self, start, stop, cleanColumns, dirtyColumns):
+        """
+        The intervention's (clean, noisy) lists of column blocks for rows [start, stop), given the
+        baseline's. The baseline's blocks for those rows must still be cached- call this after
+        calculating them and before forgetBlock.
+        """
+        values = {}
+        for node in self.affected:
+            if node in self.clamps:
+                values[node] = numpy.repeat(float(self.clamps[node]), stop - start)
+            else:
+                results = [values[parent] if parent in values else parent.calculateBlock(start, stop) for parent in node._inputs]
+                values[node] = node.evaluateBlock(start, stop, results)
+        cleanColumns = list(cleanColumns)
+        dirtyColumns = list(dirtyColumns)
+        for index in self.affectedColumns:
+            column = self.columns[index]
+            cleanColumns[index] = values[column]
+            dirtyColumns[index] = column.noiseBlock(start, stop, values[column])
+        return cleanColumns, dirtyColumns
+
+def interventions(columns, clampsList):
+    """An Intervention per clamp dictionary, sharing one dependency ordering of the model."""
+    order = ancestorClosure(columns)
+    return [Intervention(columns, clamps, order) for clamps in clampsList]
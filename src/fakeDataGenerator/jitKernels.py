@@ -0,0 +1,162 @@
+'''
+Block kernels for the behaviors whose scalar versions are Python loops and branches
+(convertToBase's digit loop, downregulate's sign logic), in two backends:
+    numba - each kernel as an explicit loop over the rows, compiled to native code by
+            Numba's njit, if Numba is installed
+    numpy - the same kernel as whole-array NumPy operations
+Both give exactly what the behavior's calculate gives, row for row. Rows a kernel can't
+do exactly in 64-bit integers are flagged, and the behavior sends just those through
+calculate.
+
+The backend is numba when it's importable, numpy otherwise; setBackend picks one
+explicitly (benchmarks, or to rule the compiler out when debugging).
+
+python -m fakeDataGenerator.jitKernels [rows], from the src directory, prints the per-row
+cost of each behavior under each backend and under the per-row Python path. (It loads the
+behavior plugins, which import the fakeDataGenerator package, so it can't run as a script
+from inside it.)
+'''
+
+from __future__ import division
+
+import math
+import numpy
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BASE_SCALE = 100000.0 #convertToBase's fixed point
+SAFE_DIGITS = 18 #19 digits below 9 still fit an int64; one spare, as the limit is compared as a float
+
+def _convertToBaseLoop(values, base, out, scalar):
+    #the numba form: one row at a time, exactly as ConvertToBase.calculate, in int64
+    limit = float(base) ** SAFE_DIGITS
+    for index in range(values.shape[0]):
+        value = values[index]
+        if value == 0.0 or math.isnan(value) or math.isinf(value):
+            out[index] = value
+            continue
+        scaled = abs(value * BASE_SCALE)
+        if scaled >= limit:
+            scalar[index] = True
+            continue
+        remaining = numpy.int64(scaled) #truncates, as int() does
+        if remaining == 0:
+            out[index] = 0.0
+            continue
+        decimal = numpy.int64(0)
+        place = numpy.int64(1)
+        while remaining:
+            decimal += (remaining % base) * place
+            remaining //= base
+            place *= 10
+        out[index] = decimal / BASE_SCALE * (-1.0 if value < 0.0 else 1.0)
+
+def _convertToBaseNumpy(values, base, out, scalar):
+    special = (values == 0.0) | ~numpy.isfinite(values)
+    scaled = numpy.abs(numpy.trunc(numpy.where(special, 0.0, values) * BASE_SCALE))
+    scalar |= scaled >= float(base) ** SAFE_DIGITS
+    remaining = numpy.where(scalar, 0.0, scaled).astype(numpy.int64)
+    decimal = numpy.zeros(len(values), numpy.int64)
+    place = numpy.ones(len(values), numpy.int64)
+    while remaining.any():
+        decimal += (remaining % base) * place
+        remaining //= base
+        place *= 10
+    out[:] = numpy.where(decimal == 0, 0.0, decimal / BASE_SCALE * numpy.where(values < 0.0, -1.0, 1.0))
+    out[special] = values[special]
+
+def _downregulateLoop(columns, out):
+    #the numba form of Downregulate.calculate: columns is (inputs, rows)
+    for index in range(columns.shape[1]):
+        first = columns[0, index]
+        negative = first < 0.0
+        value = abs(first)
+        for other in range(1, columns.shape[0]):
+            s = columns[other, index]
+            if s < 0.0:
+                negative = False
+            value -= abs(s)
+        out[index] = value * (-1.0 if negative else 1.0)
+
+def _downregulateNumpy(columns, out):
+    negative = columns[0] < 0.0
+    value = numpy.abs(columns[0])
+    for column in columns[1:]:
+        negative &= ~(column < 0.0)
+        value = value - numpy.abs(column)
+    out[:] = value * numpy.where(negative, -1.0, 1.0)
+
+_KERNELS = {
+            "numpy": {"convertToBase": _convertToBaseNumpy, "downregulate": _downregulateNumpy},
+           }
+if numba is not None:
+    _KERNELS["numba"] = {
+                         "convertToBase": numba.njit(cache=True, nogil=True)(_convertToBaseLoop),
+                         "downregulate": numba.njit(cache=True, nogil=True)(_downregulateLoop)
+                        }
+
+BACKEND = "numba" if numba is not None else "numpy"
+
+def backends():
+    """Names of the backends available here."""
+    return sorted(_KERNELS)
+
+def setBackend(name):
+    """Use the named backend (see backends) from now on."""
+    global BACKEND
+    if name not in _KERNELS:
+        raise ValueError("Kernel backend {0} isn't available here; choose from {1}".format(name, backends()))
+    BACKEND = name
+
+def convertToBase(values, base):
+    """
+    ConvertToBase.calculate over a block of values, in base. Returns the results and a boolean
+    array of the rows left for calculate (their results are meaningless here).
+    """
+    values = numpy.ascontiguousarray(values, float)
+    out = numpy.empty(len(values))
+    scalar = numpy.zeros(len(values), bool)
+    with numpy.errstate(all='ignore'):
+        _KERNELS[BACKEND]["convertToBase"](values, base, out, scalar)
+    return out, scalar
+
+def downregulate(columns):
+    """Downregulate.calculate over a block of rows of each of the given input columns."""
+    columns = numpy.ascontiguousarray(numpy.vstack(columns), float)
+    out = numpy.empty(columns.shape[1])
+    with numpy.errstate(all='ignore'):
+        _KERNELS[BACKEND]["downregulate"](columns, out)
+    return out
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import itertools
+    import config
+    import model
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    behaviors = dict((plugin.plugin_object.__class__.__name__, plugin.plugin_object)
+                     for plugin in model.modelBehaviorImplementations(config.Config.behaviorPaths))
+    numpy.random.seed(1)
+    inputs = [numpy.random.normal(0, 2, rows) for x in range(3)]
+    inputs[0][::97] = float('nan')
+    inputs[1][::89] *= 1e15
+    for name, columns in (("ConvertToBase", inputs[:1]), ("Downregulate", inputs)):
+        behavior = behaviors[name]
+        started = time.time()
+        #the per-row Python path, as IModelBehavior.calculateBlock does it
+        expected = numpy.fromiter(itertools.starmap(behavior.calculate, itertools.izip(*[column.tolist() for column in columns])), float, rows)
+        print "{0:>14} {1:>7}: {2:8.1f} ns/row".format(name, "python", (time.time() - started) / rows * 1e9)
+        for backend in backends():
+            setBackend(backend)
+            behavior.calculateBlock(100, *[column[:100] for column in columns]) #compile, if it does
+            started = time.time()
+            got = behavior.calculateBlock(rows, *columns)
+            elapsed = time.time() - started
+            print "{0:>14} {1:>7}: {2:8.1f} ns/row, {3}".format(name, backend, elapsed / rows * 1e9,
+                                                                "identical" if got.tostring() == expected.tostring() else "DIFFERENT")
+    if numba is None:
+        print "numba isn't installed; only the numpy backend was measured"
@@ -0,0 +1,168 @@
+'''
+Fitting a run into a memory budget (--maxMemory). Once the model is built, the memory it
+holds is known- it's the process's resident size- and what writing adds on top of that
+grows with the block size, in a way the model and the output settings determine:
+    every block-cached node (see model.Node.cachesBlocks) holds a block of floats until
+        the block is written, and the clean and noisy columns are held besides
+    text output turns each value into a Python float and a piece of a row on its way out
+    with --pipeline, each file's queue holds up to queueDepth more blocks
+    each intervention recalculates its affected nodes from the cached baseline
+    each compressed file keeps a few chunks in flight per compression thread
+    with statistics on, each column of each file keeps a quantile sketch, which grows with
+        the rows written, and summarizing a block takes a few copies of a column of it
+    out of core (see outOfCore), formatting happens a tile at a time instead, at a fixed cost
+plan weighs those against the budget and picks the settings that fit, giving things up in
+this order: queue depth (queued blocks past the new depth are spilled to temporary files
+instead of waited on, see pipeline), compression threads, and last the block size.
+
+Estimates are deliberately round; the driver reports the real peak at the end.
+'''
+
+from __future__ import division
+
+import math
+import multiprocessing
+import resource
+
+import columnStatistics
+import compressedOutput
+from graphOptimizer import ancestorClosure
+
+SIZE_SUFFIXES = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+MARGIN_BYTES = 8 * 1024 * 1024 #allocator slack, the statistics tables and whatever else isn't counted
+MARGIN_FRACTION = 0.05
+TRANSIENT_BLOCKS = 4 #uncached intermediate blocks alive at once while a column is calculated
+FORMAT_BYTES_PER_VALUE = {"tsv": 48, "text": 48, "sqlite": 48, "db": 48} #a Python float and its share of a row's tuple, and text or SQLite's record
+BINARY_BYTES_PER_ROW = 24 #binary output converts one column at a time
+MINIMUM_BLOCK_ROWS = 16
+SKETCH_LEVEL_BYTES = 256 #a sketch level's array header, list slot and parity flag, and its share of the accumulator
+STATISTICS_BYTES_PER_ROW = 64 #a column's copies and masks while ColumnAccumulator.update summarizes it, one column at a time
+
+def parseSize(text):
+    """Bytes in a size like "512M", "4G" or "1.5g"; a plain number is megabytes."""
+    text = text.strip().lower().rstrip("b")
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(float(text) * SIZE_SUFFIXES["m"])
+
+def currentRss():
+    """This process's resident set size now, in bytes (its peak so far where /proc isn't available)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, IndexError, ValueError):
+        return peakRss()
+
+def peakRss():
+    """The largest resident set size this process has had, in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 #kilobytes, on Linux
+
+def cachedNodes(columns):
+    """How many blocks calculating a block of the columns caches: one per block-cached ancestor."""
+    #a compact model's views cache everything they evaluate
+    return sum(1 for node in ancestorClosure(columns) if getattr(node, "cachesBlocks", lambda: True)())
+
+def statisticsBytes(columns, rows, sketchSize = columnStatistics.DEFAULT_SKETCH_SIZE):
+    """
+    Most the statistics of a clean and a noisy table of columns columns hold after rows rows:
+    per column, a QuantileSketch of up to ceil(log2(rows / sketchSize)) levels of sketchSize values.
+    """
+    levels = max(1, int(math.ceil(math.log(max(rows / sketchSize, 1), 2))))
+    return 2 * columns * levels * (8 * sketchSize + SKETCH_LEVEL_BYTES)
+
+def compressionBytes(threads, chunkBytes = compressedOutput.DEFAULT_CHUNK_BYTES):
+    """Most one compressed file holds: its buffer, the joined chunk, and the chunks in flight (their results are smaller)."""
+    return chunkBytes * (2 + threads * compressedOutput.CHUNKS_IN_FLIGHT_PER_THREAD + 1)
+
+class MemoryPlan(object):
+    """
+    Block size, queue depth, spilling and compression threads per file that fit a budget, and
+    what the plan expects to use: fixedBytes regardless of block size, rowBytes per block row.
+    """
+    def __init__(self, budget, fixedBytes, rowBytes, blockSize, queueDepth, spill, compressThreads, fits):
+        self.budget = budget
+        self.fixedBytes = fixedBytes
+        self.rowBytes = rowBytes
+        self.blockSize = blockSize
+        self.queueDepth = queueDepth
+        self.spill = spill
+        self.compressThreads = compressThreads
+        self.fits = fits
+
+    def estimatedPeak(self):
+        return self.fixedBytes + self.rowBytes * self.blockSize
+
+    def apply(self, settings):
+        """Put the plan's choices into a config.Config."""
+        settings.blockSize = self.blockSize
+        if self.queueDepth is not None:
+            settings.queueDepth = self.queueDepth
+        settings.spill = self.spill
+        settings.compressThreads = self.compressThreads
+
+    def description(self):
+        parts = ["blocks of {0} rows".format(self.blockSize)]
+        if self.queueDepth is not None:
+            parts.append("queue depth {0}{1}".format(self.queueDepth, " (spilling)" if self.spill else ""))
+        if self.compressThreads is not None:
+            parts.append("{0} compression threads per file".format(self.compressThreads))
+        return "{0}; estimated peak {1:.0f} MB of {2:.0f} MB budget".format(
+                ", ".join(parts), self.estimatedPeak() / SIZE_SUFFIXES["m"], self.budget / SIZE_SUFFIXES["m"])
+
+def plan(settings, columns, interventionList = (), rss = None):
+    """
+    The MemoryPlan for writing the given columns under settings (a config.Config with
+    maxMemory set), with the model already built and rss (default: now) bytes in use.
+    Block sizes only ever shrink from settings.blockSize; if even MINIMUM_BLOCK_ROWS
+    doesn't fit, the plan uses that and says it doesn't fit.
+    """
+    if rss is None:
+        rss = currentRss()
+    width = len(columns) + (2 if settings.timeSteps else 0)
+    fixed = rss + MARGIN_BYTES + settings.maxMemory * MARGIN_FRACTION
+    rowBytes = 16 * width #the clean and noisy column lists
+    formatBytes = FORMAT_BYTES_PER_VALUE.get(settings.outputFormat.lower(), 0) * width or BINARY_BYTES_PER_ROW
+    files = 2 * (1 + len(interventionList))
+    if settings.scratchDir is not None and not (interventionList or settings.timeSteps):
+        fixed += settings.transposeBytes
+        formatBytes = 0
+    if settings.timeSteps:
+        #a step's values of every node, and the previous step's, for every trajectory; then each block's steps are concatenated
+        fixed += 16 * len(ancestorClosure(columns)) * settings.samples
+        rowBytes += 16 * width
+    else:
+        rowBytes += 8 * (cachedNodes(columns) + TRANSIENT_BLOCKS)
+    if interventionList:
+        #one intervention's recalculated nodes and column lists at a time, written in turn
+        rowBytes += max(8 * len(intervention.affected) + 16 * width for intervention in interventionList) + formatBytes
+    statisticsRowBytes = 0
+    if settings.statistics:
+        #every data file's sketches are kept to the end, the interventions' included
+        fixed += statisticsBytes(width, settings.samples * (settings.timeSteps or 1)) * (1 + len(interventionList))
+        statisticsRowBytes = STATISTICS_BYTES_PER_ROW
+
+    def perRow(depth):
+        if settings.pipeline:
+            #both writers at once, each with its queue
+            return rowBytes + 2 * (formatBytes + statisticsRowBytes) + 2 * (depth + 1) * 8 * width
+        return rowBytes + formatBytes + statisticsRowBytes
+
+    def compression(threads):
+        return files * compressionBytes(threads) if settings.compress else 0
+
+    def rowsFitting(depth, threads):
+        return int((settings.maxMemory - fixed - compression(threads)) // perRow(depth))
+
+    blockSize = settings.blockSize
+    depth = settings.queueDepth if settings.pipeline else None
+    threads = (settings.compressThreads or multiprocessing.cpu_count()) if settings.compress else None
+    spill = False
+    while depth is not None and depth > 1 and rowsFitting(depth, threads) < blockSize:
+        depth -= 1
+        spill = True
+    while threads is not None and threads > 1 and rowsFitting(depth, threads) < blockSize:
+        threads -= 1
+    rows = rowsFitting(depth, threads)
+    fits = rows >= max(MINIMUM_BLOCK_ROWS, settings.samples if settings.timeSteps else 0) #time series blocks hold whole timesteps
+    return MemoryPlan(settings.maxMemory, fixed + compression(threads), perRow(depth),
+                      max(MINIMUM_BLOCK_ROWS, min(blockSize, rows)), depth, spill, threads, fits)
@@ -0,0 +1,51 @@
+'''
+Helpers for missing values (nan) in column blocks.
+
+Inside the model, nan is the missing value: a behavior like sieve produces it, and
+behaviors propagate it over whole blocks at once (invalidRows). Masks are not carried
+through the model. The block sink derives each column block's mask with one vectorized
+isnan (packedBlockMask) and passes it to the writer packed 8 rows to the byte, or None
+when nothing is missing. The binary writer stores the mask in place of the missing
+values; the text and SQLite writers unpack it to find the cells to write as missing.
+'''
+
+import numpy
+
+def missingRows(values):
+    """
+    Boolean array, true at every row of the block that is missing (nan).
+    """
+    return numpy.isnan(values)
+
+def invalidRows(columns):
+    """
+    Boolean array, true at every row where any of the given input columns is nan or infinite.
+    Used by behaviors whose scalar versions give up and return nan on such inputs.
+    """
+    invalid = ~numpy.isfinite(columns[0])
+    for column in columns[1:]:
+        invalid |= ~numpy.isfinite(column)
+    return invalid
+
+def packMask(missing):
+    """
+    Pack a boolean missing-row array into bytes, or return None if nothing is missing
+    so that dense columns cost nothing at all.
+    """
+    if not missing.any():
+        return None
+    return numpy.packbits(missing)
+
+def unpackMask(packed, size):
+    """
+    Inverse of packMask for a block of the given number of rows. None unpacks to None.
+    """
+    if packed is None:
+        return None
+    return numpy.unpackbits(packed)[:size].astype(bool)
+
+def packedBlockMask(values):
+    """
+    Convenience: the packed mask of a block of values, or None if it has no missing rows.
+    """
+    return packMask(missingRows(values))
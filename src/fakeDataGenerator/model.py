@@ -1,420 +1,689 @@
-'''
-Created on Dec 21, 2011
-
-@author: anorberg
-'''
-from __future__ import division
-
-import random
-import yapsy
-from yapsy.PluginManager import PluginManager
-import spiralPointDistribution
-import pointsToOutwardDigraph
-from yapsy.IPlugin import IPlugin
-
-graphviz_recursion_depth = 1 #todo: replace references to this with a config lookup
-
-def identity(x):
-    return x
-
-class Node:
-    """
-    Object that represents a node in the graph model.
-    """
-    def __init__(self, inputs, name, applyFxn, noiseFxn = identity):
-        """
-        Constructs a Node object from information about where it fits in the graph.
-        Only works for acyclic graphs built in forward order.
-        
-        Paramters:
-            inputs - Iterable containing Node objects that feed into this one.
-                     They will be updated to point to this object by this initializer.
-                     None becomes the empty list.
-            name - String to label this Node.
-            applyFxn - IModelBehavior this node is to perform. Can be updated
-                       later via the variable name "fxn".
-            noiseFxn (optional) - 1-ary IModelBehavior to add noise that shows
-                                  up only in column output, not fed to other nodes.
-        """
-        self.name = name
-        if inputs:
-            self._inputs = [foo._addOut(self) for foo in inputs]
-        else:
-            self._inputs = []
-        self.fxn = applyFxn
-        self.noiseFxn = noiseFxn
-        self._outputs = []
-        self._resultConsistencyCache = {}
-        
-    def _addOut(self, newOutNode):
-        """
-        Private method: add new nodes that receive data from this one.
-        Used for traversing the graph later.
-        """
-        self._outputs.append(newOutNode)
-        return self
-        
-    def addEdge(self, destination):
-        """
-        Add an edge from this node to a specified node.
-        """
-        destination._inputs.append(self)
-        self._outputs.append(destination)
-        return self
-        
-    def removeEdge(self, unDestination):
-        """
-        Remove an existing edge to a specified node. Returns False
-        if that edge does not already exist, otherwise returns True.
-        """
-        try:
-            self._outputs.remove(unDestination)
-        except ValueError:
-            return False
-        unDestination._inputs.remove(self)
-        return True
-        
-        
-    def calculate(self, cacheKey):
-        """
-        Calculate the value for the given row of the table. Pulls from cache if
-        it's seen this row ID before (any hashable object), and recalculates if
-        not. This forced cacheing behavior is strictly required due to the possibility
-        of random or partially random calculation functions (especially 0-ary functions).
-        """
-        if cacheKey not in self._resultConsistencyCache:
-            results = []
-            for node in self._inputs:
-                results.append(node.calculate(cacheKey))
-            self._resultConsistencyCache[cacheKey] = self.fxn.calculate(*results)
-        return self._resultConsistencyCache[cacheKey]
-    
-    def columnValue(self, cacheKey):
-        """
-        Calculate the value for the given row of the table as from calculate,
-        then modify the value before returning it to add noise based on the noise function,
-        if any was provided. Noise is not cached, so this may vary with multiple invocations.
-        """
-        return self.noiseFxn.calculate(self.calculate(cacheKey))
-    
-    def genName(self, remainingRecursion, first = True):
-        """Generates a friendly name based on what the operation is.
-        remainingRecursion is how deeply it should nest names; beyond that, symbolic IDs are used.
-        genName calls itself recursively, and outside calls under most circumstances
-        should not tinker with the "First" flag, which modifies handling of 0-ary operations.
-        (0-ary operations are assumed to be 'generators' and referred to
-        symbolically at all levels other than the level defining only the operation.)
-        """
-        if remainingRecursion <= 0:
-            return self.name
-        if not self._inputs:
-            #special case: source
-            if first:
-                return self.fxn.generate_name()
-            else:
-                return self.name
-        rNext = remainingRecursion - 1
-        supernames = ["({0})".format(foo.genName(rNext, False)) for foo in self._inputs]
-        return self.fxn.generate_name(*supernames)
-    
-    def toGraphViz(self):
-        """
-        Returns a String that can be used as part of a GraphViz data file.
-        Represents all the in-connections to the node. Labels node with generated names.
-        """
-        statements = ['"{0}" [label = "{0}:{1}"]'.format(self.name, self.genName(graphviz_recursion_depth))]
-        for nodeFrom in self._inputs:
-            statements.append('"{0}"->"{1}"'.format(nodeFrom.name, self.name))
-        statements.append("")
-        return "; ".join(statements)
-    
-    def __str__(self):
-        """
-        Returns a descriptive string representation of self.
-        """
-        return "Node: " + self.name + "- from " + \
-            ",".join((foo.name for foo in self._inputs)) + \
-            "; into " + ",".join((foo.name for foo in self._outputs))
-    
-    def _updateReachableSingle(self):
-        """
-        Internal: used as part of the reachableSet calculation.
-        """
-        self.reachableSet = set(self._outputs)
-        for dest in self._outputs:
-            self.reachableSet.update(dest.reachableSet)
-    
-    def updateReachable(self):
-        """
-        Re-scan for which nodes in the graph can be,
-        directly or indirectly, reached by this one. Used
-        as part of cycle-detection and break-detection algorithms.
-        """
-        steps = 1
-        self._updateReachableSingle()
-        frontier = set(self._inputs)
-        while frontier:
-            nextSet = set()
-            for element in frontier:
-                element._updateReachableSingle()
-                steps += 1
-                nextSet.update(element._inputs)
-            frontier = nextSet
-        return steps
-        
-        
-
-def graphvizEntireThing(headNodes):
-    """
-    Calculates a GraphViz DOT representation of a graph and returns it as a string.
-    Uses the generated names to a recursion depth of graphviz_recursion_depth, which
-    can be written into to customize this behavior.
-    
-    Parameter is the 0-ary nodes of the graph; other nodes are found via search.
-    
-    Return value is a string containing the GraphViz representation.
-    """
-    unprocessedNodes = set()
-    reachedNodes = set()
-    unprocessedNodes.update(headNodes)
-    reachedNodes.update(headNodes)
-    statements=["digraph{"]
-    
-    while unprocessedNodes:
-        nextNode = unprocessedNodes.pop()
-        statements.append(nextNode.toGraphViz())
-        for supernext in nextNode._outputs:
-            if not supernext in reachedNodes:
-                reachedNodes.add(supernext)
-                unprocessedNodes.add(supernext)
-
-    statements.append("}")
-    
-    return " ".join(statements)
-
-
-
-
-
-class IModelBehavior(IPlugin):
-    """
-    Plugin interface for behaviors the model can perform on values at each node in the graph.
-    Must be implemented and complemented by an appropriate yapsy-plugin info file for each
-    behavior operation. Includes calculation function, metadata, and friendly name generation function.
-    """
-    @property
-    def arity(self):
-        """Must be a field-like that contains a 2-element sequence.
-        [0] is minimum number of parameters to calculate.
-        [1] is maximum number of parameters to calculate, or None for unlimited.
-        """
-        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
-    
-    @property
-    def isNoise(self):
-        """Must be a field-like that can be used as a boolean:
-        True (or evaluates as true)- function is a 1-ary function suitable for use as a scramble function.
-        False (or evaluates as false)- anything else.
-        """
-        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
-    
-    def calculate(self, *args):
-        """The operation that this function should implement.
-        Must take some number of unnamed args- specifically, any number in the range specified by arity.
-        This will be dereferenced directly once per node, and then blindly used later.
-        Thus, strange getattr tricks to actually secretly call a closure that gives
-        random variations on the function are encouraged if appropriate.
-        """
-        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
-    def generate_name(self, *args):
-        """Generate a descriptive name based on the names of the parameters.
-        Must take some number of unnamed args- specifically, any number in the range specified by arity.
-        The parameters are the generated or symbolic names of previous nodes, parenthesized;
-        generate a descriptive name for this node, using those names to describe the operation.
-        Used to generate descriptive column names."""
-        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
-    
-def modelBehaviorImplementations(paths):
-    """
-    Return an iterable of plugin-info for every locatable implementation of this interface on a given path.
-    PyDev for Eclipse reports a compilation error here on a line that is actually legal Python due to
-    the schedule upon which module resolution and imports happen.
-    """
-    manager = PluginManager()
-    manager.setPluginPlaces(paths)
-    from fakeDataGenerator.model import IModelBehavior as foreignModelBehavior
-    #hey PyDev: the previous line is weird, but is actually legal
-    manager.setCategoriesFilter({
-        "ModelBehavior" : foreignModelBehavior,                         
-        })
-    manager.collectPlugins()
-    return manager.getPluginsOfCategory("ModelBehavior")
-    
-def _extendFunctionLookup(listlist, nonElimFxns, newMax):
-    """
-    Internal function used during the construction of a model from a Pygraph.
-    Extends a lookup table of arity to candidate functions to include a new
-    arity.
-    
-    Modifies its first argument. Returns a new, shorter list of functions:
-    functions that may yet cover arities the list hasn't reached yet.
-    Functions with a maximum arity that has already been covered
-    will have been removed from this new list.
-    The second argument is not modified.
-    """
-    if len(listlist) > newMax:
-        dupe = [fxn for fxn in nonElimFxns]
-        return dupe
-    newLen = newMax + 1
-    low = len(listlist)
-    while len(listlist) < newLen:
-        listlist.append([])
-    remainingFxns = []
-    for fxn in nonElimFxns:
-        if fxn.arity[1] is not None and fxn.arity[1] < low:
-            continue
-        if fxn.arity[1] is None or fxn.arity[1] > newMax:
-            remainingFxns.append(fxn)
-        top = newLen
-        if fxn.arity[1] is not None:
-            top = min(top, fxn.arity[1] + 1)
-        for x in range(max(low, fxn.arity[0]), top):
-            listlist[x].append(fxn)
-    return remainingFxns
-    
-class IdentityBehavior(IModelBehavior):
-    """
-    An implementation of IModelBehavior: the 1ary function that does nothing at all but return its argument.
-    """
-    arity = (1, 1)
-    isNoise = True
-    def calculate(self, oneArg):
-        """Returns its argument."""
-        return oneArg    
-    def generate_name(self, oneName):
-        """Returns its argument, as the most concise description of the function."""
-        return oneName
-    
-def randomElement(ls):
-    """
-    Helper function. Draws a random element off a list, selected uniformly.
-    """
-    dex = random.randint(0, len(ls)-1)
-    return ls[dex]     
-
-DEFAULT_ARITY_MAX = 4
-    
-def workingModelFromPygraph(graph, fxns, bonus_identity = 0):
-    """Takes a pygraph.digraph.digraph object, an iterable of
-    IModelBehavior that lists all potential calculation functions,
-    and the number of "bonus instances" of the identity function
-    that should be thrown into the fuzzer pool."""
-    # generate collection of functions at each arity up to 4. extend later as needed
-    noise = [fxn for fxn in fxns if fxn.isNoise]
-    for x in range(0, bonus_identity):
-        noise.append(IdentityBehavior())
-        
-    arityTable = []
-    fxns = _extendFunctionLookup(arityTable, fxns, DEFAULT_ARITY_MAX)
-    #dependency-order traversal
-    cleared = set()
-    zeroAry = [node for node in graph.nodes() if not graph.incidents(node)]
-    frontier = set(zeroAry)
-    labelsToModelNodes = {}
-    
-    class functionBox(object):
-        #box a closure so fxns is writebackable
-        def __init__(self, fxns):
-            self.fxns = fxns
-    
-        def drawAppropriateFxn(self, forThisLabel):
-            arity = len(graph.incidents(forThisLabel))
-            #NEXT UP: check arityTable length, grab random, raise if too short
-            if len(arityTable) <= arity:
-                self.fxns = _extendFunctionLookup(arityTable, self.fxns, arity)
-            valids = arityTable[arity]
-            if not valids:
-                raise ValueError("There exists a node for which no function exists- no {0}-ary functions: {1}".format(arity, forThisLabel))
-            return randomElement(valids)
-        
-        def __call__(self, forThisLabel):
-            return self.drawAppropriateFxn(forThisLabel)
-    
-    drawAppropriateFxn = functionBox(fxns)
-    
-    while frontier:
-        nextNode = frontier.pop()
-        cleared.add(nextNode)
-        foo = Node((labelsToModelNodes[incoming] for incoming in graph.incidents(nextNode)),
-                   nextNode,
-                   drawAppropriateFxn(nextNode).__class__(), #new instance, so init can be useful
-                   randomElement(noise).__class__())
-        labelsToModelNodes[nextNode] = foo
-        for child in graph.neighbors(nextNode):
-            if(cleared.issuperset(graph.incidents(child))):
-                frontier.add(child)
-    
-    return labelsToModelNodes.values(), [labelsToModelNodes[nodeName] for nodeName in zeroAry]
-
-
-
-def buildRandomModel(nPoints, nSeeds, r0, delta, spread, lumpage, behaviorPaths, pruner, prunerPaths = None, name_prefix="", bonus_identity = 3):
-    """
-    Builds a running, randomly-generated network model from the given parameters.
-    
-    Parameters:
-        nPoints - Number of nodes that should be in the resulting network, including seed points.
-        nSeeds - Number of nodes that are "seeds"- have an in-degree of 0. Must be at least 1.
-        r0 - A parameter that defines how strongly the first few nodes shape the graph. Large values will result in more separation between generators.
-        delta - A parameter that, in practice, defines how quickly distances grow. Leads to fewer edges as the graph goes further down.
-        spread - A parameter that affects how many "clusters" the graph will eventually wind up with.
-        lumpage - An integer that affects how aggressively points cluster. 0 will result in a graph of a random scattering of points, but
-                  otherwise low values result in stricter clusters.
-        behaviorPaths - A list of strings representing file paths that yapsy should search for IModelBehavior plugins.
-        pruner - either a pointsToOutwardDigraph.IPruneEdges to use to prune the graph to its final form,
-                 or the name of a plugin implementing IPruneEdges that can be loaded for the purpose.
-        prunerPaths - Ignored if pruner is not a string. If pruner is a string, that pruner, as the name of a Yapsy plugin,
-                      will be searched for in these paths.
-        namePrefix - Prefix for all node names (inserted after @ for non-generator nodes). Used when welding multiple graphs.
-        bonus_identiy - Number of additional times to add the IdentityBehavior to the pool of IModelBehavior that
-                        is drawn from for noise functions. Used to increase the odds that a column will not be
-                        intentionally semi-randomized or modified before presentation to the column printer.
-                        Use 0 to keep standard equal probabilities.
-    """
-    points = spiralPointDistribution.spiralPointDistribution(nPoints, nSeeds, r0, delta, spread, lumpage)
-    rawCompleteGraph = pointsToOutwardDigraph.graphFromPoints(points, nSeeds)
-    rawCompleteGraph = pointsToOutwardDigraph.friendly_rename(rawCompleteGraph, name_prefix)
-    if isinstance(pruner, str):
-        #TODO: fix
-        candidatePruners = pointsToOutwardDigraph.prunerImplementations(prunerPaths)
-        for pluginInfo in candidatePruners:
-            if pluginInfo.name == pruner:
-                pruner = pluginInfo.plugin_object
-                pruner.activate()
-                break
-        raise ValueError("No pruner by name {0} found in specified paths.".format(pruner))
-    trimmedGraph = pruner.prune(rawCompleteGraph)
-    
-    function_plugins =modelBehaviorImplementations(behaviorPaths)
-    functions = [plugin.plugin_object for plugin in function_plugins]
-    return workingModelFromPygraph(trimmedGraph, functions, bonus_identity)
-
-
-if __name__ == "__main__":
-    """Crude, prototypical approach to fake data table generation."""
-    #smoke test
-    import candidate_test_pruners
-    nodes, head = buildRandomModel(50, 4, 1, 0.5, 0.3, 2, ['U:\\mercurial\\fake-data-generator\\src\\ModelBehaviors'], candidate_test_pruners.bigDelta())
-    with open("E:\\debris\\whatever.gv", "w") as gvfile:
-        gvfile.write(graphvizEntireThing(head))
-        gvfile.flush()
-    import csv
-    with open("E:\\debris\\fakeData.tsv", "wb") as tsvfile:
-        cleanWriter = csv.writer(tsvfile, dialect='excel-tab')
-        cleanWriter.writerow(["{0}:{1}".format(node.name, node.genName(4)) for node in nodes])
-        for x in range(200):
-            key = object()
-            cleanWriter.writerow([str(node.calculate(key)) for node in nodes])
-            if not x % 100:
-                print x, "rows done"
+'''
+Created on Dec 21, 2011
+
+@author: anorberg
+'''
+from __future__ import division
+
+import random
+import itertools
+import collections
+import numpy
+import yapsy
+from yapsy.PluginManager import PluginManager
+import spiralPointDistribution
+import pointsToOutwardDigraph
+import counterRandom
+from yapsy.IPlugin import IPlugin
+
+graphviz_recursion_depth = 1 #todo: replace references to this with a config lookup
+
+DEFAULT_BEHAVIOR_COST = 25 #what a behavior without its own cost hint is assumed to cost: a Python call per row
+CHEAP_BEHAVIOR_COST = 2 #deterministic behaviors this cheap aren't worth caching for a single consumer
+
+def identity(x):
+    return x
+
+class Node:
+    """
+    Object that represents a node in the graph model.
+    """
+    def __init__(self, inputs, name, applyFxn, noiseFxn = identity):
+        """
+        Constructs a Node object from information about where it fits in the graph.
+        Only works for acyclic graphs built in forward order.
+        
+        Paramters:
+            inputs - Iterable containing Node objects that feed into this one.
+                     They will be updated to point to this object by this initializer.
+                     None becomes the empty list.
+            name - String to label this Node.
+            applyFxn - IModelBehavior this node is to perform. Can be updated
+                       later via the variable name "fxn".
+            noiseFxn (optional) - 1-ary IModelBehavior to add noise that shows
+                                  up only in column output, not fed to other nodes.
+        """
+        self.name = name
+        if inputs:
+            self._inputs = [foo._addOut(self) for foo in inputs]
+        else:
+            self._inputs = []
+        self.fxn = applyFxn
+        self.noiseFxn = noiseFxn
+        self._outputs = []
+        self._resultConsistencyCache = {}
+        self._blockCache = {}
+        self.randomSeed = None #set by counterRandom.seedModel
+        
+    def _addOut(self, newOutNode):
+        """
+        Private method: add new nodes that receive data from this one.
+        Used for traversing the graph later.
+        """
+        self._outputs.append(newOutNode)
+        return self
+        
+    def addEdge(self, destination):
+        """
+        Add an edge from this node to a specified node.
+        """
+        destination._inputs.append(self)
+        self._outputs.append(destination)
+        return self
+        
+    def removeEdge(self, unDestination):
+        """
+        Remove an existing edge to a specified node. Returns False
+        if that edge does not already exist, otherwise returns True.
+        """
+        try:
+            self._outputs.remove(unDestination)
+        except ValueError:
+            return False
+        unDestination._inputs.remove(self)
+        return True
+        
+        
+    def calculate(self, cacheKey):
+        """
+        Calculate the value for the given row of the table. Pulls from cache if
+        it's seen this row ID before (any hashable object), and recalculates if
+        not. This forced cacheing behavior is strictly required due to the possibility
+        of random or partially random calculation functions (especially 0-ary functions).
+        """
+        if cacheKey not in self._resultConsistencyCache:
+            results = []
+            for node in self._inputs:
+                results.append(node.calculate(cacheKey))
+            self._resultConsistencyCache[cacheKey] = self.fxn.calculate(*results)
+        return self._resultConsistencyCache[cacheKey]
+    
+    def columnValue(self, cacheKey):
+        """
+        Calculate the value for the given row of the table as from calculate,
+        then modify the value before returning it to add noise based on the noise function,
+        if any was provided. Noise is not cached, so this may vary with multiple invocations.
+        """
+        return self.noiseFxn.calculate(self.calculate(cacheKey))
+    
+    def calculateBlock(self, start, stop):
+        """
+        Calculate the values for rows [start, stop) of the table at once, as a numpy array.
+        Inputs are requested as whole blocks too, so the graph is traversed once per block
+        rather than once per row. Blocks are cached under (start, stop) for the same
+        consistency reasons as calculate; the row cache and the block cache are separate,
+        so don't mix the two evaluation modes for the same rows.
+        """
+        key = (start, stop)
+        if key in self._blockCache:
+            return self._blockCache[key]
+        block = self.evaluateBlock(start, stop, [node.calculateBlock(start, stop) for node in self._inputs])
+        if self.cachesBlocks():
+            self._blockCache[key] = block
+        return block
+    
+    def evaluateBlock(self, start, stop, results):
+        """
+        This node's behavior applied to the given blocks of input values for rows [start, stop),
+        drawing the same random numbers calculateBlock would; nothing is read from or put in
+        the cache. The building block of calculateBlock, and of recalculating a node from
+        inputs other than its own (see interventions).
+        """
+        if self.randomSeed is not None and not self.fxn.isDeterministic:
+            self.fxn.rng = counterRandom.CounterRandom(self.randomSeed, counterRandom.streamId(self.name), start)
+        with numpy.errstate(all='ignore'): #Python float arithmetic doesn't warn, so neither does this
+            return self.fxn.calculateBlock(stop - start, *results)
+    
+    def cachesBlocks(self):
+        """
+        Whether calculateBlock needs to cache this node's blocks. Random behaviors must be
+        cached so every consumer sees the same draw (with counter-based draws that would
+        hold anyway, but the cache still keeps shared ancestors from being recalculated);
+        so must anything expensive or shared.
+        A cheap deterministic behavior with at most one consumer is simply recalculated
+        from its (cached or equally deterministic) inputs whenever it's needed.
+        """
+        return not (self.fxn.isDeterministic and self.fxn.cost <= CHEAP_BEHAVIOR_COST and len(self._outputs) <= 1)
+    
+    def columnBlock(self, start, stop):
+        """
+        Calculate the clean and the noisy values for rows [start, stop) together.
+        Returns a (clean, noisy) pair of numpy arrays. The clean block comes from
+        calculateBlock, so the noisy one only costs the noise function applied over it.
+        """
+        clean = self.calculateBlock(start, stop)
+        return clean, self.noiseBlock(start, stop, clean)
+    
+    def noiseBlock(self, start, stop, clean):
+        """The noise function applied to a block of clean values for rows [start, stop)."""
+        if self.randomSeed is not None and not self.noiseFxn.isDeterministic:
+            self.noiseFxn.rng = counterRandom.CounterRandom(self.randomSeed, counterRandom.streamId(self.name), start, noise=True)
+        with numpy.errstate(all='ignore'):
+            return self.noiseFxn.calculateBlock(stop - start, clean)
+    
+    def forgetBlock(self, start, stop):
+        """
+        Drop the cached block for rows [start, stop) from this node and every ancestor
+        that still holds it. Call once the block has been written out for every column,
+        so memory stays bounded by the block size instead of the sample count.
+        With counter-based draws (see counterRandom) this is safe at any time, since
+        the block recalculates identically; otherwise, a dropped block is gone for good.
+        """
+        if self._blockCache.pop((start, stop), None) is not None or not self.cachesBlocks():
+            for node in self._inputs:
+                node.forgetBlock(start, stop)
+    
+    def genName(self, remainingRecursion, first = True):
+        """Generates a friendly name based on what the operation is.
+        remainingRecursion is how deeply it should nest names; beyond that, symbolic IDs are used.
+        genName calls itself recursively, and outside calls under most circumstances
+        should not tinker with the "First" flag, which modifies handling of 0-ary operations.
+        (0-ary operations are assumed to be 'generators' and referred to
+        symbolically at all levels other than the level defining only the operation.)
+        """
+        if remainingRecursion <= 0:
+            return self.name
+        if not self._inputs:
+            #special case: source
+            if first:
+                return self.fxn.generate_name()
+            else:
+                return self.name
+        rNext = remainingRecursion - 1
+        supernames = ["({0})".format(foo.genName(rNext, False)) for foo in self._inputs]
+        return self.fxn.generate_name(*supernames)
+    
+    def toGraphViz(self):
+        """
+        Returns a String that can be used as part of a GraphViz data file.
+        Represents all the in-connections to the node. Labels node with generated names.
+        """
+        statements = ['"{0}" [label = "{0}:{1}"]'.format(self.name, self.genName(graphviz_recursion_depth))]
+        for nodeFrom in self._inputs:
+            statements.append('"{0}"->"{1}"'.format(nodeFrom.name, self.name))
+        statements.append("")
+        return "; ".join(statements)
+    
+    def __str__(self):
+        """
+        Returns a descriptive string representation of self.
+        """
+        return "Node: " + self.name + "- from " + \
+            ",".join((foo.name for foo in self._inputs)) + \
+            "; into " + ",".join((foo.name for foo in self._outputs))
+    
+    def _updateReachableSingle(self):
+        """
+        Internal: used as part of the reachableSet calculation.
+        """
+        self.reachableSet = set(self._outputs)
+        for dest in self._outputs:
+            self.reachableSet.update(dest.reachableSet)
+    
+    def updateReachable(self):
+        """
+        Re-scan for which nodes in the graph can be,
+        directly or indirectly, reached by this one. Used
+        as part of cycle-detection and break-detection algorithms.
+        """
+        steps = 1
+        self._updateReachableSingle()
+        frontier = set(self._inputs)
+        while frontier:
+            nextSet = set()
+            for element in frontier:
+                element._updateReachableSingle()
+                steps += 1
+                nextSet.update(element._inputs)
+            frontier = nextSet
+        return steps
+        
+        
+
+def rowBlock(columns, start, stop):
+    """
+    The (clean, noisy) blocks of rows [start, stop) for each of the given columns, leaving
+    nothing cached behind. Rows can be asked for in any order and any number of times,
+    but they only come out the same each time if the model draws counter-based random
+    numbers (see counterRandom.seedModel).
+    """
+    blocks = [column.columnBlock(start, stop) for column in columns]
+    for column in columns:
+        column.forgetBlock(start, stop)
+    return blocks
+
+def rowAt(columns, k):
+    """
+    Row k of the given columns, as a (clean, noisy) pair of lists. See rowBlock.
+    """
+    blocks = rowBlock(columns, k, k + 1)
+    return [clean[0] for clean, noisy in blocks], [noisy[0] for clean, noisy in blocks]
+
+def graphvizEntireThing(headNodes):
+    """
+    Calculates a GraphViz DOT representation of a graph and returns it as a string.
+    Uses the generated names to a recursion depth of graphviz_recursion_depth, which
+    can be written into to customize this behavior.
+    
+    Parameter is the 0-ary nodes of the graph; other nodes are found via search.
+    
+    Return value is a string containing the GraphViz representation.
+    """
+    unprocessedNodes = set()
+    reachedNodes = set()
+    unprocessedNodes.update(headNodes)
+    reachedNodes.update(headNodes)
+    statements=["digraph{"]
+    
+    while unprocessedNodes:
+        nextNode = unprocessedNodes.pop()
+        statements.append(nextNode.toGraphViz())
+        for supernext in nextNode._outputs:
+            if not supernext in reachedNodes:
+                reachedNodes.add(supernext)
+                unprocessedNodes.add(supernext)
+
+    statements.append("}")
+    
+    return " ".join(statements)
+
+
+
+
+
+class IModelBehavior(IPlugin):
+    """
+    Plugin interface for behaviors the model can perform on values at each node in the graph.
+    Must be implemented and complemented by an appropriate yapsy-plugin info file for each
+    behavior operation. Includes calculation function, metadata, and friendly name generation function.
+    """
+    @property
+    def arity(self):
+        """Must be a field-like that contains a 2-element sequence.
+        [0] is minimum number of parameters to calculate.
+        [1] is maximum number of parameters to calculate, or None for unlimited.
+        """
+        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
+    
+    @property
+    def isNoise(self):
+        """Must be a field-like that can be used as a boolean:
+        True (or evaluates as true)- function is a 1-ary function suitable for use as a scramble function.
+        False (or evaluates as false)- anything else.
+        """
+        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
+    
+    #Optional metadata. The defaults are the safe assumptions; override where they're wrong.
+    isDeterministic = False #calculate is a pure function of its arguments: no random draws, no state
+    isCommutative = False #calculate gives the same result for any ordering of its arguments
+    isVectorizable = False #calculateBlock is a real numpy implementation, not the per-row default
+    cost = DEFAULT_BEHAVIOR_COST #rough per-row cost of calculateBlock; 1 is one numpy elementwise operation
+    
+    #Where calculateBlock draws random numbers from: the global numpy generator, unless the
+    #node swaps in a counterRandom.CounterRandom. Random behaviors must draw only through this.
+    rng = numpy.random
+    
+    def calculate(self, *args):
+        """The operation that this function should implement.
+        Must take some number of unnamed args- specifically, any number in the range specified by arity.
+        This will be dereferenced directly once per node, and then blindly used later.
+        Thus, strange getattr tricks to actually secretly call a closure that gives
+        random variations on the function are encouraged if appropriate.
+        """
+        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
+    
+    def calculateBlock(self, size, *columns):
+        """Block version of calculate: size is the number of rows in the block, and each of
+        columns holds one input's values for those rows (one column per input, as for calculate).
+        Must return a numpy float array of length size.
+        The default just calls calculate once per row, so every behavior works with block
+        evaluation; override with a numpy implementation when the operation vectorizes.
+        """
+        if columns:
+            rows = itertools.izip(*[numpy.asarray(column).tolist() for column in columns]) #plain floats, not numpy scalars
+            return numpy.fromiter(itertools.starmap(self.calculate, rows), float, size)
+        return numpy.fromiter((self.calculate() for x in xrange(size)), float, size)
+    
+    def affineCoefficients(self):
+        """Optional: a 1-ary behavior that computes a*x + b should return (a, b), so the
+        graph optimizer can fold runs of them into a single multiply-add. None otherwise.
+        """
+        return None
+    
+    def generate_name(self, *args):
+        """Generate a descriptive name based on the names of the parameters.
+        Must take some number of unnamed args- specifically, any number in the range specified by arity.
+        The parameters are the generated or symbolic names of previous nodes, parenthesized;
+        generate a descriptive name for this node, using those names to describe the operation.
+        Used to generate descriptive column names."""
+        raise NotImplemented("ModelBehaviorPlugin is abstract and all its plugin hooks must be overridden.")
+    
+def modelBehaviorImplementations(paths):
+    """
+    Return an iterable of plugin-info for every locatable implementation of this interface on a given path.
+    PyDev for Eclipse reports a compilation error here on a line that is actually legal Python due to
+    the schedule upon which module resolution and imports happen.
+    """
+    manager = PluginManager()
+    manager.setPluginPlaces(paths)
+    from fakeDataGenerator.model import IModelBehavior as foreignModelBehavior
+    #hey PyDev: the previous line is weird, but is actually legal
+    manager.setCategoriesFilter({
+        "ModelBehavior" : foreignModelBehavior,                         
+        })
+    manager.collectPlugins()
+    plugins = manager.getPluginsOfCategory("ModelBehavior")
+    for pluginInfo in plugins:
+        pluginInfo.behaviorMetadata = behaviorMetadata(pluginInfo.plugin_object)
+    return plugins
+
+def behaviorMetadata(behavior):
+    """
+    The optional metadata of an IModelBehavior, as a dictionary. modelBehaviorImplementations
+    attaches this to each plugin-info it returns, as behaviorMetadata.
+    """
+    return {
+                "isDeterministic":behavior.isDeterministic,
+                "isCommutative":behavior.isCommutative,
+                "isVectorizable":behavior.isVectorizable,
+                "cost":behavior.cost
+            }
+    
+def _extendFunctionLookup(listlist, nonElimFxns, newMax):
+    """
+    Internal function used during the construction of a model from a Pygraph.
+    Extends a lookup table of arity to candidate functions to include a new
+    arity.
+    
+    Modifies its first argument. Returns a new, shorter list of functions:
+    functions that may yet cover arities the list hasn't reached yet.
+    Functions with a maximum arity that has already been covered
+    will have been removed from this new list.
+    The second argument is not modified.
+    """
+    if len(listlist) > newMax:
+        dupe = [fxn for fxn in nonElimFxns]
+        return dupe
+    newLen = newMax + 1
+    low = len(listlist)
+    while len(listlist) < newLen:
+        listlist.append([])
+    remainingFxns = []
+    for fxn in nonElimFxns:
+        if fxn.arity[1] is not None and fxn.arity[1] < low:
+            continue
+        if fxn.arity[1] is None or fxn.arity[1] > newMax:
+            remainingFxns.append(fxn)
+        top = newLen
+        if fxn.arity[1] is not None:
+            top = min(top, fxn.arity[1] + 1)
+        for x in range(max(low, fxn.arity[0]), top):
+            listlist[x].append(fxn)
+    return remainingFxns
+    
+class IdentityBehavior(IModelBehavior):
+    """
+    An implementation of IModelBehavior: the 1ary function that does nothing at all but return its argument.
+    """
+    arity = (1, 1)
+    isNoise = True
+    isDeterministic = True
+    isVectorizable = True
+    cost = 0
+    def calculate(self, oneArg):
+        """Returns its argument."""
+        return oneArg    
+    def calculateBlock(self, size, column):
+        """Returns its argument as an array."""
+        return numpy.asarray(column, float)
+    def generate_name(self, oneName):
+        """Returns its argument, as the most concise description of the function."""
+        return oneName
+    
+class ConstantBehavior(IModelBehavior):
+    """
+    An implementation of IModelBehavior: the 0-ary function that always returns the same value.
+    Not drawn for models (it isn't a plugin); used where a node's value is known in advance.
+    """
+    arity = (0, 0)
+    isNoise = False
+    isDeterministic = True
+    isVectorizable = True
+    cost = 1
+    def __init__(self, value):
+        self.value = value
+    def calculate(self):
+        """Returns the constant."""
+        return self.value
+    def calculateBlock(self, size):
+        """Returns the constant, size times."""
+        return numpy.repeat(float(self.value), size)
+    def generate_name(self):
+        """The constant is its own name."""
+        return repr(self.value)
+    
+def randomElement(ls):
+    """
+    Helper function. Draws a random element off a list, selected uniformly.
+    """
+    dex = random.randint(0, len(ls)-1)
+    return ls[dex]     
+
+DEFAULT_ARITY_MAX = 4
+    
+class BehaviorPool(object):
+    """
+    The behaviors a model's nodes are drawn from: calculation behaviors looked up by
+    arity (extended as higher arities turn up), and noise behaviors, padded with
+    "bonus instances" of the identity function.
+    """
+    def __init__(self, fxns, bonus_identity = 0):
+        # generate collection of functions at each arity up to 4. extend later as needed
+        self.noise = [fxn for fxn in fxns if fxn.isNoise]
+        for x in range(0, bonus_identity):
+            self.noise.append(IdentityBehavior())
+        self.arityTable = []
+        self.fxns = _extendFunctionLookup(self.arityTable, fxns, DEFAULT_ARITY_MAX)
+    
+    def drawBehavior(self, arity, forThisLabel):
+        """A random behavior that accepts arity inputs, for the node labeled forThisLabel."""
+        if len(self.arityTable) <= arity:
+            self.fxns = _extendFunctionLookup(self.arityTable, self.fxns, arity)
+        valids = self.arityTable[arity]
+        if not valids:
+            raise ValueError("There exists a node for which no function exists- no {0}-ary functions: {1}".format(arity, forThisLabel))
+        return randomElement(valids)
+    
+    def drawNoise(self):
+        """A random noise behavior."""
+        return randomElement(self.noise)
+
+def dependencyOrder(graph):
+    """
+    Generate the node labels of a pygraph digraph in a stable dependency order: each
+    after all of its in-neighbors. A single O(V+E) pass (Kahn's algorithm) driven by
+    counts of in-neighbors not yet generated. Raises ValueError, after generating
+    everything it could, if the graph has a cycle.
+    """
+    waitingOn = {}
+    for node in graph.nodes():
+        waitingOn[node] = len(graph.incidents(node))
+    frontier = collections.deque(node for node in graph.nodes() if not waitingOn[node])
+    generated = 0
+    while frontier:
+        nextNode = frontier.popleft()
+        yield nextNode
+        generated += 1
+        for child in graph.neighbors(nextNode):
+            waitingOn[child] -= 1
+            if not waitingOn[child]:
+                frontier.append(child)
+    if generated < len(waitingOn):
+        raise ValueError("Graph has a cycle; {0} nodes could never be built".format(len(waitingOn) - generated))
+
+def workingModelFromPygraph(graph, fxns, bonus_identity = 0):
+    """Takes a pygraph.digraph.digraph object, an iterable of
+    IModelBehavior that lists all potential calculation functions,
+    and the number of "bonus instances" of the identity function
+    that should be thrown into the fuzzer pool.
+    
+    Returns a list of every model Node, in a stable dependency order (each node
+    after all of its inputs), and a list of the 0-ary nodes. Assembly is a single
+    O(V+E) pass (see dependencyOrder): a node is built once its last input has been.
+    """
+    pool = BehaviorPool(fxns, bonus_identity)
+    labelsToModelNodes = {}
+    built = []
+    
+    for nextNode in dependencyOrder(graph):
+        incoming = graph.incidents(nextNode)
+        foo = Node([labelsToModelNodes[parent] for parent in incoming],
+                   nextNode,
+                   pool.drawBehavior(len(incoming), nextNode).__class__(), #new instance, so init can be useful
+                   pool.drawNoise().__class__())
+        labelsToModelNodes[nextNode] = foo
+        built.append(foo)
+    
+    return built, [node for node in built if not node._inputs]
+
+
+
+def buildRandomModel(nPoints, nSeeds, r0, delta, spread, lumpage, behaviorPaths, pruner, prunerPaths = None, name_prefix="", bonus_identity = 3, compact = False, bandSize = None, cache = None, seed = None):
+    """
+    Builds a running, randomly-generated network model from the given parameters.
+    
+    Parameters:
+        nPoints - Number of nodes that should be in the resulting network, including seed points.
+        nSeeds - Number of nodes that are "seeds"- have an in-degree of 0. Must be at least 1.
+        r0 - A parameter that defines how strongly the first few nodes shape the graph. Large values will result in more separation between generators.
+        delta - A parameter that, in practice, defines how quickly distances grow. Leads to fewer edges as the graph goes further down.
+        spread - A parameter that affects how many "clusters" the graph will eventually wind up with.
+        lumpage - An integer that affects how aggressively points cluster. 0 will result in a graph of a random scattering of points, but
+                  otherwise low values result in stricter clusters.
+        behaviorPaths - A list of strings representing file paths that yapsy should search for IModelBehavior plugins.
+        pruner - either a pointsToOutwardDigraph.IPruneEdges to use to prune the graph to its final form,
+                 or the name of a plugin implementing IPruneEdges that can be loaded for the purpose.
+        prunerPaths - Ignored if pruner is not a string. If pruner is a string, that pruner, as the name of a Yapsy plugin,
+                      will be searched for in these paths.
+        namePrefix - Prefix for all node names (inserted after @ for non-generator nodes). Used when welding multiple graphs.
+        bonus_identiy - Number of additional times to add the IdentityBehavior to the pool of IModelBehavior that
+                        is drawn from for noise functions. Used to increase the odds that a column will not be
+                        intentionally semi-randomized or modified before presentation to the column printer.
+                        Use 0 to keep standard equal probabilities.
+        compact - If True, build a compactModel.CompactModel instead of Node objects, and return
+                  its NodeViews in place of the Nodes (see compactModel).
+        bandSize - If given, triangulate the points in overlapping radial bands of this many points
+                   (see pointsToOutwardDigraph.windowedGraphFromPoints) rather than all at once.
+        cache - An artifactCache.ArtifactCache to load and store the points, triangulation and pruning in,
+                or None to build them every time. Only used along with seed.
+        seed - The master random seed each stage is reseeded from, and the cached stages keyed by
+               (see artifactCache.cachedPrunedGraph); a seeded build is the same with or without a cache.
+    """
+    if seed is not None and not isinstance(pruner, str):
+        import artifactCache
+        graph = artifactCache.cachedPrunedGraph(cache, seed, nPoints, nSeeds, r0, delta, spread, lumpage, pruner, name_prefix, bandSize)
+        return modelFromGraph(graph, behaviorPaths, bonus_identity, compact)
+    points = spiralPointDistribution.spiralPointDistribution(nPoints, nSeeds, r0, delta, spread, lumpage)
+    if bandSize:
+        rawCompleteGraph = pointsToOutwardDigraph.windowedGraphFromPoints(points, nSeeds, bandSize)
+    else:
+        rawCompleteGraph = pointsToOutwardDigraph.graphFromPoints(points, nSeeds)
+    rawCompleteGraph = pointsToOutwardDigraph.friendly_rename(rawCompleteGraph, name_prefix)
+    if isinstance(pruner, str):
+        #TODO: fix
+        candidatePruners = pointsToOutwardDigraph.prunerImplementations(prunerPaths)
+        for pluginInfo in candidatePruners:
+            if pluginInfo.name == pruner:
+                pruner = pluginInfo.plugin_object
+                pruner.activate()
+                break
+        raise ValueError("No pruner by name {0} found in specified paths.".format(pruner))
+    trimmedGraph = pruner.prune(rawCompleteGraph)
+    
+    return modelFromGraph(trimmedGraph, behaviorPaths, bonus_identity, compact)
+
+def buildGeneratedModel(generator, nPoints, nSeeds, behaviorPaths, name_prefix="", bonus_identity = 3, compact = False):
+    """
+    Builds a running model on a graph from a topologyGenerators.ITopologyGenerator, instead of
+    from a point distribution. nPoints, nSeeds, behaviorPaths, name_prefix, bonus_identity and
+    compact are as for buildRandomModel.
+    """
+    return modelFromGraph(generator.generate(nPoints, nSeeds, name_prefix), behaviorPaths, bonus_identity, compact)
+
+def modelFromGraph(graph, behaviorPaths, bonus_identity = 3, compact = False):
+    """
+    Loads the behavior plugins from behaviorPaths and builds a model on a finished graph,
+    as Node objects (workingModelFromPygraph) or a compact model. Returns the nodes and the 0-ary nodes.
+    """
+    function_plugins =modelBehaviorImplementations(behaviorPaths)
+    functions = [plugin.plugin_object for plugin in function_plugins]
+    if compact:
+        import compactModel
+        built = compactModel.compactModelFromPygraph(graph, functions, bonus_identity)
+        return built.nodes(), built.heads()
+    return workingModelFromPygraph(graph, functions, bonus_identity)
+
+
+def benchmarkAssembly(nNodes, inDegree, behaviorPaths, compare=False):
+    """
+    Time workingModelFromPygraph on a random layered DAG with nNodes nodes, each
+    (after the first inDegree) taking inDegree edges from random earlier nodes.
+    With compare, also time the ordering alone two ways: dependencyOrder's in-degree
+    counts, and the frontier re-scan that assembly used to do, which re-checks every
+    child's whole in-edge list each time one of its parents clears.
+    """
+    import time
+    from pygraph.classes.digraph import digraph
+    graph = digraph()
+    graph.add_nodes(xrange(nNodes))
+    for node in xrange(inDegree, nNodes):
+        for parent in random.sample(xrange(node), inDegree):
+            graph.add_edge((parent, node))
+    fxns = [plugin.plugin_object for plugin in modelBehaviorImplementations(behaviorPaths)]
+    print nNodes, "nodes,", len(graph.edges()), "edges"
+    
+    started = time.time()
+    nodes, heads = workingModelFromPygraph(graph, fxns)
+    print "assembly: {0:.2f}s for {1} nodes".format(time.time() - started, len(nodes))
+    
+    if compare:
+        started = time.time()
+        for nextNode in dependencyOrder(graph):
+            pass
+        print "in-degree count ordering alone: {0:.2f}s".format(time.time() - started)
+        started = time.time()
+        cleared = set()
+        frontier = set(node for node in graph.nodes() if not graph.incidents(node))
+        while frontier:
+            nextNode = frontier.pop()
+            cleared.add(nextNode)
+            for child in graph.neighbors(nextNode):
+                if cleared.issuperset(graph.incidents(child)):
+                    frontier.add(child)
+        print "previous frontier scan alone: {0:.2f}s".format(time.time() - started)
+
+if __name__ == "__main__":
+    """Crude, prototypical approach to fake data table generation."""
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark-assembly":
+        #from src: python -m fakeDataGenerator.model --benchmark-assembly nNodes inDegree [--compare] behaviorPath...
+        compare = "--compare" in sys.argv
+        paths = [arg for arg in sys.argv[4:] if arg != "--compare"]
+        benchmarkAssembly(int(sys.argv[2]), int(sys.argv[3]), paths, compare)
+        sys.exit(0)
+    #smoke test
+    import candidate_test_pruners
+    nodes, head = buildRandomModel(50, 4, 1, 0.5, 0.3, 2, ['U:\\mercurial\\fake-data-generator\\src\\ModelBehaviors'], candidate_test_pruners.bigDelta())
+    with open("E:\\debris\\whatever.gv", "w") as gvfile:
+        gvfile.write(graphvizEntireThing(head))
+        gvfile.flush()
+    import csv
+    with open("E:\\debris\\fakeData.tsv", "wb") as tsvfile:
+        cleanWriter = csv.writer(tsvfile, dialect='excel-tab')
+        cleanWriter.writerow(["{0}:{1}".format(node.name, node.genName(4)) for node in nodes])
+        for x in range(200):
+            key = object()
+            cleanWriter.writerow([str(node.calculate(key)) for node in nodes])
+            if not x % 100:
+                print x, "rows done"
         tsvfile.flush()
\ No newline at end of file
@@ -0,0 +1,140 @@
+'''
+Out-of-core writing (--scratch): calculating the table and formatting it, decoupled through
+memory-mapped scratch files, so neither has to hold what the other needs.
+
+Rows are calculated block by block as usual, but each block's columns go straight into a
+column-major ScratchTable- each column contiguous on disk, nothing formatted, nothing kept
+in memory beyond what the kernel chooses to cache. (The file is mapped afresh for each block
+and each tile, so its pages only count against this process while they're in use.)
+Then a transpose stage reads the table back in tiles of rows: each tile is one contiguous
+run of every column, so the reads are long and sequential, and a tile is small enough
+(transposeBytes) that turning its columns into rows happens in cache. The writers see
+ordinary blocks, a tile at a time.
+
+The scratch holds passRows rows of both the clean and the noisy table at a time
+(16 bytes per value); a table bigger than the disk budget is done in several passes.
+
+python outOfCore.py [rows] [columns] times both stages over random data, against writing
+the same data a block at a time; every file goes to a temporary directory, and is written
+header to close.
+'''
+
+from __future__ import division
+
+import os
+import tempfile
+import numpy
+
+from memoryGovernor import FORMAT_BYTES_PER_VALUE, BINARY_BYTES_PER_ROW
+
+DEFAULT_TRANSPOSE_BYTES = 64 * 1024 * 1024
+MINIMUM_TILE_ROWS = 256
+SCRATCH_HEADROOM = 0.9 #of the free space, when no disk budget is given
+
+class ScratchTable(object):
+    """
+    A (columns, rows) table of float64 in a memory-mapped temporary file in directory:
+    each column contiguous. Rows are numbered from 0 within the table.
+    """
+    def __init__(self, directory, columns, rows, prefix = "table"):
+        descriptor, self.path = tempfile.mkstemp(".scratch", prefix, directory)
+        try:
+            os.ftruncate(descriptor, 8 * columns * rows)
+        finally:
+            os.close(descriptor)
+        self.columns = columns
+        self.rows = rows
+
+    def _map(self):
+        return numpy.memmap(self.path, float, "r+", shape=(self.columns, self.rows))
+
+    def writeBlock(self, start, columns):
+        """Store a block of columns as rows [start, start + its length)."""
+        values = self._map()
+        for index, column in enumerate(columns):
+            values[index, start:start + len(column)] = column
+
+    def tiles(self, tileRows, rows = None):
+        """The first rows (default: all) rows, tileRows at a time, each tile a list of column arrays of its own."""
+        if rows is None:
+            rows = self.rows
+        for start in range(0, rows, tileRows):
+            stop = min(start + tileRows, rows)
+            values = self._map()
+            tile = [numpy.array(values[index, start:stop]) for index in range(self.columns)]
+            del values
+            yield tile
+
+    def close(self):
+        os.remove(self.path)
+
+def freeBytes(directory):
+    """Space available to this user in directory's filesystem."""
+    stat = os.statvfs(directory)
+    return stat.f_bavail * stat.f_frsize
+
+def passRows(columns, samples, blockSize, diskBytes = None, directory = "."):
+    """
+    Rows per pass for a clean and a noisy table of columns columns in diskBytes (default: most
+    of directory's free space), as a whole number of blocks. Raises IOError if not even one
+    block fits.
+    """
+    if diskBytes is None:
+        diskBytes = int(freeBytes(directory) * SCRATCH_HEADROOM)
+    rows = min(samples, diskBytes // (16 * max(columns, 1)))
+    if rows < min(blockSize, samples):
+        raise IOError("Scratch space for {0} rows of {1} columns doesn't fit in {2:.1f} MB".format(
+                      min(blockSize, samples), columns, diskBytes / (1024 * 1024)))
+    if rows < samples:
+        rows -= rows % blockSize
+    return rows
+
+def tileRows(columns, outputFormat, transposeBytes = DEFAULT_TRANSPOSE_BYTES):
+    """Rows per transpose tile, so a tile of both tables, formatted, takes about transposeBytes."""
+    rowBytes = 2 * (8 * columns + (FORMAT_BYTES_PER_VALUE.get(outputFormat.lower(), 0) * columns or BINARY_BYTES_PER_ROW))
+    return max(MINIMUM_TILE_ROWS, int(transposeBytes // rowBytes))
+
+if __name__ == "__main__":
+    import shutil
+    import sys
+    import time
+    import outputWriters
+    import pipeline
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    blockSize = 1000
+    numpy.random.seed(1)
+    data = [numpy.random.normal(0, 1, blockSize) for x in range(columns)]
+    header = ["column{0}".format(index) for index in range(columns)]
+    megabytes = 8 * rows * columns / (1024 * 1024)
+    directory = tempfile.mkdtemp(".outOfCore")
+
+    def timedWrite(outputFormat, name, blocks):
+        """Seconds to write blocks to a new file in directory, header to close."""
+        started = time.time()
+        writer = outputWriters.openBlockWriter(outputFormat, os.path.join(directory, name))
+        try:
+            writer.writeHeader(header)
+            sink = pipeline.DirectBlockSink(writer)
+            for block in blocks:
+                sink.submit(block)
+        finally:
+            writer.close()
+        return time.time() - started
+
+    try:
+        for outputFormat in ("binary", "tsv"):
+            direct = timedWrite(outputFormat, "direct", (data for start in range(0, rows, blockSize)))
+            table = ScratchTable(directory, columns, rows)
+            try:
+                started = time.time()
+                for start in range(0, rows, blockSize):
+                    table.writeBlock(start, data)
+                filled = time.time() - started
+                transposed = timedWrite(outputFormat, "transposed", table.tiles(tileRows(columns, outputFormat)))
+            finally:
+                table.close()
+            print "{0:>6}: direct {1:.2f}s; scratch fill {2:.2f}s ({3:.0f} MB/s), transpose and write {4:.2f}s ({5:.0f} MB/s)".format(
+                    outputFormat, direct, filled, megabytes / filled, transposed, megabytes / transposed)
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,331 @@
+'''
+Writers for the generated data table. All of them take the table a block of rows
+at a time, as a list of column arrays plus a matching list of packed missing-value
+masks (see missingMasks; None for a column with nothing missing).
+
+TsvBlockWriter produces the traditional tab-separated text. BinaryBlockWriter
+produces a compact column-block file in which missing values are real nulls:
+they're recorded in the mask and not stored as values at all. SqliteBlockWriter
+loads the table straight into an SQLite database, missing values as NULL.
+
+Any of the files can be compressed as it's written (see compressedOutput); the
+database can't.
+
+python outputWriters.py [rows] [columns] times loading SQLite directly against
+writing TSV and loading that.
+'''
+
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import struct
+import numpy
+import missingMasks
+import compressedOutput
+
+class TsvBlockWriter(object):
+    """
+    Writes blocks as rows of a tab-separated file. Values are written with str, as the
+    row-at-a-time writer always did (12 significant digits), except that blocks are float
+    arrays, so values of integer-valued behaviors appear as 1.0 rather than 1. Missing values
+    are written as missingToken; only the masked cells are touched, so dense columns pay nothing.
+    If compress names a codec, the file is compressed (on compressThreads threads, default
+    one per CPU) and its extension added to path.
+    """
+    extension = ".txt"
+
+    def __init__(self, path, missingToken="nan", compress=None, compressThreads=None):
+        self.path = path + compressedOutput.compressedExtension(compress)
+        self.missingToken = missingToken
+        self._file = compressedOutput.openOutput(path, compress, compressThreads)
+        self._writer = csv.writer(self._file, dialect='excel-tab')
+
+    def writeHeader(self, names):
+        self._writer.writerow(names)
+
+    def writeBlock(self, columns, masks):
+        rows = len(columns[0]) if columns else 0
+        textColumns = []
+        for column, mask in itertools.izip(columns, masks):
+            values = map(str, column.tolist())
+            if mask is not None:
+                for index in numpy.flatnonzero(missingMasks.unpackMask(mask, rows)):
+                    values[index] = self.missingToken
+            textColumns.append(values)
+        self._writer.writerows(itertools.izip(*textColumns))
+
+    def close(self):
+        self._file.flush()
+        self._file.close()
+
+BINARY_MAGIC = "FDGBLK1\n"
+
+class BinaryBlockWriter(object):
+    """
+    Writes a column-block binary file:
+        magic string BINARY_MAGIC
+        uint32 header length, then a JSON header {"columns": [names]}
+        then per block: uint32 row count, then per column a uint8 flag that is 1
+        if a packed missing mask follows, the mask if so, and the values
+        as little-endian float64 with missing rows stored as 0.
+    Read it back with readBinaryBlocks. compress and compressThreads are as for TsvBlockWriter.
+    """
+    extension = ".bin"
+
+    def __init__(self, path, compress=None, compressThreads=None):
+        self.path = path + compressedOutput.compressedExtension(compress)
+        self._file = compressedOutput.openOutput(path, compress, compressThreads)
+        self._file.write(BINARY_MAGIC)
+
+    def writeHeader(self, names):
+        header = json.dumps({"columns": list(names)})
+        self._file.write(struct.pack("<I", len(header)))
+        self._file.write(header)
+
+    def writeBlock(self, columns, masks):
+        rows = len(columns[0]) if columns else 0
+        self._file.write(struct.pack("<I", rows))
+        for column, mask in itertools.izip(columns, masks):
+            values = numpy.asarray(column, "<f8")
+            if mask is None:
+                self._file.write("\x00")
+            else:
+                self._file.write("\x01")
+                self._file.write(mask.tostring())
+                values = numpy.where(missingMasks.unpackMask(mask, rows), 0.0, values).astype("<f8")
+            self._file.write(values.tostring())
+
+    def close(self):
+        self._file.flush()
+        self._file.close()
+
+SQLITE_PRAGMAS = [
+                    "page_size = 65536",
+                    "journal_mode = OFF",
+                    "synchronous = OFF",
+                    "locking_mode = EXCLUSIVE",
+                    "temp_store = MEMORY",
+                    "cache_size = -65536" #kilobytes
+                 ]
+SQLITE_TABLE_COLUMNS = 998 #plus the row number, within the 999 parameters older SQLite builds allow a statement
+SQLITE_TRANSACTION_ROWS = 100000
+
+def _quoteIdentifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+class SqliteBlockWriter(object):
+    """
+    Loads the table into a new SQLite database (any file at path is replaced), tuned for bulk
+    loading: no journal, no syncing, rows inserted with executemany in transactions of about
+    SQLITE_TRANSACTION_ROWS rows.
+    The data is table "data": a "row" column numbering the rows from 0, then one REAL column per
+    data column, named by the header up to its first ":"; missing values are NULL. Past
+    SQLITE_TABLE_COLUMNS columns, the rest go to tables data_1, data_2 and so on, which join
+    on "row". Table "columns" gives each column's table, name and full header.
+    With --pipeline, the load runs on the writer's own thread, so the connection allows that.
+    """
+    extension = ".sqlite"
+
+    def __init__(self, path, compress=None, compressThreads=None):
+        if compress is not None:
+            raise ValueError("SQLite output can't be compressed")
+        self.path = path
+        if os.path.exists(path):
+            os.remove(path)
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            self._connection.execute("PRAGMA " + pragma)
+        self._statements = []
+        self._rows = 0
+        self._uncommitted = 0
+        self._inTransaction = False
+
+    def _commit(self):
+        if self._inTransaction:
+            self._connection.execute("COMMIT")
+            self._inTransaction = False
+
+    def _begin(self):
+        self._connection.execute("BEGIN")
+        self._inTransaction = True
+
+    def writeHeader(self, names):
+        columns = [header.partition(":")[0] for header in names]
+        self._begin()
+        self._connection.execute("CREATE TABLE columns (position INTEGER PRIMARY KEY, tableName TEXT, name TEXT, header TEXT)")
+        for part, first in enumerate(range(0, max(len(columns), 1), SQLITE_TABLE_COLUMNS)):
+            table = "data" if part == 0 else "data_{0}".format(part)
+            chunk = columns[first:first + SQLITE_TABLE_COLUMNS]
+            self._connection.execute("CREATE TABLE {0} (row INTEGER PRIMARY KEY{1})".format(
+                                     table, "".join(", {0} REAL".format(_quoteIdentifier(name)) for name in chunk)))
+            self._connection.executemany("INSERT INTO columns VALUES (?, ?, ?, ?)",
+                                         [(first + index, table, name, header) for index, (name, header)
+                                          in enumerate(zip(chunk, names[first:first + SQLITE_TABLE_COLUMNS]))])
+            self._statements.append(("INSERT INTO {0} VALUES ({1})".format(table, ", ".join(["?"] * (len(chunk) + 1))),
+                                     first, first + len(chunk)))
+        self._commit()
+        self._begin()
+
+    def writeBlock(self, columns, masks):
+        rows = len(columns[0]) if columns else 0
+        values = []
+        for column, mask in itertools.izip(columns, masks):
+            columnValues = column.tolist()
+            if mask is not None:
+                for index in numpy.flatnonzero(missingMasks.unpackMask(mask, rows)):
+                    columnValues[index] = None
+            values.append(columnValues)
+        rowNumbers = range(self._rows, self._rows + rows)
+        for statement, first, last in self._statements:
+            self._connection.executemany(statement, itertools.izip(rowNumbers, *values[first:last]))
+        self._rows += rows
+        self._uncommitted += rows
+        if self._uncommitted >= SQLITE_TRANSACTION_ROWS:
+            self._commit()
+            self._begin()
+            self._uncommitted = 0
+
+    def close(self):
+        if self._connection is None:
+            return
+        try:
+            self._commit()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+def readBinaryBlocks(path):
+    """
+    Read a file written by BinaryBlockWriter. Returns the list of column names and a
+    generator of (columns, masks) per block, where masks are boolean arrays, or None
+    for columns with nothing missing. Files compressed with gzip or bz2 (by extension) are
+    decompressed as they're read.
+    """
+    source = _openCompressed(path)
+    if source.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        source.close()
+        raise ValueError("{0} is not a binary block file".format(path))
+    headerLength, = struct.unpack("<I", source.read(4))
+    names = json.loads(source.read(headerLength))["columns"]
+
+    def blocks():
+        with source:
+            while True:
+                countBytes = source.read(4)
+                if len(countBytes) < 4:
+                    return
+                rows, = struct.unpack("<I", countBytes)
+                maskBytes = (rows + 7) // 8
+                columns = []
+                masks = []
+                for x in range(len(names)):
+                    mask = None
+                    if source.read(1) == "\x01":
+                        mask = missingMasks.unpackMask(numpy.fromstring(source.read(maskBytes), numpy.uint8), rows)
+                    columns.append(numpy.fromstring(source.read(rows * 8), "<f8"))
+                    masks.append(mask)
+                yield columns, masks
+
+    return names, blocks()
+
+def _openCompressed(path):
+    """Open path for reading, decompressing .gz and .bz2 files (including multi-member ones)."""
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        #Python 2's BZ2File stops after the first stream, so decompress every stream here
+        import bz2
+        with open(path, "rb") as compressed:
+            data = compressed.read()
+        streams = []
+        while data:
+            decompressor = bz2.BZ2Decompressor()
+            streams.append(decompressor.decompress(data))
+            data = decompressor.unused_data
+        return _ClosingStringIO("".join(streams))
+    return open(path, "rb")
+
+class _ClosingStringIO(object):
+    """In-memory file contents that can be used in a with statement, like a real file."""
+    def __init__(self, data):
+        import cStringIO
+        self._data = cStringIO.StringIO(data)
+    def read(self, size=-1):
+        return self._data.read(size)
+    def close(self):
+        self._data.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+OUTPUT_FORMATS = {
+                    "tsv":TsvBlockWriter,
+                    "text":TsvBlockWriter,
+                    "binary":BinaryBlockWriter,
+                    "bin":BinaryBlockWriter,
+                    "sqlite":SqliteBlockWriter,
+                    "db":SqliteBlockWriter
+                 }
+
+def openBlockWriter(outputFormat, pathRoot, missingToken="nan", compress=None, compressThreads=None):
+    """
+    Open a writer of the named format (a key of OUTPUT_FORMATS) at pathRoot plus the format's extension,
+    compressed by the named codec (see compressedOutput) on compressThreads threads if compress isn't None.
+    """
+    writerClass = OUTPUT_FORMATS[outputFormat.lower()]
+    if writerClass is TsvBlockWriter:
+        return TsvBlockWriter(pathRoot + writerClass.extension, missingToken, compress, compressThreads)
+    return writerClass(pathRoot + writerClass.extension, compress, compressThreads)
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+    import pipeline
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    blockSize = 1000
+    numpy.random.seed(1)
+    block = [numpy.random.normal(0, 1, blockSize) for x in range(columns)]
+    block[0][::7] = float('nan')
+    names = ["c{0}:column {0}".format(index) for index in range(columns)]
+    directory = tempfile.mkdtemp()
+    try:
+        def load(writer):
+            writer.writeHeader(names)
+            sink = pipeline.DirectBlockSink(writer)
+            for start in range(0, rows, blockSize):
+                sink.submit(block)
+            writer.close()
+
+        started = time.time()
+        load(SqliteBlockWriter(os.path.join(directory, "direct.sqlite")))
+        direct = time.time() - started
+        started = time.time()
+        load(TsvBlockWriter(os.path.join(directory, "table.txt"), ""))
+        written = time.time() - started
+        #then load the text, as a consumer would: parsed back a block of rows at a time, then the same inserts
+        database = SqliteBlockWriter(os.path.join(directory, "loaded.sqlite"))
+        with open(os.path.join(directory, "table.txt"), "rb") as text:
+            reader = csv.reader(text, dialect='excel-tab')
+            database.writeHeader(reader.next())
+            while True:
+                textRows = list(itertools.islice(reader, blockSize))
+                if not textRows:
+                    break
+                parsed = numpy.array([[float(value) if value else float('nan') for value in row] for row in textRows]).T
+                database.writeBlock(list(parsed), [missingMasks.packedBlockMask(column) for column in parsed])
+        database.close()
+        loaded = time.time() - started - written
+        print "{0} rows of {1} columns".format(rows, columns)
+        print "SQLite directly:    {0:6.2f}s, {1:8.0f} rows/s".format(direct, rows / direct)
+        print "TSV, then load it:  {0:6.2f}s ({1:.2f}s writing, {2:.2f}s loading), {3:8.0f} rows/s".format(
+                written + loaded, written, loaded, rows / (written + loaded))
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
@@ -0,0 +1,184 @@
+'''
+Block sinks: where the driver sends each finished block of columns for writing.
+
+DirectBlockSink writes on the calling thread, so calculation and I/O take turns.
+BlockWriterThread hands blocks to a writer thread through a bounded queue, so the next
+block is calculated while the last one is written; when the writer falls behind, the
+queue fills and the calculation waits (backpressure), and both sides' waiting is timed.
+Either way the sink packs the missing-value masks (see missingMasks) and calls the
+outputWriters writer, after showing the block to its observer, if it has one
+(anything with an update(columns) method, like columnStatistics.TableStatistics).
+
+numpy arithmetic and file writes release the GIL, so binary output overlaps well;
+text formatting is Python code and mostly doesn't.
+
+Given a spill directory, a BlockWriterThread never waits: blocks that find the queue
+full are written to a temporary file there instead, and read back in turn. That keeps
+the calculation going at a fixed memory cost (see memoryGovernor) for the price of
+writing those blocks twice.
+'''
+
+from __future__ import division
+
+import os
+import Queue
+import sys
+import tempfile
+import threading
+import time
+import numpy
+import missingMasks
+
+DEFAULT_QUEUE_DEPTH = 2 #double-buffered: one block being written, one waiting
+
+def _writeBlock(writer, columns, observer):
+    if observer is not None:
+        observer.update(columns)
+    writer.writeBlock(columns, [missingMasks.packedBlockMask(column) for column in columns])
+
+class DirectBlockSink(object):
+    """
+    Writes each block as it's submitted.
+    """
+    def __init__(self, writer, observer = None):
+        self.writer = writer
+        self.observer = observer
+
+    def submit(self, columns):
+        """Write one block of columns."""
+        _writeBlock(self.writer, columns, self.observer)
+
+    def finish(self):
+        """Nothing is pending; returns None, as there's nothing to report."""
+        return None
+
+class SpilledBlock(object):
+    """A block of columns parked in a temporary file, as raw float64 values one column after another."""
+    def __init__(self, columns, directory):
+        descriptor, self.path = tempfile.mkstemp(".spill", "block", directory)
+        self.rows = len(columns[0]) if columns else 0
+        self.width = len(columns)
+        with os.fdopen(descriptor, "wb") as spill:
+            for column in columns:
+                numpy.asarray(column, float).tofile(spill)
+
+    def load(self):
+        """The columns back, and the file gone."""
+        try:
+            with open(self.path, "rb") as spill:
+                return [numpy.fromfile(spill, float, self.rows) for x in range(self.width)]
+        finally:
+            os.remove(self.path)
+
+class BlockWriterThread(object):
+    """
+    Writes blocks on a background thread, up to depth of them queued behind the one being
+    written. The writer (and observer) are only used from that thread from here on.
+    An exception on the writer thread is raised again from the next submit or from finish.
+    With spillDirectory, blocks past depth are spilled there (see SpilledBlock) rather than waited on.
+    """
+    def __init__(self, writer, depth = DEFAULT_QUEUE_DEPTH, observer = None, spillDirectory = None):
+        self.writer = writer
+        self.observer = observer
+        self.depth = depth
+        self.spillDirectory = spillDirectory
+        self._queue = Queue.Queue(0 if spillDirectory is not None else depth)
+        self._error = None
+        self.blocks = 0
+        self.spilled = 0
+        self.maxDepth = 0
+        self.producerStall = 0.0 #seconds submit spent waiting for room in the queue
+        self.writerIdle = 0.0 #seconds the writer spent waiting for a block
+        self.writeTime = 0.0
+        self._thread = threading.Thread(target=self._run, name="block writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, columns):
+        """Queue one block of columns for writing, waiting if the queue is full."""
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+        started = time.time()
+        if self.spillDirectory is not None and self._queue.qsize() >= self.depth:
+            columns = SpilledBlock(columns, self.spillDirectory)
+            self.spilled += 1
+        self._queue.put(columns)
+        self.producerStall += time.time() - started
+        self.maxDepth = max(self.maxDepth, self._queue.qsize())
+
+    def finish(self):
+        """Wait for every queued block to be written. Returns the statistics."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+        return self.statistics()
+
+    def statistics(self):
+        """Blocks written (and spilled), deepest queue seen, and seconds stalled, idle and writing, as a dictionary."""
+        return {
+                "blocks": self.blocks,
+                "spilled": self.spilled,
+                "maxDepth": self.maxDepth,
+                "producerStall": self.producerStall,
+                "writerIdle": self.writerIdle,
+                "writeTime": self.writeTime
+               }
+
+    def _run(self):
+        import sys
+        while True:
+            started = time.time()
+            columns = self._queue.get()
+            self.writerIdle += time.time() - started
+            if columns is None:
+                return
+            if self._error is not None:
+                if isinstance(columns, SpilledBlock):
+                    os.remove(columns.path)
+                continue #keep draining, so submit never blocks on a dead writer
+            started = time.time()
+            try:
+                if isinstance(columns, SpilledBlock):
+                    columns = columns.load()
+                _writeBlock(self.writer, columns, self.observer)
+            except Exception:
+                self._error = sys.exc_info()
+            self.writeTime += time.time() - started
+            self.blocks += 1
+
+def blockSink(writer, pipelined, depth = DEFAULT_QUEUE_DEPTH, observer = None, spillDirectory = None):
+    """A BlockWriterThread around writer if pipelined, otherwise a DirectBlockSink."""
+    if pipelined:
+        return BlockWriterThread(writer, depth, observer, spillDirectory)
+    return DirectBlockSink(writer, observer)
+
+def finishAll(sinks):
+    """
+    Call finish() on each of sinks (anything with a finish method), carrying on past any
+    that raise, so every writer thread is joined. Returns their results in order, or
+    re-raises the first error once all are finished.
+    """
+    results = []
+    error = None
+    for sink in sinks:
+        try:
+            results.append(sink.finish())
+        except:
+            results.append(None)
+            if error is None:
+                error = sys.exc_info()
+    if error is not None:
+        raise error[0], error[1], error[2]
+    return results
+
+def abandon(sinks, failure):
+    """
+    Finish sinks after failure (a sys.exc_info()) stopped the calculation, then re-raise it;
+    anything the sinks raise while finishing is secondary to it and dropped.
+    """
+    try:
+        finishAll(sinks)
+    except Exception:
+        pass
+    raise failure[0], failure[1], failure[2]
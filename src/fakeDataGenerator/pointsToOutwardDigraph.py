@@ -1,149 +1,324 @@
-'''
-Created on Jan 27, 2012
-
-@author: anorberg
-
-Module to convert a series of points distributed by spiralPointDistribution into a graph inspired by proto-adjacency.
-Requires spiralPointDistribution as its source, since it's making assumptions about list ordering.
-'''
-from __future__ import division
-from numpy import array as ndarray
-import math
-from scipy.spatial import Delaunay
-from pygraph.classes.digraph import digraph
-import itertools
-import yapsy
-from yapsy.IPlugin import IPlugin
-
-def euclideanDistance(twople):
-    """
-    Helper function performing the obvious Euclidean distance calculation between two points in N-dimensional space.
-    The two points are presented as a tuple of tuple (or other sequences), where the subsequences are the same length.
-    """
-    if len(twople) != 2:
-        raise ValueError("euclideanDistance must take a 2-item tuple containing numeric sequences of equal length")
-    a, b = twople
-    if len(a) != len(b):
-        raise ValueError("euclideanDistance must take a 2-item tuple containing numeric sequences of equal length")
-    
-    ssquare = 0.0
-    
-    for ae, be in zip(a, b):
-        diff = ae - be
-        ssquare += diff * diff
-    
-    return math.sqrt(ssquare)
-
-def graphFromTriangulation(triang, nSeeds):
-    """
-    Generate a PyGraph from a Delaunay triangulation generated from a set of points
-    that has a specific ordering property: points are listed in radially outwards order.
-    This invariant is guaranteed by spiralPointDistribution, and relied on throughout the
-    code. This function probably shouldn't actually be used in other contexts unless
-    heavily rewritten.
-    
-    The generated graph will be acyclic (as long as the points are properly ordered)
-    and fully connected (regardless).
-    
-        triang - scipy.spatial.Delaunay triangulation
-        nSeeds - number of points that were considered seed nodes in the point
-                 distribution. These will be assigned an in-degree of 0.
-    """
-    pointTuples = []
-    for point in triang.points: #ndarray
-        pointTuples.append(tuple(point))
-    
-    graph = digraph()
-    for index, point in enumerate(pointTuples):
-        if index < nSeeds:
-            node_color = "red"
-        else:
-            node_color = "black"
-        graph.add_node(point, [("color", node_color)])
-    
-    for plex in triang.vertices:
-        for src, dest in itertools.combinations(plex, 2):
-            if src == dest: #no self edges
-                continue
-            elif src > dest: #all edges point down the list
-                src, dest = dest, src;
-            
-            if dest < nSeeds: #seeds can't have incoming edges
-                continue
-            
-            edge = (pointTuples[src], pointTuples[dest])
-            
-            if not graph.has_edge(edge):
-                graph.add_edge(edge, euclideanDistance(edge))
-                
-    return graph
-
-def graphFromPoints(points, nSeeds):
-    """
-    Generate a PyGraph from a list of points generated by spiralPointDistribution.
-    The requirement for spiralPointDistribution is to keep the invariant that
-    points are listed in radially outwards order.
-    
-        points - list of points in radially outward order
-        nSeeds - number of points at the same radius from the center that act
-                 as the 0-ary nodes in the graph, and were used as the seeds
-                 for the spiralPointDistribution. These must be the first N
-                 on the list due to the behavior of spiralPointDistribution
-    """
-    return graphFromTriangulation(Delaunay(ndarray(points)), nSeeds)
-
-def friendly_rename(graph, name_prefix=""):
-    """
-    Builds a new weighted digraph, based on the provided weighted digraph (which isn't modified), 
-    which discards all names in favor of alphanumeric node identifiers.
-    """
-    nextLetter = ord('A')
-    nextNumber = 1
-    identifierMap = {}
-    newGraph = digraph()
-    
-    for node in graph.nodes():
-        if not graph.incidents(node):
-            identifier = name_prefix + chr(nextLetter)
-            nextLetter += 1
-        else:
-            identifier = "@" + name_prefix + str(nextNumber)
-            nextNumber += 1
-        newGraph.add_node(identifier, graph.node_attributes(node))
-        identifierMap[node] = identifier
-    
-    for edge in graph.edges():
-        weight = graph.edge_weight(edge)
-        label = graph.edge_label(edge)
-        src = identifierMap[edge[0]]
-        dest = identifierMap[edge[1]]
-        new_edge = (src, dest)
-        attrs = graph.edge_attributes(edge)
-        newGraph.add_edge(new_edge, weight, label, attrs)
-        
-    return newGraph
-
-class IPruneEdges(IPlugin):
-    """
-    Yapsy plugin interface for algorithms that prune edges off the graph of the Delaunay triangulation. 
-    """
-    def prune(self, graph):
-        """
-        Given a graph, remove some of its edges to make it shaped more like an interaction network.
-        Return the pruned graph, but this is expected to modify the original (and that is what should be returned).
-        """
-        raise NotImplemented("IPruneEdges is a plugin interface. prune MUST be overridden!")
-    
-
-def prunerImplementations(paths):
-    """
-    Return an iterable of plugin-info for every locatable implementation of this interface.
-    """
-    manager = yapsy.PluginManager()
-    manager.setPluginPlaces(paths)
-    from fakeDataGenerator.pointsToOutwardDigraph import IPruneEdges as foreignPruneEdges
-    manager.setCategoriesFilter({
-        "PruneEdges" : foreignPruneEdges,                         
-        })
-    manager.collectPlugins()
-    return manager.getPluginsOfCategory("PruneEdges"), manager
\ No newline at end of file
+'''
+Created on Jan 27, 2012
+
+@author: anorberg
+
+Module to convert a series of points distributed by spiralPointDistribution into a graph inspired by proto-adjacency.
+Requires spiralPointDistribution as its source, since it's making assumptions about list ordering.
+'''
+from __future__ import division
+from numpy import array as ndarray
+import numpy
+import math
+from scipy.spatial import Delaunay
+from pygraph.classes.digraph import digraph
+import itertools
+import yapsy
+from yapsy.IPlugin import IPlugin
+
+def euclideanDistance(twople):
+    """
+    Helper function performing the obvious Euclidean distance calculation between two points in N-dimensional space.
+    The two points are presented as a tuple of tuple (or other sequences), where the subsequences are the same length.
+    """
+    if len(twople) != 2:
+        raise ValueError("euclideanDistance must take a 2-item tuple containing numeric sequences of equal length")
+    a, b = twople
+    if len(a) != len(b):
+        raise ValueError("euclideanDistance must take a 2-item tuple containing numeric sequences of equal length")
+    
+    ssquare = 0.0
+    
+    for ae, be in zip(a, b):
+        diff = ae - be
+        ssquare += diff * diff
+    
+    return math.sqrt(ssquare)
+
+def graphFromTriangulation(triang, nSeeds):
+    """
+    Generate a PyGraph from a Delaunay triangulation generated from a set of points
+    that has a specific ordering property: points are listed in radially outwards order.
+    This invariant is guaranteed by spiralPointDistribution, and relied on throughout the
+    code. This function probably shouldn't actually be used in other contexts unless
+    heavily rewritten.
+    
+    The generated graph will be acyclic (as long as the points are properly ordered)
+    and fully connected (regardless).
+    
+        triang - scipy.spatial.Delaunay triangulation
+        nSeeds - number of points that were considered seed nodes in the point
+                 distribution. These will be assigned an in-degree of 0.
+    """
+    pointTuples = []
+    for point in triang.points: #ndarray
+        pointTuples.append(tuple(point))
+    
+    graph = digraph()
+    for index, point in enumerate(pointTuples):
+        if index < nSeeds:
+            node_color = "red"
+        else:
+            node_color = "black"
+        graph.add_node(point, [("color", node_color)])
+    
+    for plex in triang.vertices:
+        for src, dest in itertools.combinations(plex, 2):
+            if src == dest: #no self edges
+                continue
+            elif src > dest: #all edges point down the list
+                src, dest = dest, src;
+            
+            if dest < nSeeds: #seeds can't have incoming edges
+                continue
+            
+            edge = (pointTuples[src], pointTuples[dest])
+            
+            if not graph.has_edge(edge):
+                graph.add_edge(edge, euclideanDistance(edge))
+                
+    return graph
+
+def graphFromPoints(points, nSeeds):
+    """
+    Generate a PyGraph from a list of points generated by spiralPointDistribution.
+    The requirement for spiralPointDistribution is to keep the invariant that
+    points are listed in radially outwards order.
+    
+        points - list of points in radially outward order
+        nSeeds - number of points at the same radius from the center that act
+                 as the 0-ary nodes in the graph, and were used as the seeds
+                 for the spiralPointDistribution. These must be the first N
+                 on the list due to the behavior of spiralPointDistribution
+    """
+    return graphFromTriangulation(Delaunay(ndarray(points)), nSeeds)
+
+DEFAULT_BAND_OVERLAP = 1.0 #in bands: how far past its own points each band's triangulation reaches, both ways
+
+def _triangulationEdges(coordinates):
+    """
+    The edges of the Delaunay triangulation of an array of points, as an (E, 2) array of
+    index pairs (smaller index first), each edge once.
+    """
+    simplices = numpy.sort(Delaunay(coordinates).vertices, axis=1)
+    pairs = numpy.concatenate((simplices[:, [0, 1]], simplices[:, [0, 2]], simplices[:, [1, 2]]))
+    keys = numpy.unique(pairs[:, 0].astype(numpy.int64) * len(coordinates) + pairs[:, 1])
+    return numpy.column_stack((keys // len(coordinates), keys % len(coordinates)))
+
+def windowedTriangulationEdges(points, bandSize, overlap = DEFAULT_BAND_OVERLAP):
+    """
+    Generate the edges of an approximate Delaunay triangulation of points (in radially
+    outward order, as from spiralPointDistribution), one radial band at a time, as
+    (E, 2) arrays of (inner, outer) point index pairs.
+    
+    Each band owns bandSize consecutive points, and is triangulated together with
+    overlap * bandSize points on either side of it; of that triangulation, only edges whose
+    outer end is one of the band's own points are kept. Every edge is therefore generated
+    once, by the band that owns its outer end, and bands share their seams through the
+    overlap. Edges only ever join points at nearby radii, so with enough overlap the
+    result matches the global triangulation exactly; near a seam it may differ by the
+    odd edge flip. Only one band's triangulation exists at a time.
+    """
+    nPoints = len(points)
+    reach = max(int(math.ceil(bandSize * overlap)), 2)
+    for bandStart in xrange(0, nPoints, bandSize):
+        bandStop = min(bandStart + bandSize, nPoints)
+        windowStart = max(bandStart - reach, 0)
+        windowStop = min(bandStop + reach, nPoints)
+        edges = _triangulationEdges(ndarray(points[windowStart:windowStop])) + windowStart
+        yield edges[(edges[:, 1] >= bandStart) & (edges[:, 1] < bandStop)]
+
+def graphFromEdges(points, edgeBlocks, nSeeds):
+    """
+    Generate a PyGraph from points and blocks of (inner, outer) index pairs into them,
+    the same graph graphFromTriangulation makes from a whole triangulation: edges point
+    outward, and seeds (the first nSeeds points) get no incoming edges.
+    """
+    pointTuples = [tuple(point) for point in points]
+    graph = digraph()
+    for index, point in enumerate(pointTuples):
+        if index < nSeeds:
+            node_color = "red"
+        else:
+            node_color = "black"
+        graph.add_node(point, [("color", node_color)])
+    
+    for edges in edgeBlocks:
+        for src, dest in edges.tolist():
+            if dest < nSeeds: #seeds can't have incoming edges
+                continue
+            edge = (pointTuples[src], pointTuples[dest])
+            if not graph.has_edge(edge):
+                graph.add_edge(edge, euclideanDistance(edge))
+    
+    return graph
+
+def windowedGraphFromPoints(points, nSeeds, bandSize, overlap = DEFAULT_BAND_OVERLAP):
+    """
+    graphFromPoints for very large point sets: triangulates in overlapping radial bands
+    of bandSize points (see windowedTriangulationEdges), so triangulation memory depends
+    on the band size rather than on the number of points.
+    """
+    if bandSize >= len(points):
+        return graphFromPoints(points, nSeeds)
+    return graphFromEdges(points, windowedTriangulationEdges(points, bandSize, overlap), nSeeds)
+
+def friendly_rename(graph, name_prefix=""):
+    """
+    Builds a new weighted digraph, based on the provided weighted digraph (which isn't modified), 
+    which discards all names in favor of alphanumeric node identifiers.
+    """
+    nextLetter = ord('A')
+    nextNumber = 1
+    identifierMap = {}
+    newGraph = digraph()
+    
+    for node in graph.nodes():
+        if not graph.incidents(node):
+            identifier = name_prefix + chr(nextLetter)
+            nextLetter += 1
+        else:
+            identifier = "@" + name_prefix + str(nextNumber)
+            nextNumber += 1
+        newGraph.add_node(identifier, graph.node_attributes(node))
+        identifierMap[node] = identifier
+    
+    for edge in graph.edges():
+        weight = graph.edge_weight(edge)
+        label = graph.edge_label(edge)
+        src = identifierMap[edge[0]]
+        dest = identifierMap[edge[1]]
+        new_edge = (src, dest)
+        attrs = graph.edge_attributes(edge)
+        newGraph.add_edge(new_edge, weight, label, attrs)
+        
+    return newGraph
+
+class IPruneEdges(IPlugin):
+    """
+    Yapsy plugin interface for algorithms that prune edges off the graph of the Delaunay triangulation. 
+    """
+    def prune(self, graph):
+        """
+        Given a graph, remove some of its edges to make it shaped more like an interaction network.
+        Return the pruned graph, but this is expected to modify the original (and that is what should be returned).
+        """
+        raise NotImplemented("IPruneEdges is a plugin interface. prune MUST be overridden!")
+    
+    def pruneMask(self, table):
+        """
+        Given an EdgeTable, return a boolean array over its edges: True for every edge this
+        pruner keeps. The table is shared and must not be modified.
+        This default runs prune on a graph rebuilt from the table; pruners that can decide
+        from the table's arrays directly should override it, since that's much cheaper.
+        """
+        pruned = self.prune(table.toGraph())
+        return numpy.array([pruned.has_edge(edge) for edge in table.edgeNames()], bool)
+
+class EdgeTable(object):
+    """
+    A graph's edges as arrays, for deciding what to prune without touching the graph:
+        names - node names; nodes are referred to by index into this list
+        src, dest - int arrays, the endpoints of each edge
+        weight - float array, each edge's weight
+    Edges are sorted by destination and, within a destination, by increasing weight, so
+    each node's in-edges are the contiguous run starting at inStart[node];
+    rank is each edge's position in that run (0 for a node's shortest in-edge).
+    """
+    def __init__(self, graph = None):
+        if graph is None:
+            return #fromArrays fills it in
+        self.names = list(graph.nodes())
+        self.attributes = [graph.node_attributes(name) for name in self.names]
+        index = dict((name, position) for position, name in enumerate(self.names))
+        edges = graph.edges()
+        src = numpy.array([index[edge[0]] for edge in edges], numpy.int64)
+        dest = numpy.array([index[edge[1]] for edge in edges], numpy.int64)
+        weight = numpy.array([graph.edge_weight(edge) for edge in edges], float)
+        self._sortEdges(src, dest, weight)
+    
+    @classmethod
+    def fromArrays(cls, arrays):
+        """Rebuild a table from the dictionary of arrays toArrays made."""
+        table = cls()
+        table.names = arrays["names"].tolist()
+        table.attributes = [[("color", "red" if seed else "black")] for seed in arrays["seeds"].tolist()]
+        table._sortEdges(arrays["src"], arrays["dest"], arrays["weight"])
+        return table
+    
+    def toArrays(self):
+        """The table as a dictionary of arrays, for storage; node attributes are reduced to seed colors."""
+        return {
+                "names": numpy.array(self.names),
+                "seeds": numpy.array([("color", "red") in attributes for attributes in self.attributes]),
+                "src": self.src,
+                "dest": self.dest,
+                "weight": self.weight
+               }
+    
+    def _sortEdges(self, src, dest, weight):
+        order = numpy.lexsort((weight, dest))
+        self.src = src[order]
+        self.dest = dest[order]
+        self.weight = weight[order]
+        self.inDegree = numpy.bincount(self.dest, minlength=len(self.names))
+        self.inStart = numpy.concatenate(([0], numpy.cumsum(self.inDegree)[:-1]))
+        self.rank = numpy.arange(len(self.dest)) - self.inStart[self.dest]
+    
+    def __len__(self):
+        return len(self.dest)
+    
+    def edgeNames(self):
+        """The edges as (source name, destination name) pairs, in table order."""
+        return [(self.names[a], self.names[b]) for a, b in zip(self.src.tolist(), self.dest.tolist())]
+    
+    def toGraph(self, keep = None):
+        """A new digraph of the table's nodes and its edges- only those where keep is True, if given."""
+        graph = digraph()
+        for name, attributes in zip(self.names, self.attributes):
+            graph.add_node(name, attributes)
+        for position, edge in enumerate(self.edgeNames()):
+            if keep is None or keep[position]:
+                graph.add_edge(edge, float(self.weight[position]))
+        return graph
+    
+
+def prunerImplementations(paths):
+    """
+    Return an iterable of plugin-info for every locatable implementation of this interface.
+    """
+    manager = yapsy.PluginManager()
+    manager.setPluginPlaces(paths)
+    from fakeDataGenerator.pointsToOutwardDigraph import IPruneEdges as foreignPruneEdges
+    manager.setCategoriesFilter({
+        "PruneEdges" : foreignPruneEdges,                         
+        })
+    manager.collectPlugins()
+    return manager.getPluginsOfCategory("PruneEdges"), manager
+
+def benchmarkWindowedTriangulation(nPoints, bandSize, overlap = DEFAULT_BAND_OVERLAP):
+    """
+    Time global and windowed triangulation of nPoints uniform points in a disk (sorted
+    radially outward, standing in for spiralPointDistribution, which is too slow to make
+    huge benchmarks), and count the edges on which the two disagree.
+    """
+    import time
+    radii = numpy.sqrt(numpy.random.random_sample(nPoints))
+    angles = numpy.random.random_sample(nPoints) * 2 * math.pi
+    order = numpy.argsort(radii)
+    points = numpy.column_stack((radii[order] * numpy.cos(angles[order]), radii[order] * numpy.sin(angles[order])))
+    
+    started = time.time()
+    whole = _triangulationEdges(points)
+    print "global: {0:.2f}s, {1} edges".format(time.time() - started, len(whole))
+    started = time.time()
+    windowed = numpy.concatenate(list(windowedTriangulationEdges(points, bandSize, overlap)))
+    print "windowed: {0:.2f}s, {1} edges".format(time.time() - started, len(windowed))
+    wholeKeys = whole[:, 0] * nPoints + whole[:, 1]
+    windowedKeys = windowed[:, 0] * nPoints + windowed[:, 1]
+    print "missing {0}, extra {1}".format(len(numpy.setdiff1d(wholeKeys, windowedKeys)), len(numpy.setdiff1d(windowedKeys, wholeKeys)))
+
+if __name__ == "__main__":
+    import sys
+    #python pointsToOutwardDigraph.py nPoints bandSize [overlap]
+    benchmarkWindowedTriangulation(int(sys.argv[1]), int(sys.argv[2]), *[float(arg) for arg in sys.argv[3:]])
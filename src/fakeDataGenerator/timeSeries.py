@@ -0,0 +1,110 @@
+'''
+Time series from the model: many independent trajectories, simulated side by side.
+
+Each timestep is one block evaluation of the model as built, one row per trajectory-
+timestep t is rows [t * trajectories, (t + 1) * trajectories) of the draws, so with a seed
+(see counterRandom) every value is still a pure function of seed, node, trajectory and
+time. Two things carry over from one timestep to the next:
+    generators (0-ary nodes) evolve: each trajectory keeps its previous value with
+        probability persistence, else takes a fresh draw- a sticky Markov chain, so every
+        timestep's values have the generator's own distribution, however it's shaped
+    stateful nodes relax toward what their inputs say, with inertia: the value is
+        inertia * previous + (1 - inertia) * the behavior's fresh value
+Only the previous timestep's values of those nodes are kept, so memory is bounded by
+the model and the number of trajectories, not the number of timesteps.
+
+Like interventions, this works on model.Node objects as built, not compact or
+optimized models.
+'''
+
+import random
+import numpy
+import counterRandom
+from graphOptimizer import ancestorClosure
+
+DEFAULT_PERSISTENCE = 0.9
+DEFAULT_STATEFUL_RATE = 0.5
+INERTIA_RANGE = (0.2, 0.9)
+
+def drawInertia(columns, statefulRate = DEFAULT_STATEFUL_RATE, inertiaRange = INERTIA_RANGE):
+    """
+    Pick stateful nodes: each non-generator node the columns are calculated from, with
+    probability statefulRate, gets an inertia drawn uniformly from inertiaRange. Draws from
+    the random module, as model building does. Returns a dictionary of node to inertia.
+    """
+    inertia = {}
+    for node in ancestorClosure(columns):
+        if node._inputs and random.random() < statefulRate:
+            inertia[node] = random.uniform(*inertiaRange)
+    return inertia
+
+class Simulation(object):
+    """
+    Trajectories of the model the given columns are calculated from. inertia is a dictionary
+    of stateful node to its inertia (see drawInertia); seed, if given, is the model's counter-
+    based master seed (see counterRandom.seedModel), used for the generators' carry-over draws.
+    """
+    def __init__(self, columns, trajectories, persistence = DEFAULT_PERSISTENCE, inertia = None, seed = None):
+        self.columns = columns
+        self.trajectories = trajectories
+        self.persistence = persistence
+        self.inertia = inertia or {}
+        self.seed = seed
+        self.order = ancestorClosure(columns)
+        self.time = 0
+        self._previous = {}
+
+    def _carryOver(self, node, start, size):
+        #which trajectories keep their previous value; a stream of its own, apart from the node's draws
+        if self.seed is None:
+            draws = numpy.random.random_sample(size)
+        else:
+            draws = counterRandom.CounterRandom(self.seed, counterRandom.streamId("carry:" + node.name), start).random_sample(size)
+        return draws < self.persistence
+
+    def step(self):
+        """Advance one timestep. Returns the (clean, noisy) lists of column blocks, one row per trajectory."""
+        start = self.time * self.trajectories
+        stop = start + self.trajectories
+        values = {}
+        previous = self._previous
+        self._previous = {}
+        for node in self.order:
+            value = node.evaluateBlock(start, stop, [values[parent] for parent in node._inputs])
+            if node in previous:
+                if not node._inputs:
+                    value = numpy.where(self._carryOver(node, start, self.trajectories), previous[node], value)
+                else:
+                    with numpy.errstate(all='ignore'):
+                        value = self.inertia[node] * previous[node] + (1.0 - self.inertia[node]) * value
+            if node in self.inertia or (not node._inputs and self.persistence > 0):
+                self._previous[node] = value
+            values[node] = value
+        self.time += 1
+        clean = [values[column] for column in self.columns]
+        return clean, [column.noiseBlock(start, stop, block) for column, block in zip(self.columns, clean)]
+
+    def blocks(self, timesteps, blockRows):
+        """
+        Run timesteps steps, yielding the results in blocks of whole timesteps, about blockRows
+        rows each (at least one timestep): (trajectory, time, clean, noisy), where trajectory and
+        time number each row and clean and noisy are lists of column blocks.
+        """
+        stepsPerBlock = max(1, blockRows // self.trajectories)
+        trajectory = numpy.arange(self.trajectories, dtype=float)
+        end = self.time + timesteps
+        while self.time < end:
+            steps = [(self.time, self.step()) for x in range(min(stepsPerBlock, end - self.time))]
+            yield (numpy.tile(trajectory, len(steps)),
+                   numpy.repeat([float(time) for time, step in steps], self.trajectories),
+                   [numpy.concatenate(blocks) for blocks in zip(*[step[0] for time, step in steps])],
+                   [numpy.concatenate(blocks) for blocks in zip(*[step[1] for time, step in steps])])
+
+    def description(self):
+        """The simulation's settings, JSON-friendly."""
+        return {
+                "trajectories": self.trajectories,
+                "timesteps": self.time,
+                "persistence": self.persistence,
+                "inertia": dict((node.name, value) for node, value in self.inertia.items())
+               }
@@ -0,0 +1,173 @@
+'''
+An interface, and implementations of it, for generating a model's graph directly, as an
+alternative to spiralPointDistribution -> graphFromPoints -> IPruneEdges.
+
+That path makes a good interaction-network shape, but the point distribution and the
+triangulation are the expensive part of building a big model. The generators here are
+linear in the number of edges. Each returns a pygraph digraph named the way
+friendly_rename names things (seeds A, B, C..., everything else @1, @2...), with edges
+pointing from earlier nodes to later ones, so it goes straight into workingModelFromPygraph.
+'''
+
+from __future__ import division
+
+import random
+from pygraph.classes.digraph import digraph
+
+DEFAULT_IN_DEGREE_WEIGHTS = (1, 1, 1, 1) #in-degree 1 through 4, equally likely- what uniformThroughFour aims for
+
+class ITopologyGenerator(object):
+    """
+    Interface for algorithms that generate a model's graph from scratch. Implementations
+    are instantiated directly (see config.TOPOLOGY_LUT), not discovered as plugins.
+    """
+    def generate(self, nNodes, nSeeds, name_prefix=""):
+        """
+        Return a pygraph digraph of nNodes nodes, the first nSeeds of them with an in-degree of 0
+        and all others with an in-degree of at least 1. It must be acyclic. Node names follow
+        friendly_rename, with name_prefix.
+        """
+        raise NotImplementedError("ITopologyGenerator is an interface. generate MUST be overridden!")
+
+def nodeNames(nNodes, nSeeds, name_prefix=""):
+    """
+    Names for nodes 0 through nNodes-1, as friendly_rename would give them.
+    """
+    if nSeeds > 26:
+        raise ValueError("Seeds are named by letter; at most 26 are supported, not {0}".format(nSeeds))
+    return [name_prefix + chr(ord('A') + index) for index in range(nSeeds)] + \
+           ["@" + name_prefix + str(number) for number in xrange(1, nNodes - nSeeds + 1)]
+
+def emptyTopology(names, nSeeds):
+    """
+    A digraph with the named nodes and no edges, seeds colored like graphFromTriangulation's.
+    """
+    graph = digraph()
+    for index, name in enumerate(names):
+        graph.add_node(name, [("color", "red" if index < nSeeds else "black")])
+    return graph
+
+class _InDegreeGenerator(ITopologyGenerator):
+    """
+    Shared machinery: every non-seed node draws an in-degree from inDegreeWeights
+    (weight of in-degree 1, 2, ...) and then that many distinct parents from the nodes
+    before it, by the subclass's chooseParents. Edge weights are the distance between
+    the two nodes in generation order, so the edge pruners still have something to go on.
+    """
+    def __init__(self, inDegreeWeights = DEFAULT_IN_DEGREE_WEIGHTS):
+        self.inDegreeWeights = tuple(inDegreeWeights)
+        total = sum(self.inDegreeWeights)
+        self._cumulative = []
+        running = 0
+        for weight in self.inDegreeWeights:
+            running += weight
+            self._cumulative.append(running / total)
+
+    def drawInDegree(self, available):
+        """A random in-degree, no more than the available number of parents."""
+        draw = random.random()
+        for inDegree, threshold in enumerate(self._cumulative, 1):
+            if draw < threshold:
+                break
+        return min(inDegree, available)
+
+    def generate(self, nNodes, nSeeds, name_prefix=""):
+        if nSeeds < 1:
+            raise ValueError("A topology needs at least one seed")
+        names = nodeNames(nNodes, nSeeds, name_prefix)
+        graph = emptyTopology(names, nSeeds)
+        self.start(nSeeds)
+        for node in xrange(nSeeds, nNodes):
+            parents = self.chooseParents(node, self.drawInDegree(node))
+            for parent in parents:
+                graph.add_edge((names[parent], names[node]), node - parent)
+            self.added(node, parents)
+        return graph
+
+    def start(self, nSeeds):
+        """Called once before the first non-seed node is given its parents."""
+        pass
+
+    def chooseParents(self, node, inDegree):
+        """Return inDegree distinct indices, all less than node, to be node's parents."""
+        raise NotImplementedError()
+
+    def added(self, node, parents):
+        """Called after node has been given its parents."""
+        pass
+
+class preferentialAttachment(_InDegreeGenerator):
+    """
+    Barabasi-Albert style growth: each new node picks its parents with probability
+    proportional to their out-degree plus one, so a few hubs feed much of the network,
+    as in real interaction networks. Uses the repeated-endpoint list, so each
+    draw is O(1).
+    """
+    def start(self, nSeeds):
+        self._endpoints = range(nSeeds) #each node once, for its "plus one"...
+
+    def chooseParents(self, node, inDegree):
+        parents = set()
+        while len(parents) < inDegree:
+            parents.add(self._endpoints[random.randrange(len(self._endpoints))])
+        return sorted(parents)
+
+    def added(self, node, parents):
+        self._endpoints.append(node)
+        self._endpoints.extend(parents) #...and once more per out-edge
+
+class layeredRandomDag(_InDegreeGenerator):
+    """
+    Nodes come in layers of layerSize (the first layer is the seeds, however many there are);
+    each node's parents are drawn uniformly from the layer just before its own, or from the
+    nodes before that when it's too small. A node never has more parents than there are nodes
+    before its layer, so the first layer's in-degrees are at most the number of seeds.
+    Makes long, regular cascades.
+    """
+    def __init__(self, inDegreeWeights = DEFAULT_IN_DEGREE_WEIGHTS, layerSize = 10):
+        _InDegreeGenerator.__init__(self, inDegreeWeights)
+        self.layerSize = layerSize
+
+    def start(self, nSeeds):
+        self._nSeeds = nSeeds
+
+    def chooseParents(self, node, inDegree):
+        layer = (node - self._nSeeds) // self.layerSize
+        if layer == 0:
+            previousStart = 0
+        else:
+            previousStart = self._nSeeds + (layer - 1) * self.layerSize
+        previousStop = self._nSeeds + layer * self.layerSize
+        inDegree = min(inDegree, previousStop)
+        if previousStop - previousStart < inDegree:
+            previousStart = max(previousStop - inDegree, 0)
+        return sorted(random.sample(xrange(previousStart, previousStop), inDegree))
+
+CANDIDATE_GENERATORS = [preferentialAttachment(), layeredRandomDag()]
+
+def benchmarkTopologies(nNodes, nSeeds):
+    """
+    Time each of the CANDIDATE_GENERATORS against the spiral, Delaunay and bigDelta path at
+    nNodes nodes, and print each graph's edge count and in-degree histogram.
+    """
+    import time
+    import collections
+    from spiralPointDistribution import spiralPointDistribution
+    from pointsToOutwardDigraph import graphFromPoints, friendly_rename
+    from candidate_test_pruners import bigDelta
+
+    def report(name, started, graph):
+        inDegrees = collections.Counter(len(graph.incidents(node)) for node in graph.nodes())
+        print "{0}: {1:.2f}s, {2} edges, in-degrees {3}".format(name, time.time() - started, len(graph.edges()), sorted(inDegrees.items()))
+
+    started = time.time()
+    graph = bigDelta().prune(friendly_rename(graphFromPoints(spiralPointDistribution(nNodes, nSeeds, 1, 0.5, 1.25/nSeeds, 2), nSeeds)))
+    report("delaunay", started, graph)
+    for generator in CANDIDATE_GENERATORS:
+        started = time.time()
+        report(generator.__class__.__name__, started, generator.generate(nNodes, nSeeds))
+
+if __name__ == "__main__":
+    import sys
+    #python topologyGenerators.py nNodes nSeeds
+    benchmarkTopologies(int(sys.argv[1]), int(sys.argv[2]))
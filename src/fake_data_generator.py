@@ -7,9 +7,27 @@ from __future__ import division
 
 from fakeDataGenerator import model
 from fakeDataGenerator import config
-from random import shuffle
-import csv
+from fakeDataGenerator import artifactCache
+from fakeDataGenerator import counterRandom
+from fakeDataGenerator import columnSampling
+from fakeDataGenerator import columnStatistics
+from fakeDataGenerator import compressedOutput
+from fakeDataGenerator import graphOptimizer
+from fakeDataGenerator import groundTruth
+from fakeDataGenerator import interventions
+from fakeDataGenerator import memoryGovernor
+from fakeDataGenerator import missingMasks
+from fakeDataGenerator import outOfCore
+from fakeDataGenerator import outputWriters
+from fakeDataGenerator import pipeline
+from fakeDataGenerator import timeSeries
+import itertools
+import json
+import numpy
+import os
 import random
+import sys
+import time
 
         
 def weldGraphViz(gvStrList):
@@ -24,50 +42,317 @@ def weldGraphViz(gvStrList):
     joinme.append(gvStrList[-1][8:]) #strip leading digraph{
     return "".join(joinme) #weld
 
-if __name__ == '__main__':
-    settings = config.Config() #uses sys.argv
+def columnHeaders(settings, pickedColumns):
+    """
+    Header rows for the clean and noisy data files, as a (clean, noisy) pair of lists.
+    These describe the model as built, so get them before optimizing it.
+    """
+    cleanHeader = ["{0}:{1}".format(node.name, node.genName(settings.tsvRecursion)) for node in pickedColumns]
+    dirtyHeader = ["{0}:{1} (as {2})".format(
+                                        node.name,
+                                        node.genName(settings.tsvRecursion),
+                                        node.noiseFxn.generate_name(node.name))
+                   for node in pickedColumns]
+    return cleanHeader, dirtyHeader
+
+class DataFiles(object):
+    """
+    The clean and noisy data files of one output root: their writers, their block sinks
+    and, with settings.statistics, their column statistics. With settings.spill, pipelined
+    sinks spill blocks they can't queue next to the output files.
+    """
+    def __init__(self, settings, pathRoot, headers, pipelined):
+        self.pathRoot = pathRoot
+        self.writers = []
+        try:
+            for suffix, header in zip(("", ".noisy"), headers):
+                self.writers.append(outputWriters.openBlockWriter(settings.outputFormat, pathRoot + suffix, settings.missingToken,
+                                                                 settings.compress, settings.compressThreads))
+                self.writers[-1].writeHeader(header)
+        except:
+            self.close()
+            raise
+        self.tables = {}
+        if settings.statistics:
+            self.tables["clean"] = columnStatistics.TableStatistics(headers[0])
+            self.tables["noisy"] = columnStatistics.TableStatistics(headers[1])
+        spillDirectory = os.path.dirname(os.path.abspath(pathRoot)) if settings.spill else None
+        self.sinks = [pipeline.blockSink(writer, pipelined, settings.queueDepth, self.tables.get(name), spillDirectory)
+                      for writer, name in zip(self.writers, ("clean", "noisy"))]
+    
+    def submit(self, cleanColumns, dirtyColumns):
+        self.sinks[0].submit(cleanColumns)
+        self.sinks[1].submit(dirtyColumns)
+    
+    def finish(self):
+        """
+        Wait for both sinks, even if one fails; returns their statistics as
+        [("clean", stats), ("noisy", stats)], or raises the first sink's error.
+        """
+        return zip(("clean", "noisy"), pipeline.finishAll(self.sinks))
+    
+    def writeSidecar(self):
+        if self.tables:
+            columnStatistics.writeSidecar(self.pathRoot + ".stats.json", self.tables)
+    
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+def printWriterStatistics(statistics):
+    """Print the statistics DataFiles.finish returns, for the sinks that keep any."""
+    for name, stats in statistics:
+        if stats is not None:
+            print "{0} writer: {blocks} blocks ({spilled} spilled), queue depth up to {maxDepth}, calculation stalled {producerStall:.2f}s, " \
+                  "writer idle {writerIdle:.2f}s, writing {writeTime:.2f}s".format(name, **stats)
+
+def interventionRoot(outputRoot, number):
+    """Output root of the data files for intervention number (counting from 0)."""
+    return "{0}.intervention{1}".format(outputRoot, number)
+
+def writeDataFiles(settings, pickedColumns, headers, interventionList = ()):
+    """
+    Write the clean and noisy data files for the picked columns, under the given
+    (clean, noisy) header rows.
+    Rows are calculated settings.blockSize at a time: each column's clean and noisy
+    values come out of one columnBlock call, so noise doesn't cost a second evaluation.
+    Missing values are nan in the model; the sinks derive a packed mask per column block
+    from them for the writers (see missingMasks).
+    With settings.pipeline, each file gets its own writer thread (see pipeline), so blocks
+    are written while the next ones are calculated; their statistics are printed at the end.
+    With settings.statistics, per-column summary statistics of both files are accumulated
+    along the way (on the writer threads, if any) and written to outputRoot.stats.json.
+    Each of interventionList (see interventions) gets its own data files, under
+    interventionRoot; its version of each block is made from the baseline's while that's
+    still cached.
+    """
+    outputs = []
+    try:
+        outputs.append(DataFiles(settings, settings.outputRoot, headers, settings.pipeline))
+        for number in range(len(interventionList)):
+            outputs.append(DataFiles(settings, interventionRoot(settings.outputRoot, number), headers, False))
+        try:
+            for start in range(0, settings.samples, settings.blockSize):
+                stop = min(start + settings.blockSize, settings.samples)
+                cleanColumns = []
+                dirtyColumns = []
+                for node in pickedColumns:
+                    clean, dirty = node.columnBlock(start, stop)
+                    cleanColumns.append(clean)
+                    dirtyColumns.append(dirty)
+                outputs[0].submit(cleanColumns, dirtyColumns)
+                for output, intervention in zip(outputs[1:], interventionList):
+                    output.submit(*intervention.columnBlocks(start, stop, cleanColumns, dirtyColumns))
+                for node in pickedColumns:
+                    node.forgetBlock(start, stop)
+                print stop, "rows written"
+        except:
+            pipeline.abandon(outputs, sys.exc_info())
+        statistics = pipeline.finishAll(outputs)
+        printWriterStatistics(statistics[0])
+        for output in outputs:
+            output.writeSidecar()
+    finally:
+        for output in outputs:
+            output.close()
+
+def writeOutOfCore(settings, pickedColumns, headers):
+    """
+    Write the clean and noisy data files as writeDataFiles does, by way of scratch files in
+    settings.scratchDir (see outOfCore): each pass calculates as many rows as the scratch space
+    holds into a clean and a noisy ScratchTable, settings.blockSize rows at a time, then writes
+    them out in tiles of rows that take about settings.transposeBytes.
+    Passes are whole blocks, so the rows are calculated in the same blocks as writeDataFiles'.
+    """
+    width = len(pickedColumns)
+    rowsPerPass = outOfCore.passRows(width, settings.samples, settings.blockSize, settings.scratchBytes, settings.scratchDir)
+    tileRows = outOfCore.tileRows(width, settings.outputFormat, settings.transposeBytes)
+    print "out of core: {0} rows per pass, {1:.1f} MB of scratch, written in tiles of {2} rows".format(
+            rowsPerPass, 16 * width * rowsPerPass / (1024 * 1024), tileRows)
+    tables = []
+    output = DataFiles(settings, settings.outputRoot, headers, settings.pipeline)
+    try:
+        for name in ("clean", "noisy"):
+            tables.append(outOfCore.ScratchTable(settings.scratchDir, width, rowsPerPass, name))
+        try:
+            for first in range(0, settings.samples, rowsPerPass):
+                last = min(first + rowsPerPass, settings.samples)
+                for start in range(first, last, settings.blockSize):
+                    stop = min(start + settings.blockSize, last)
+                    blocks = [node.columnBlock(start, stop) for node in pickedColumns]
+                    tables[0].writeBlock(start - first, [clean for clean, dirty in blocks])
+                    tables[1].writeBlock(start - first, [dirty for clean, dirty in blocks])
+                    for node in pickedColumns:
+                        node.forgetBlock(start, stop)
+                for clean, dirty in itertools.izip(tables[0].tiles(tileRows, last - first), tables[1].tiles(tileRows, last - first)):
+                    output.submit(clean, dirty)
+                print last, "rows written"
+        except:
+            pipeline.abandon([output], sys.exc_info())
+        statistics = output.finish()
+        printWriterStatistics(statistics)
+        output.writeSidecar()
+    finally:
+        for table in tables:
+            table.close()
+        output.close()
+
+TIME_SERIES_COLUMNS = ["trajectory", "time"]
+
+def writeTimeSeries(settings, pickedColumns, headers):
+    """
+    Write the clean and noisy data files as time series (see timeSeries): settings.timeSteps
+    timesteps of settings.samples trajectories, with trajectory and time columns before the
+    picked columns, in blocks of whole timesteps of about settings.blockSize rows.
+    The simulation's settings, including which nodes are stateful, go to outputRoot.timeseries.json.
+    """
+    simulation = timeSeries.Simulation(pickedColumns, settings.samples, settings.persistence,
+                                       timeSeries.drawInertia(pickedColumns, settings.statefulRate), settings.seed)
+    output = DataFiles(settings, settings.outputRoot, [TIME_SERIES_COLUMNS + header for header in headers], settings.pipeline)
+    try:
+        try:
+            for trajectory, times, clean, noisy in simulation.blocks(settings.timeSteps, settings.blockSize):
+                output.submit([trajectory, times] + clean, [trajectory, times] + noisy)
+                print simulation.time, "timesteps written"
+        except:
+            pipeline.abandon([output], sys.exc_info())
+        statistics = output.finish()
+        printWriterStatistics(statistics)
+        output.writeSidecar()
+    finally:
+        output.close()
+    with open(settings.outputRoot + ".timeseries.json", "w") as description:
+        json.dump(simulation.description(), description, indent=1, sort_keys=True)
+
+def writeInterventionManifest(settings, interventionList):
+    """
+    Write outputRoot.interventions.json: for each intervention, its output root, its clamps,
+    how many nodes it recalculates and which output columns it changes.
+    """
+    with open(settings.outputRoot + ".interventions.json", "w") as manifest:
+        json.dump([{
+                    "output": interventionRoot(settings.outputRoot, number),
+                    "clamps": dict((node.name, value) for node, value in intervention.clamps.items()),
+                    "recalculated": len(intervention.affected),
+                    "changedColumns": [intervention.columns[index].name for index in intervention.affectedColumns]
+                   } for number, intervention in enumerate(interventionList)], manifest, indent=1, sort_keys=True)
+
+def generate(settings):
+    """
+    One complete run of the generator under the given config.Config: builds the graphs and
+    writes every output file. Returns a dictionary of timings, in seconds: "build" (graphs,
+    model and GraphViz), "write" (optimizing and writing the data) and "total"; and the
+    process's peak resident memory so far, "peakMegabytes".
+    With settings.maxMemory, the writing settings are planned to fit it (see memoryGovernor).
+    """
+    started = time.time()
+    
+    asBuilt = settings.interventions or settings.timeSteps #these need the model's nodes as built
+    compact = settings.compact
+    if compact and asBuilt:
+        print "--intervene and --timeSteps need the model as node objects; building without --compact"
+        compact = False
+    if settings.scratchDir is not None and asBuilt:
+        print "--scratch doesn't apply to --intervene or --timeSteps; writing directly"
     
     model.graphviz_recursion_depth = settings.gvRecursion
     
+    if settings.seed is not None:
+        #the model's shape comes from the global generators (reseeded per stage, see artifactCache.stageSeed); its data from counterRandom
+        random.seed(settings.seed)
+        numpy.random.seed(settings.seed & 0xFFFFFFFF)
+    
+    cache = None
+    if settings.cacheDir is not None:
+        if settings.seed is None:
+            print "--cache needs --seed (unseeded runs aren't meant to repeat); building without the cache"
+        else:
+            cache = artifactCache.ArtifactCache(settings.cacheDir, settings.cacheMegabytes * 1024 * 1024)
+    
     graphvizModels = []
-    nodeBucket = []
+    truth = groundTruth.GroundTruthRecorder(settings.gvRecursion) if settings.groundTruth else None
+    sampler = columnSampling.columnSampler(settings.nColumns, settings.tsvColRate)
     
     for prefixChar in range(ord('a'), ord('a') + settings.nGraphs):
-        nodes, head = model.buildRandomModel(settings.graphSize,
-                                             settings.nSeeds,
-                                             1,
-                                             0.5,
-                                             1.25/settings.nSeeds,
-                                             2,
-                                             settings.behaviorPaths,
-                                             settings.pruner,
-                                             None,
-                                             chr(prefixChar),
-                                             settings.addIdentity)
+        if settings.topology is None:
+            nodes, head = model.buildRandomModel(settings.graphSize,
+                                                 settings.nSeeds,
+                                                 1,
+                                                 0.5,
+                                                 1.25/settings.nSeeds,
+                                                 2,
+                                                 settings.behaviorPaths,
+                                                 settings.pruner,
+                                                 None,
+                                                 chr(prefixChar),
+                                                 settings.addIdentity,
+                                                 compact,
+                                                 settings.bandSize,
+                                                 cache,
+                                                 settings.seed)
+        else:
+            nodes, head = model.buildGeneratedModel(settings.topology,
+                                                    settings.graphSize,
+                                                    settings.nSeeds,
+                                                    settings.behaviorPaths,
+                                                    chr(prefixChar),
+                                                    settings.addIdentity,
+                                                    compact)
         graphvizModels.append(model.graphvizEntireThing(head))
-        nodeBucket.extend(nodes)
+        for node in nodes:
+            sampler.offer(node)
+            if truth is not None:
+                truth.addNode(node)
+        del nodes #only the picked columns, and what they're calculated from, stay alive
+    
+    if cache is not None:
+        print "artifact cache: {0} hits, {1} misses".format(cache.hits, cache.misses)
     
-    with open(settings.outputRoot + ".gv", "w") as gvfile:
+    with compressedOutput.openOutput(settings.outputRoot + ".gv", settings.compress) as gvfile:
         gvfile.write(weldGraphViz(graphvizModels))
         gvfile.flush()
     
-    pickedColumns = [foo for foo in nodeBucket if random.random() <= settings.tsvColRate]
-    shuffle(pickedColumns)
-    
-    with open(settings.outputRoot + ".txt", "wb") as datafile:
-        with open(settings.outputRoot + ".noisy.txt", "wb") as noisyfile:
-            cleanWriter = csv.writer(datafile, dialect='excel-tab')
-            dirtyWriter = csv.writer(noisyfile, dialect='excel-tab')
-            cleanWriter.writerow(["{0}:{1}".format(node.name, node.genName(settings.tsvRecursion)) for node in pickedColumns])
-            dirtyWriter.writerow(["{0}:{1} (as {2})".format(
-                                                    node.name,
-                                                    node.genName(settings.tsvRecursion),
-                                                    node.noiseFxn.generate_name(node.name))
-                                  for node in pickedColumns])
-            for x in range(settings.samples):
-                cleanWriter.writerow([str(node.calculate(x)) for node in pickedColumns])
-                dirtyWriter.writerow([str(node.columnValue(x)) for node in pickedColumns])
-                if not x % 100:
-                    print x, "rows written"
-            datafile.flush()
-            noisyfile.flush()
\ No newline at end of file
+    pickedColumns = sampler.picked()
+    if truth is not None:
+        truth.write(settings.outputRoot, pickedColumns, len(TIME_SERIES_COLUMNS) if settings.timeSteps else 0)
+        del truth
+    headers = columnHeaders(settings, pickedColumns)
+    built = time.time()
+    
+    if settings.optimize and not compact and not asBuilt:
+        #the optimizer rewrites Node objects; a compact model, or one to clamp or simulate, is evaluated as built
+        print "optimized model:", graphOptimizer.optimize(pickedColumns)
+    
+    if settings.seed is not None:
+        counterRandom.seedModel(pickedColumns, settings.seed)
+    
+    interventionList = [] if settings.timeSteps else interventions.interventions(pickedColumns, settings.interventions)
+    if settings.maxMemory is not None:
+        memoryPlan = memoryGovernor.plan(settings, pickedColumns, interventionList)
+        memoryPlan.apply(settings)
+        print "memory plan:", memoryPlan.description()
+        if not memoryPlan.fits:
+            print "the model alone nearly fills --maxMemory; writing in the smallest blocks, which may still go over it"
+    
+    if settings.timeSteps:
+        if settings.interventions:
+            print "--intervene doesn't apply to --timeSteps; simulating without interventions"
+        writeTimeSeries(settings, pickedColumns, headers)
+    else:
+        if interventionList:
+            writeInterventionManifest(settings, interventionList)
+            print "{0} interventions, recalculating {1:.1f} of {2} nodes each on average".format(
+                    len(interventionList),
+                    sum(len(intervention.affected) for intervention in interventionList) / len(interventionList),
+                    len(graphOptimizer.ancestorClosure(pickedColumns)))
+        if settings.scratchDir is not None and not interventionList:
+            writeOutOfCore(settings, pickedColumns, headers)
+        else:
+            writeDataFiles(settings, pickedColumns, headers, interventionList)
+    finished = time.time()
+    peakMegabytes = memoryGovernor.peakRss() / (1024 * 1024)
+    print "peak memory: {0:.1f} MB".format(peakMegabytes)
+    return {"build": built - started, "write": finished - built, "total": finished - started, "peakMegabytes": peakMegabytes}
+
+if __name__ == '__main__':
+    generate(config.Config()) #uses sys.argv
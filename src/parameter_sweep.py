@@ -0,0 +1,134 @@
+'''
+Run many variants of the fake data generator as one job: the same command-line options
+fake_data_generator.py takes, varied over a grid or a list, inside one process or a pool
+of worker processes that stay warm between variants.
+
+Workers pay for starting Python and importing numpy and scipy once, not once per variant,
+and all variants share one artifact cache (see artifactCache), so a variant whose points,
+triangulation or pruning match an earlier one's skips straight to what changed. Variants
+are run in order of their geometry settings, so neighbors in the schedule share the most.
+(Behavior plugins are still discovered fresh for every variant: they draw their parameters
+from the random module as they load, so reusing them would change the model a seed builds.)
+
+The sweep file is JSON:
+    {
+        "base": {"samples": 1000, "seed": 7},
+        "grid": {"graphSize": [100, 200], "pruner": ["bigdelta", "uniform"]},
+        "variants": [{"graphSize": 500, "pickRate": 0.5}]
+    }
+Keys are fake_data_generator.py's long option names; a value of true is a bare flag.
+Every combination of the grid is a variant, and so is every entry of "variants"
+(each on top of "base"). Variant n writes to output root <output>.v<n>; a manifest of
+every variant's options, output files and timings goes to <output>.manifest.json.
+
+Sharing stages needs a seed, so variants without one get the sweep's default seed. The
+cache doesn't change what a seed produces, so a variant writes the same data as
+fake_data_generator.py run with its options (and that seed). Options the sweep adds- the
+seed, the cache and the output root- are listed in the manifest under "injected", apart
+from the variant's own "options".
+
+usage: parameter_sweep.py sweep.json output [processes]
+'''
+
+import glob
+import itertools
+import json
+import os
+import sys
+import traceback
+
+from fakeDataGenerator import config
+import fake_data_generator
+
+DEFAULT_SWEEP_SEED = 1
+GEOMETRY_OPTIONS = ("graphs", "graphSize", "seeds", "topology", "bandSize", "pruner")
+
+def sweepVariants(spec):
+    """The list of option dictionaries a sweep file describes, base settings included."""
+    base = spec.get("base", {})
+    variants = []
+    grid = spec.get("grid", {})
+    if grid:
+        names = sorted(grid)
+        for values in itertools.product(*[grid[name] for name in names]):
+            variant = dict(base)
+            variant.update(zip(names, values))
+            variants.append(variant)
+    for entry in spec.get("variants", []):
+        variant = dict(base)
+        variant.update(entry)
+        variants.append(variant)
+    if not variants:
+        variants.append(dict(base))
+    return variants
+
+def variantArguments(options):
+    """Command-line arguments for config.Config from an option dictionary."""
+    arguments = []
+    for name, value in sorted(options.items()):
+        if value is True:
+            arguments.append("--" + name)
+        elif value is not False and value is not None:
+            arguments.extend(["--" + name, str(value)])
+    return arguments
+
+def schedule(variants):
+    """Variant indices in run order: grouped by geometry settings, so shared stages are reused soonest."""
+    return sorted(range(len(variants)),
+                  key=lambda index: tuple(repr(variants[index].get(name)) for name in GEOMETRY_OPTIONS + ("seed",)))
+
+def runVariant(job):
+    """Run one (index, options, output root, cache directory) job. Returns its manifest entry."""
+    index, given, outputRoot, cacheDir = job
+    injected = {"output": "{0}.v{1}".format(outputRoot, index)}
+    if "seed" not in given:
+        injected["seed"] = DEFAULT_SWEEP_SEED
+    if "cache" not in given:
+        injected["cache"] = cacheDir
+    options = dict(given)
+    options.update(injected)
+    arguments = variantArguments(options)
+    entry = {"variant": index, "options": dict(given), "injected": injected, "arguments": arguments}
+    try:
+        entry["timings"] = fake_data_generator.generate(config.Config(arguments))
+    except Exception:
+        entry["error"] = traceback.format_exc()
+    entry["outputs"] = dict((path, os.path.getsize(path)) for path in sorted(glob.glob(options["output"] + ".*")))
+    return entry
+
+def runSweep(spec, outputRoot, processes = 1):
+    """
+    Run every variant of a sweep specification, in this process if processes is 1, otherwise
+    in a pool of that many workers. Writes and returns the manifest.
+    """
+    variants = sweepVariants(spec)
+    cacheDir = outputRoot + ".cache"
+    jobs = [(index, variants[index], outputRoot, cacheDir) for index in schedule(variants)]
+    if processes > 1:
+        from multiprocessing import Pool
+        workers = Pool(processes)
+        try:
+            entries = workers.map(runVariant, jobs, chunksize=1)
+        finally:
+            workers.close()
+            workers.join()
+    else:
+        entries = [runVariant(job) for job in jobs]
+    entries.sort(key=lambda entry: entry["variant"])
+    with open(outputRoot + ".manifest.json", "w") as manifest:
+        json.dump(entries, manifest, indent=1, sort_keys=True)
+    return entries
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print "usage: parameter_sweep.py sweep.json output [processes]"
+        sys.exit(1)
+    with open(sys.argv[1]) as specFile:
+        spec = json.load(specFile)
+    entries = runSweep(spec, sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 1)
+    for entry in entries:
+        if "error" in entry:
+            print "variant {0} failed:".format(entry["variant"])
+            print entry["error"]
+        else:
+            print "variant {0}: {1:.2f}s".format(entry["variant"], entry["timings"]["total"])